@@ -0,0 +1,24 @@
+"""table partition watermark
+
+Revision ID: 0c9e5a7b3d14
+Revises: f41b8d6c2e07
+Create Date: 2026-10-18 18:05:31.870254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c9e5a7b3d14'
+down_revision = 'f41b8d6c2e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dbtable', sa.Column('partition_watermark', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dbtable', 'partition_watermark')
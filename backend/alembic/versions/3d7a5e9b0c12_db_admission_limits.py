@@ -0,0 +1,26 @@
+"""db admission limits
+
+Revision ID: 3d7a5e9b0c12
+Revises: 9f06c3d2b8e4
+Create Date: 2026-10-18 14:52:30.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a5e9b0c12'
+down_revision = '9f06c3d2b8e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('db', sa.Column('max_concurrent_checks', sa.Integer(), nullable=True))
+    op.add_column('db', sa.Column('max_queries_per_minute', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('db', 'max_queries_per_minute')
+    op.drop_column('db', 'max_concurrent_checks')
@@ -0,0 +1,31 @@
+"""check watermark
+
+Revision ID: 5c8e1f3a7d20
+Revises: b41d7e2a9c05
+Create Date: 2026-10-18 11:24:51.630718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e1f3a7d20'
+down_revision = 'b41d7e2a9c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('watermark_column_id', sa.Integer(), nullable=True))
+    op.add_column('check', sa.Column('watermark_value', sa.String(), nullable=True))
+    op.add_column('check', sa.Column('incremental_state', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_foreign_key('check_watermark_column_id_fkey', 'check', 'dbcolumn', ['watermark_column_id'], ['id'])
+
+
+def downgrade():
+    op.drop_constraint('check_watermark_column_id_fkey', 'check', type_='foreignkey')
+    op.drop_column('check', 'incremental_state')
+    op.drop_column('check', 'watermark_value')
+    op.drop_column('check', 'watermark_column_id')
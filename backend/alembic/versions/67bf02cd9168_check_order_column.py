@@ -0,0 +1,26 @@
+"""check order column
+
+Revision ID: 67bf02cd9168
+Revises: 83e38849d9e0
+Create Date: 2026-10-18 09:12:40.513220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '67bf02cd9168'
+down_revision = '83e38849d9e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('order_column_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('check_order_column_id_fkey', 'check', 'dbcolumn', ['order_column_id'], ['id'])
+
+
+def downgrade():
+    op.drop_constraint('check_order_column_id_fkey', 'check', type_='foreignkey')
+    op.drop_column('check', 'order_column_id')
@@ -0,0 +1,26 @@
+"""statement timeouts
+
+Revision ID: 7b2f4d91e6a3
+Revises: 3d7a5e9b0c12
+Create Date: 2026-10-18 15:31:04.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2f4d91e6a3'
+down_revision = '3d7a5e9b0c12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('statement_timeout_seconds', sa.Integer(), nullable=True))
+    op.add_column('db', sa.Column('statement_timeout_seconds', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('db', 'statement_timeout_seconds')
+    op.drop_column('check', 'statement_timeout_seconds')
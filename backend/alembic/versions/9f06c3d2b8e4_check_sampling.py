@@ -0,0 +1,26 @@
+"""check sampling
+
+Revision ID: 9f06c3d2b8e4
+Revises: e2a94b6c1f37
+Create Date: 2026-10-18 13:35:42.870152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f06c3d2b8e4'
+down_revision = 'e2a94b6c1f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('sample_method', sa.String(), nullable=True))
+    op.add_column('check', sa.Column('sample_size', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('check', 'sample_size')
+    op.drop_column('check', 'sample_method')
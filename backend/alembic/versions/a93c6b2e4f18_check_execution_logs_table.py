@@ -0,0 +1,76 @@
+"""check execution logs table
+
+Revision ID: a93c6b2e4f18
+Revises: c58a1e7f2d46
+Create Date: 2026-10-18 17:12:09.664031
+
+"""
+import gzip
+
+from alembic import op
+import sqlalchemy as sa
+
+from models.check_execution_log import CheckExecutionLog
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93c6b2e4f18'
+down_revision = 'c58a1e7f2d46'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def log_row(check_execution_id, logs):
+    data, size, truncated = CheckExecutionLog.compress(logs)
+    return {'check_execution_id': check_execution_id, 'data': data, 'size': size, 'truncated': truncated}
+
+
+def upgrade():
+    log_table = op.create_table(
+        'checkexecutionlog',
+        sa.Column('check_execution_id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('truncated', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['check_execution_id'], ['checkexecution.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('check_execution_id')
+    )
+
+    # Postgres can't gzip, the existing logs are compressed here in batches (capped like the logs of new executions)
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT id, logs FROM checkexecution WHERE id > :last_id AND logs IS NOT NULL AND logs <> '' "
+            "ORDER BY id LIMIT :batch_size"
+        ), last_id=last_id, batch_size=BATCH_SIZE).fetchall()
+        if not rows:
+            break
+        op.bulk_insert(log_table, [log_row(id, logs) for id, logs in rows])
+        last_id = rows[-1][0]
+
+    op.drop_column('checkexecution', 'logs')
+
+
+def downgrade():
+    op.add_column('checkexecution', sa.Column('logs', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            'SELECT check_execution_id, data FROM checkexecutionlog WHERE check_execution_id > :last_id '
+            'ORDER BY check_execution_id LIMIT :batch_size'
+        ), last_id=last_id, batch_size=BATCH_SIZE).fetchall()
+        if not rows:
+            break
+        for id, data in rows:
+            conn.execute(
+                sa.text('UPDATE checkexecution SET logs = :logs WHERE id = :id'),
+                logs=gzip.decompress(data).decode(errors='replace') if data is not None else None, id=id
+            )
+        last_id = rows[-1][0]
+
+    op.drop_table('checkexecutionlog')
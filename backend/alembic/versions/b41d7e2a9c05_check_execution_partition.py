@@ -0,0 +1,32 @@
+"""check execution partition
+
+Revision ID: b41d7e2a9c05
+Revises: 67bf02cd9168
+Create Date: 2026-10-18 10:02:17.204391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d7e2a9c05'
+down_revision = '67bf02cd9168'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('latest_partition_only', sa.Boolean(), nullable=True))
+    op.add_column('checkexecution', sa.Column('table_partition_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_checkexecution_table_partition_id'), 'checkexecution', ['table_partition_id'], unique=False)
+    op.create_foreign_key(
+        'checkexecution_table_partition_id_fkey', 'checkexecution', 'dbtablepartition', ['table_partition_id'], ['id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('checkexecution_table_partition_id_fkey', 'checkexecution', type_='foreignkey')
+    op.drop_index(op.f('ix_checkexecution_table_partition_id'), table_name='checkexecution')
+    op.drop_column('checkexecution', 'table_partition_id')
+    op.drop_column('check', 'latest_partition_only')
@@ -0,0 +1,28 @@
+"""check execution heartbeat
+
+Revision ID: c58a1e7f2d46
+Revises: 7b2f4d91e6a3
+Create Date: 2026-10-18 16:04:47.530961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58a1e7f2d46'
+down_revision = '7b2f4d91e6a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('checkexecution', sa.Column('heartbeat_at', sa.TIMESTAMP(), nullable=True))
+    # The reaper looks for running executions without a recent heartbeat
+    op.create_index('ix_checkexecution_running', 'checkexecution', ['status'], unique=False,
+                    postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade():
+    op.drop_index('ix_checkexecution_running', table_name='checkexecution')
+    op.drop_column('checkexecution', 'heartbeat_at')
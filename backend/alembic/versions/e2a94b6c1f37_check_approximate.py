@@ -0,0 +1,24 @@
+"""check approximate
+
+Revision ID: e2a94b6c1f37
+Revises: 5c8e1f3a7d20
+Create Date: 2026-10-18 12:41:09.118243
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a94b6c1f37'
+down_revision = '5c8e1f3a7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('check', sa.Column('approximate', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('check', 'approximate')
@@ -0,0 +1,39 @@
+"""unique table partition
+
+Revision ID: e7c3a1f05b92
+Revises: a93c6b2e4f18
+Create Date: 2026-10-18 17:12:09.204716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3a1f05b92'
+down_revision = 'a93c6b2e4f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicated partitions (fetched twice by concurrent tasks) are merged into the oldest one
+    op.execute("""
+        WITH duplicated AS (
+            SELECT id, MIN(id) OVER (PARTITION BY table_id, name) AS keep_id
+            FROM dbtablepartition
+        )
+        UPDATE checkexecution e SET table_partition_id = d.keep_id
+        FROM duplicated d
+        WHERE e.table_partition_id = d.id AND d.id <> d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM dbtablepartition p
+        USING dbtablepartition kept
+        WHERE kept.table_id = p.table_id AND kept.name = p.name AND kept.id < p.id
+    """)
+    op.create_unique_constraint('unique_partition_name_table_id', 'dbtablepartition', ['name', 'table_id'])
+
+
+def downgrade():
+    op.drop_constraint('unique_partition_name_table_id', 'dbtablepartition', type_='unique')
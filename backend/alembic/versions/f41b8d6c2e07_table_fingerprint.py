@@ -0,0 +1,24 @@
+"""table fingerprint
+
+Revision ID: f41b8d6c2e07
+Revises: e7c3a1f05b92
+Create Date: 2026-10-18 17:40:52.661385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41b8d6c2e07'
+down_revision = 'e7c3a1f05b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dbtable', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dbtable', 'fingerprint')
@@ -2,11 +2,14 @@ import json
 from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 import crud
 import schemas
 from api import deps
+from core.log_stream import log_stream
+from db.session import SessionLocal
 from models import CheckExecutionStatus
 
 router = APIRouter()
@@ -67,6 +70,65 @@ def read_check_detail(
     return crud.check_execution.get_with_logs(db=db, id=id)
 
 
+@router.get('/{id}/status', response_model=schemas.CheckExecutionState)
+def read_check_execution_status(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+) -> Any:
+    """
+    Retrieve the status of a check execution (without logs), polled while the execution is queued or running. Running
+    executions have a recent `heartbeat_at`.
+    """
+    check_exec = crud.check_execution.get(db=db, id=id)
+    if not check_exec:
+        raise HTTPException(status_code=404, detail='Check execution not found')
+    return check_exec
+
+
+@router.get('/{id}/logs/stream')
+def stream_check_execution_logs(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+) -> Any:
+    """
+    Stream the logs of a queued or running check execution as server-sent events: a `log` event per line (JSON string)
+    and an `end` event with the final status. Finished executions only get the `end` event, their logs are saved on the
+    execution itself.
+    """
+    check_exec = crud.check_execution.get(db=db, id=id)
+    if not check_exec:
+        raise HTTPException(status_code=404, detail='Check execution not found')
+    status = check_exec.status
+    # The stream can last as long as the check, don't keep the request DB connection meanwhile
+    db.close()
+
+    if status in (CheckExecutionStatus.QUEUED.value, CheckExecutionStatus.RUNNING.value):
+        events = log_stream.subscribe(id, is_running=lambda: is_execution_running(id))
+    else:
+        events = iter([('end', status)])
+    return StreamingResponse(server_sent_events(events), media_type='text/event-stream')
+
+
+def is_execution_running(id: int) -> bool:
+    db = SessionLocal()
+    try:
+        check_exec = crud.check_execution.get(db=db, id=id)
+        return check_exec is not None and \
+            check_exec.status in (CheckExecutionStatus.QUEUED.value, CheckExecutionStatus.RUNNING.value)
+    finally:
+        db.close()
+
+
+def server_sent_events(events):
+    for event, data in events:
+        if event == 'keepalive':
+            yield ': keepalive\n\n'
+        else:
+            yield 'event: {}\ndata: {}\n\n'.format(event, json.dumps(data))
+
+
 @router.put('/success/{id}', response_model=schemas.CheckExecution)
 def success_check_execution(
     *,
@@ -85,3 +147,30 @@ def success_check_execution(
     check_exec_in.status = CheckExecutionStatus.SUCCESS.value
     check_exec = crud.check_execution.update(db=db, db_obj=check_exec, obj_in=check_exec_in)
     return check_exec
+
+
+@router.put('/cancel/{id}', response_model=schemas.CheckExecution)
+def cancel_check_execution(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+) -> Any:
+    """
+    Cancel a queued or running check execution: its queries are killed on the source DB, so the worker running it
+    fails fast and frees its slot, and the execution is set as cancelled (the worker keeps that status when
+    it finishes, and doesn't start queued executions that were cancelled).
+    """
+    check_exec = crud.check_execution.get(db=db, id=id)
+    if not check_exec:
+        raise HTTPException(status_code=404, detail='Check execution not found')
+    if check_exec.status not in (CheckExecutionStatus.QUEUED.value, CheckExecutionStatus.RUNNING.value):
+        raise HTTPException(status_code=400, detail='Only queued or running check executions can be cancelled')
+
+    # Executions still queued in the DB may already be running, their status is written behind by the worker
+    check_exec.check.database.cancel_queries(check_exec.id)
+
+    check_exec_data = check_exec.json()
+    check_exec_in = schemas.CheckExecutionUpdate(**check_exec_data)
+    check_exec_in.status = CheckExecutionStatus.CANCELLED.value
+    check_exec = crud.check_execution.update(db=db, db_obj=check_exec, obj_in=check_exec_in)
+    return check_exec
@@ -1,4 +1,5 @@
 import json
+from datetime import datetime
 from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Response
@@ -9,7 +10,8 @@ import crud
 import schemas
 from api import deps
 from models.check import CheckType
-from scheduler import scheduler
+from scheduler import enqueue_check, scheduler
+from services.check import CheckService
 from utils import logger, get_random_daily_cron
 
 router = APIRouter()
@@ -48,6 +50,22 @@ def read_check_detail(
     return crud.check.get_with_last_execution(db=db, id=id)
 
 
+@router.get('/{id}/distinct_estimate', response_model=schemas.CheckDistinctEstimate)
+def read_check_distinct_estimate(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    from_time: Optional[datetime] = None,
+    to_time: Optional[datetime] = None,
+) -> Any:
+    """
+    Approximate distinct values of an approximate uniqueness check over a time range (e.g. a week of daily partition
+    runs), merging the HLL sketches of its executions without scanning the table again.
+    """
+    check = get_or_404(db=db, id=id)
+    return CheckService(db).get_distinct_estimate(check, from_time=from_time, to_time=to_time)
+
+
 @router.delete('/delete_all_checks', response_model=schemas.Check)
 def delete_all_checks(
     *,
@@ -120,7 +138,7 @@ def edit_multiple_check(
         job_exists = scheduler.get_job(check.name)
         if c_schema.active:
             if not job_exists:
-                scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+                scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
             scheduler.resume_job(check.name)
         elif job_exists:
             scheduler.pause_job(check.name)
@@ -140,10 +158,15 @@ def edit_check(
     """
     check = get_or_404(db=db, id=id)
     needs_reeschedule = check_in.schedule != check.schedule
+    # The incremental state is only valid for the type and columns it was computed on
+    needs_watermark_reset = (check_in.type, check_in.column_id, check_in.order_column_id, check_in.watermark_column_id) != \
+        (check.type, check.column_id, check.order_column_id, check.watermark_column_id)
+    if needs_watermark_reset:
+        check.reset_watermark()
     check = crud.check.update(db=db, db_obj=check, obj_in=check_in)
 
     if not scheduler.get_job(check.name):
-        scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+        scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
     if needs_reeschedule:
         scheduler.reschedule_job(id=check.name, cron=check.schedule)
     if check.active:
@@ -192,18 +215,20 @@ def activate_check(
     return check
 
 
-@router.post('/trigger/{id}', response_model=schemas.Check)
+@router.post('/trigger/{id}', response_model=schemas.CheckExecutionState)
 def trigger_check_by_id(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
 ) -> Any:
     """
-    Trigger a check (skips the scheduler and simply launches the check right now).
+    Trigger a check (skips the scheduler and sends the check to the workers right now). Returns the queued execution
+    right away, its progress can be polled on `/check_executions/{id}/status`.
     """
     check = get_or_404(db=db, id=id)
-    check.get_func()(check.id)
-    return check
+    check_execution = crud.check_execution.create_queued(db=db, check_id=check.id)
+    enqueue_check(check.id, execution_id=check_execution.id)
+    return check_execution
 
 
 @router.post('/', response_model=schemas.Check)
@@ -221,7 +246,7 @@ def create_check(
         return exists[0]
 
     check = crud.check.create(db=db, obj_in=check_in)
-    scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+    scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
     if check.active:
         scheduler.resume_job(check.name)
     return check
@@ -254,7 +279,7 @@ def auto_create_check(db, params, check_type):
             )
             logger.debug(check_in)
             check = crud.check.create(db=db, obj_in=check_in)
-            scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+            scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
             scheduler.resume_job(check.name)
 
     return check
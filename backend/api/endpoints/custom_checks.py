@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 import crud
 import schemas
 from api import deps
-from scheduler import scheduler
+from scheduler import enqueue_check, scheduler
 
 router = APIRouter()
 
@@ -54,7 +54,7 @@ def create_custom_check(
     check_in: schemas.CustomCheckCreate,
 ) -> Any:
     check = crud.custom_check.create(db=db, obj_in=check_in)
-    scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+    scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
     if check.active:
         scheduler.resume_job(check.name)
     return check
@@ -116,7 +116,7 @@ def edit_multiple_check(
         job_exists = scheduler.get_job(check.name)
         if c_schema.active:
             if not job_exists:
-                scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+                scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
             scheduler.resume_job(check.name)
         elif job_exists:
             scheduler.pause_job(check.name)
@@ -139,7 +139,7 @@ def edit_check(
     check = crud.custom_check.update(db=db, db_obj=check, obj_in=check_in)
 
     if not scheduler.get_job(check.name):
-        scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+        scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
     if needs_reeschedule:
         scheduler.reschedule_job(id=check.name, cron=check.schedule)
     if check.active:
@@ -185,23 +185,25 @@ def activate_check(
 
     check = crud.custom_check.update(db=db, db_obj=check, obj_in=check_in)
     if not scheduler.get_job(check.name):
-        scheduler.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+        scheduler.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
     scheduler.resume_job(check.name)
     return check
 
 
-@router.post('/trigger/{id}', response_model=schemas.CustomCheck)
+@router.post('/trigger/{id}', response_model=schemas.CheckExecutionState)
 def trigger_check_by_id(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
 ) -> Any:
     """
-    Trigger a custom check.
+    Trigger a custom check. Returns the queued execution right away, its progress can be polled on
+    `/check_executions/{id}/status`.
     """
     check = get_or_404(db=db, id=id)
-    check.get_func()(check.id)
-    return check
+    check_execution = crud.check_execution.create_queued(db=db, check_id=check.id)
+    enqueue_check(check.id, execution_id=check_execution.id)
+    return check_execution
 
 
 def get_or_404(db, id):
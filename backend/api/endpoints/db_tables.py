@@ -58,6 +58,6 @@ def trigger_checks(
     partitions: Optional[List[int]] = [],
 ) -> Any:
     """
-    Trigger all checks for the given table
+    Trigger all checks for the given table (on each of the given partitions, or the whole table if none is given)
     """
-    return DBTableService(db).trigger_checks(id=id)
+    return DBTableService(db).trigger_checks(id=id, partitions=partitions)
@@ -9,6 +9,7 @@ import schemas
 from api import deps
 from celery_app import celery_app
 from core.db_engines import engine_specs
+from core.engine_registry import engine_registry
 from services.db import DBService
 from utils import logger
 
@@ -73,6 +74,7 @@ def delete_db_filter(
     filtered_db = crud.db.get_filtered(db=db, **filter_dict)
     for db_ in filtered_db:
         db_del = crud.db.remove(db=db, id=db_.id)
+        engine_registry.invalidate(db_del.id)
         deleted_dbs.append(db_del)
     return deleted_dbs
 
@@ -100,7 +102,11 @@ def edit_db(
     db_in: schemas.DBUpdate,
 ) -> Any:
     db_ = get_or_404(db=db, id=id)
-    return crud.db.update(db=db, db_obj=db_, obj_in=db_in)
+    db_ = crud.db.update(db=db, db_obj=db_, obj_in=db_in)
+
+    # Drop the pooled connections opened with the previous connection details
+    engine_registry.invalidate(db_.id)
+    return db_
 
 
 @router.get('/{id}/test_conn', response_model=schemas.TestDBConn)
@@ -6,5 +6,11 @@ celery_app = Celery(
     backend=settings.REDIS_BACKEND,
     broker=settings.REDIS_BACKEND
 )
-celery_app.conf.task_routes = {'tasks.celery_worker.*': {'queue': 'main'}}
-celery_app.conf.update(task_track_started=True)
+# Check executions get their own queue, so they scale out across worker nodes independently of the metadata tasks
+celery_app.conf.task_routes = {
+    'tasks.celery_worker.exec_check': {'queue': 'checks'},
+    'tasks.celery_worker.exec_table_checks': {'queue': 'checks'},
+    'tasks.celery_worker.*': {'queue': 'main'},
+}
+# Checks are long running, workers only reserve the task they are running
+celery_app.conf.update(task_track_started=True, worker_prefetch_multiplier=1)
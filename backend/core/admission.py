@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import redis
+
+from core.config import settings
+
+
+class AdmissionTimeout(Exception):
+    pass
+
+
+class CheckAlreadyRunning(Exception):
+    pass
+
+
+class RedisAdmissionBackend:
+    """
+    Admission state shared by the API process and all the Celery workers. Slots are the members of a sorted set scored
+    by their lease expiry, so the slots of a crashed worker are freed once their lease is over.
+    """
+
+    # Time comes from the caller: Redis 3 doesn't allow writes after calling TIME in a script
+    ACQUIRE_SCRIPT = """
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+        if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('ZADD', KEYS[1], ARGV[3] + ARGV[4], ARGV[1])
+            redis.call('EXPIRE', KEYS[1], ARGV[4])
+            return 1
+        end
+        return 0
+    """
+
+    CONSUME_SCRIPT = """
+        local queries = redis.call('INCR', KEYS[1])
+        if queries == 1 then
+            redis.call('EXPIRE', KEYS[1], ARGV[1])
+        end
+        return queries
+    """
+
+    RENEW_SCRIPT = """
+        if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+            redis.call('ZADD', KEYS[1], ARGV[2] + ARGV[3], ARGV[1])
+            redis.call('EXPIRE', KEYS[1], ARGV[3])
+            return 1
+        end
+        return 0
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+        self._renew = client.register_script(self.RENEW_SCRIPT)
+        self._consume = client.register_script(self.CONSUME_SCRIPT)
+
+    def try_acquire(self, key: str, token: str, limit: int, lease_seconds: int) -> bool:
+        return bool(self._acquire(keys=[key], args=[token, limit, time.time(), lease_seconds]))
+
+    def renew(self, key: str, token: str, lease_seconds: int) -> bool:
+        return bool(self._renew(keys=[key], args=[token, time.time(), lease_seconds]))
+
+    def release(self, key: str, token: str):
+        self.client.zrem(key, token)
+
+    def consume(self, key: str, window_seconds: int) -> int:
+        return int(self._consume(keys=[key], args=[window_seconds * 2]))
+
+
+class LocalAdmissionBackend:
+    """
+    In-process stand-in of `RedisAdmissionBackend` (for tests and single process setups), only the threads of the
+    current process share the limits.
+    """
+
+    def __init__(self):
+        self._slots = {}  # key -> {token: lease expiry}
+        self._counters = {}  # key -> (queries, expiry)
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, token: str, limit: int, lease_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            slots = {t: expiry for t, expiry in self._slots.get(key, {}).items() if expiry > now}
+            if len(slots) >= limit:
+                self._slots[key] = slots
+                return False
+            slots[token] = now + lease_seconds
+            self._slots[key] = slots
+            return True
+
+    def renew(self, key: str, token: str, lease_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            slots = self._slots.get(key, {})
+            if slots.get(token, 0) <= now:
+                return False
+            slots[token] = now + lease_seconds
+            return True
+
+    def release(self, key: str, token: str):
+        with self._lock:
+            self._slots.get(key, {}).pop(token, None)
+
+    def consume(self, key: str, window_seconds: int) -> int:
+        now = time.time()
+        with self._lock:
+            self._counters = {k: counter for k, counter in self._counters.items() if counter[1] > now}
+            queries, expiry = self._counters.get(key, (0, now + window_seconds * 2))
+            self._counters[key] = (queries + 1, expiry)
+            return queries + 1
+
+
+class HeldLeases:
+    """
+    Slot and lock leases held by the current process. The execution heartbeat renews them (see `ExecutionHeartbeat`),
+    so checks running longer than the lease keep their slot and lock, while those of a dead process still expire.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._leases = {}  # (key, token) -> (backend, lease_seconds)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, backend, key: str, token: str, lease_seconds: int):
+        with self._lock:
+            self._leases[(key, token)] = (backend, lease_seconds)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._leases.pop((key, token), None)
+
+    def renew(self):
+        with self._lock:
+            leases = list(self._leases.items())
+        for (key, token), (backend, lease_seconds) in leases:
+            if not backend.renew(key, token, lease_seconds):
+                print(f'Lease {key} expired before it was renewed')
+
+
+held_leases = HeldLeases()
+# Leases belong to the process that acquired them, a forked child starts without any
+os.register_at_fork(after_in_child=held_leases._reset)
+
+
+class DBAdmission:
+    """
+    Admission control of the source DBs: at most `max_concurrent_checks` check executions run at once against a DB,
+    and at most `max_queries_per_minute` queries are sent to it (fixed one minute windows). The limits are enforced
+    across all the scheduler threads and Celery workers through the shared backend, executions over the limits wait
+    for a free slot or budget instead of failing.
+    """
+
+    def __init__(self, backend, default_max_concurrent_checks: int, lease_seconds: int, poll_seconds: float = 1,
+                 window_seconds: int = 60):
+        self.backend = backend
+        self.default_max_concurrent_checks = default_max_concurrent_checks
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.window_seconds = window_seconds
+
+    def max_concurrent_checks(self, db) -> int:
+        return db.max_concurrent_checks or self.default_max_concurrent_checks
+
+    @contextmanager
+    def slot(self, db, timeout: float = None):
+        """
+        Holds one of the check execution slots of the DB while the block runs. Waits up to `timeout` seconds (forever
+        if None) for a free slot, raises `AdmissionTimeout` if there is none by then.
+        """
+        key, token = f'dq:db:{db.id}:slots', uuid.uuid4().hex
+        limit = self.max_concurrent_checks(db)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while not self.backend.try_acquire(key, token, limit, self.lease_seconds):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise AdmissionTimeout(f'No free check slots for DB {db.id} (max {limit} concurrent checks)')
+            time.sleep(self.poll_seconds)
+
+        try:
+            with held_leases.hold(self.backend, key, token, self.lease_seconds):
+                yield
+        finally:
+            self.backend.release(key, token)
+
+    def throttle_query(self, db_id: int, max_queries_per_minute: int = None):
+        """
+        Takes one query from the per-minute budget of the DB, waiting for the next window if it's already spent.
+        """
+        if not max_queries_per_minute:
+            return
+
+        while True:
+            window = int(time.time() // self.window_seconds)
+            if self.backend.consume(f'dq:db:{db_id}:queries:{window}', self.window_seconds) <= max_queries_per_minute:
+                return
+            time.sleep(max((window + 1) * self.window_seconds - time.time(), 0))
+
+
+class CheckLocks:
+    """
+    Per-check mutual exclusion across the scheduler, the API and all the Celery workers: a single slot per check on the
+    admission backend. Runs of a check that is already running are skipped instead of scanning the same table again.
+    Locks are leases renewed by the execution heartbeat, the lock of a worker that died is free once its lease is over.
+    Locks are never taken from their holder, so a live run that can't write its heartbeats keeps its lock.
+    """
+
+    def __init__(self, backend, lease_seconds: int):
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    def _key(check_id: int) -> str:
+        return f'dq:check:{check_id}:lock'
+
+    @contextmanager
+    def hold(self, check_id: int):
+        """
+        Holds the lock of the check while the block runs, raises `CheckAlreadyRunning` if another run holds it.
+        """
+        key, token = self._key(check_id), uuid.uuid4().hex
+        if not self.backend.try_acquire(key, token, 1, self.lease_seconds):
+            raise CheckAlreadyRunning(f'Check {check_id} is already running')
+        try:
+            with held_leases.hold(self.backend, key, token, self.lease_seconds):
+                yield
+        finally:
+            self.backend.release(key, token)
+
+
+def get_admission_backend():
+    if settings.SOURCE_DB_ADMISSION_BACKEND == 'local':
+        return LocalAdmissionBackend()
+    return RedisAdmissionBackend(redis.Redis.from_url(settings.REDIS_BACKEND))
+
+
+admission_backend = get_admission_backend()
+db_admission = DBAdmission(
+    backend=admission_backend,
+    default_max_concurrent_checks=settings.SOURCE_DB_MAX_CONCURRENT_CHECKS,
+    lease_seconds=settings.SOURCE_DB_SLOT_LEASE_SECONDS,
+)
+check_locks = CheckLocks(backend=admission_backend, lease_seconds=settings.CHECK_LOCK_LEASE_SECONDS)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import List
+
+import redis
+import requests
+
+from core.admission import admission_backend
+from core.config import settings
+
+
+class RedisAlertOutbox:
+    """
+    Alerts waiting to be sent, shared by all the Celery workers (that enqueue them) and the scheduler (that sends them).
+    """
+
+    KEY = 'dq:alerts:outbox'
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def put(self, alert: dict):
+        self.client.rpush(self.KEY, json.dumps(alert))
+
+    def put_back(self, alerts: List[dict]):
+        # Alerts not sent yet go back to the front, so they are the first of the next digest
+        if alerts:
+            self.client.lpush(self.KEY, *[json.dumps(a) for a in reversed(alerts)])
+
+    def take(self, max_alerts: int) -> List[dict]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self.KEY, 0, max_alerts - 1)
+        pipe.ltrim(self.KEY, max_alerts, -1)
+        alerts, _ = pipe.execute()
+        return [json.loads(a) for a in alerts]
+
+
+class LocalAlertOutbox:
+    """
+    In-process stand-in of `RedisAlertOutbox` (for tests and single process setups).
+    """
+
+    def __init__(self):
+        self._alerts = deque()
+        self._lock = threading.Lock()
+
+    def put(self, alert: dict):
+        with self._lock:
+            self._alerts.append(alert)
+
+    def put_back(self, alerts: List[dict]):
+        with self._lock:
+            self._alerts.extendleft(reversed(alerts))
+
+    def take(self, max_alerts: int) -> List[dict]:
+        with self._lock:
+            return [self._alerts.popleft() for _ in range(min(max_alerts, len(self._alerts)))]
+
+
+class AlertDispatcher:
+    """
+    Sends the alerts enqueued by the checks, so a slow or failing alert channel never holds up a check. Every run (see
+    the scheduler `dispatch_alerts` job) sends one digest per channel with the alerts enqueued since the previous run:
+    - Repeated alerts of a check are merged into one line, and not sent again for `dedupe_seconds` once sent.
+    - At most `max_posts_per_minute` digests are posted to a channel, alerts over the budget wait for the next run.
+    - Alerts of failed posts go back to the outbox, they are dropped after `max_attempts` failed posts.
+    Dedupe and rate limit state lives on the admission backend, so it's shared by all the processes.
+    """
+
+    def __init__(self, outbox, backend, dedupe_seconds: int, max_posts_per_minute: int, max_attempts: int,
+                 timeout_seconds: float, max_alerts: int = 1000, max_lines: int = 50):
+        self.outbox = outbox
+        self.backend = backend
+        self.dedupe_seconds = dedupe_seconds
+        self.max_posts_per_minute = max_posts_per_minute
+        self.max_attempts = max_attempts
+        self.timeout_seconds = timeout_seconds
+        self.max_alerts = max_alerts
+        self.max_lines = max_lines
+
+    @staticmethod
+    def _channel_key(channel: str) -> str:
+        return hashlib.sha1(channel.encode()).hexdigest()[:16]
+
+    def enqueue(self, channel: str, check_id: int, check_name: str, url: str):
+        self.outbox.put({
+            'channel': channel, 'check_id': check_id, 'check_name': check_name, 'url': url, 'time': time.time(),
+            'attempts': 0,
+        })
+
+    def dispatch(self) -> int:
+        """
+        Sends the digests of the alerts waiting in the outbox, returns the number of posts sent.
+        """
+        channels = {}
+        for alert in self.outbox.take(self.max_alerts):
+            channels.setdefault(alert['channel'], []).append(alert)
+
+        sent = 0
+        for channel, alerts in channels.items():
+            channel_key = self._channel_key(channel)
+            window = int(time.time() // 60)
+            if self.backend.consume(f'dq:alerts:{channel_key}:posts:{window}', 60) > self.max_posts_per_minute:
+                self.outbox.put_back(alerts)
+                continue
+
+            checks = {}  # check_id -> (first alert, repeats)
+            for alert in alerts:
+                first, repeats = checks.get(alert['check_id'], (alert, 0))
+                checks[alert['check_id']] = (first, repeats + 1)
+            # Checks already alerted in the last `dedupe_seconds` (or earlier in this digest) are left out
+            checks = {
+                check_id: check for check_id, check in checks.items()
+                if check[0]['attempts'] or self.backend.try_acquire(
+                    f'dq:alerts:{channel_key}:check:{check_id}', 'sent', 1, self.dedupe_seconds
+                )
+            }
+            if not checks:
+                continue
+
+            if self._post(channel, self.digest(list(checks.values()))):
+                sent += 1
+                continue
+
+            retries = [dict(a, attempts=a['attempts'] + 1) for a, _ in checks.values()]
+            dropped = [a for a in retries if a['attempts'] >= self.max_attempts]
+            if dropped:
+                print(f'Dropping the alerts of checks {[a["check_id"] for a in dropped]} after {self.max_attempts} '
+                      f'failed posts')
+            self.outbox.put_back([a for a in retries if a['attempts'] < self.max_attempts])
+        return sent
+
+    def digest(self, checks: list) -> str:
+        """
+        Message of the failed `(alert, repeats)` checks, a single failure keeps the format of the per-check alerts.
+        """
+        def line(alert, repeats):
+            times = f' ({repeats} times)' if repeats > 1 else ''
+            return f'- "{alert["check_name"]}"{times}: {alert["url"]}'
+
+        if len(checks) == 1 and checks[0][1] == 1:
+            alert = checks[0][0]
+            return """
+    #### :x: Check "{check_name}" failed.
+    **Url**: {url}
+        """.format(check_name=alert['check_name'], url=alert['url'])
+
+        lines = [line(alert, repeats) for alert, repeats in checks[:self.max_lines]]
+        if len(checks) > self.max_lines:
+            lines.append(f'- ... and {len(checks) - self.max_lines} more')
+        return '#### :x: {} checks failed.\n{}'.format(len(checks), '\n'.join(lines))
+
+    def _post(self, channel: str, msg: str) -> bool:
+        try:
+            response = requests.post(
+                channel, data=json.dumps({'text': msg}), headers={'Content-Type': 'application/json'},
+                timeout=self.timeout_seconds
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            print(e)
+            return False
+
+
+def get_alert_outbox():
+    if settings.SOURCE_DB_ADMISSION_BACKEND == 'local':
+        return LocalAlertOutbox()
+    return RedisAlertOutbox(redis.Redis.from_url(settings.REDIS_BACKEND))
+
+
+alert_dispatcher = AlertDispatcher(
+    outbox=get_alert_outbox(),
+    backend=admission_backend,
+    dedupe_seconds=settings.ALERT_DEDUPE_SECONDS,
+    max_posts_per_minute=settings.ALERT_MAX_POSTS_PER_MINUTE,
+    max_attempts=settings.ALERT_MAX_ATTEMPTS,
+    timeout_seconds=settings.ALERT_TIMEOUT_SECONDS,
+)
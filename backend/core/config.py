@@ -44,9 +44,73 @@ class Settings(BaseSettings):
 
     REDIS_BACKEND: str = 'redis://redis:6379/0'
 
+    # Source DB connection pools (shared by all checks and metadata tasks running in the same process)
+    SOURCE_DB_POOL_SIZE: int = 5
+    SOURCE_DB_MAX_OVERFLOW: int = 10
+    SOURCE_DB_POOL_RECYCLE_SECONDS: int = 60 * 30
+    SOURCE_DB_ENGINE_IDLE_SECONDS: int = 60 * 10
+    SOURCE_DB_MAX_ENGINES: int = 20
+
+    # Source DB admission control: max concurrent check executions per DB (unless set on the DB itself), lease of an
+    # execution slot (renewed by the execution heartbeat, freed after it if the worker dies) and delay before an
+    # execution over the limit is retried.
+    # Limits are shared through Redis, `local` keeps them per process (tests)
+    SOURCE_DB_ADMISSION_BACKEND: str = 'redis'
+    SOURCE_DB_MAX_CONCURRENT_CHECKS: int = 4
+    SOURCE_DB_SLOT_LEASE_SECONDS: int = 60 * 60
+    SOURCE_DB_ADMISSION_WAIT_SECONDS: int = 10
+    SOURCE_DB_ADMISSION_RETRY_SECONDS: int = 30
+
+    # Max run time of a check query on the source DB, unless set on the check or its DB
+    CHECK_STATEMENT_TIMEOUT_SECONDS: int = 60 * 30
+
+    # Running check executions send a heartbeat every `CHECK_EXECUTION_HEARTBEAT_SECONDS`, the reaper (every
+    # `CHECK_EXECUTION_REAPER_INTERVAL_SECONDS`) sets as timed out those without one for `CHECK_EXECUTION_STALE_SECONDS`
+    CHECK_EXECUTION_HEARTBEAT_SECONDS: int = 30
+    CHECK_EXECUTION_STALE_SECONDS: int = 60 * 5
+    CHECK_EXECUTION_REAPER_INTERVAL_SECONDS: int = 60
+
+    # Live logs of the running executions (Redis pub/sub), late subscribers first get the last lines of the backlog.
+    # Lines are published in the background every `CHECK_LOG_STREAM_FLUSH_SECONDS`, and dropped for
+    # `CHECK_LOG_STREAM_BACKOFF_SECONDS` after a failed publish
+    CHECK_LOG_STREAMING: bool = False
+    CHECK_LOG_STREAM_BACKLOG_LINES: int = 100
+    CHECK_LOG_STREAM_BACKLOG_SECONDS: int = 60 * 60 * 6
+    CHECK_LOG_STREAM_FLUSH_SECONDS: float = 0.5
+    CHECK_LOG_STREAM_MAX_PENDING: int = 10000
+    CHECK_LOG_STREAM_BACKOFF_SECONDS: int = 60
+
+    # Lease of the per-check lock (a check runs once at a time), renewed by the execution heartbeat while the check runs,
+    # so the lock of a dead worker is free after at most the lease
+    CHECK_LOCK_LEASE_SECONDS: int = 60 * 5
+
+    # Saved logs of a check execution are capped (the end is kept) and deleted after the retention period
+    CHECK_EXECUTION_LOGS_MAX_BYTES: int = 256 * 1024
+    CHECK_EXECUTION_LOGS_RETENTION_DAYS: int = 90
+
+    # Check execution rows are written behind in bulk, every `EXECUTION_WRITER_FLUSH_SECONDS` or once
+    # `EXECUTION_WRITER_MAX_PENDING` writes are waiting
+    EXECUTION_WRITER_FLUSH_SECONDS: float = 1.0
+    EXECUTION_WRITER_MAX_PENDING: int = 500
+
+    # Rows per chunk when streaming a column from the source DB (checks that can't be pushed down)
+    CHECK_FETCH_CHUNK_SIZE: int = 50000
+
+    # Scheduled runs of the checks of a table with the same schedule are collected for `SCHEDULED_CHECKS_BATCH_SECONDS`
+    # and run together, so the checks that can share a scan read the table once (0 runs every check on its own)
+    SCHEDULED_CHECKS_BATCH_SECONDS: float = 5
+
     # Mattermost hook to send alerts to
     MATTERMOST_HOOK: str
 
+    # Alerts are sent in one digest per channel every `ALERT_DIGEST_SECONDS`, repeated alerts of a check are only sent
+    # once every `ALERT_DEDUPE_SECONDS`
+    ALERT_DIGEST_SECONDS: int = 60
+    ALERT_DEDUPE_SECONDS: int = 60 * 60
+    ALERT_MAX_POSTS_PER_MINUTE: int = 10
+    ALERT_MAX_ATTEMPTS: int = 5
+    ALERT_TIMEOUT_SECONDS: int = 10
+
     # External API token
     API_KEY_NAME: str = 'access-token'
     API_KEY: str
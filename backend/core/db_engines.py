@@ -4,17 +4,271 @@ from builtins import sorted
 from typing import Dict
 
 from psycopg2 import sql
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 from sqlalchemy.engine import create_engine
 
 from tasks.utils import required_args
 
+NUMERIC_TYPES = ('tinyint', 'smallint', 'int', 'bigint', 'integer', 'real', 'double', 'float', 'decimal', 'numeric')
+
+# Comment prepended to the queries of check executions (`/* dq_execution_id=1,2 */`) to find them on the source DB
+QUERY_TAG_PREFIX = '/* dq_execution_id='
+QUERY_TAG_RE = re.compile(r'^\s*/\* dq_execution_id=([\d,]+) \*/')
+
 
 class BaseEngineSpec:
 
-    def get_sqla_engine(self, hostname: str, port: int, database: str, username: str = None, password: str = None):
+    # Engines that can compute the check aggregates on the source DB, so only a handful of rows are sent back to the
+    # worker. Engines that can't push down fall back to fetching the whole column and running the check with pandas.
+    push_down = False
+
+    # Max number of sample rows (e.g. top duplicated keys) returned by push-down queries
+    sample_limit = 10
+
+    # Sampling methods supported with TABLESAMPLE and the SQL random number function ([0, 1) floats) used by the others
+    tablesample_methods = ()
+    random_function = 'RANDOM()'
+
+    # Engines with a native HyperLogLog distinct count for approximate uniqueness checks, the others stream the column
+    # into a HLL sketch on the worker
+    approx_distinct = False
+
+    # Engines that enforce a statement timeout on the DB itself, queries on the others are cancelled by a watchdog on
+    # the worker once their check execution is over its timeout
+    statement_timeout = False
+
+    # Aggregates of the check types that can share a single scan of the table (`{c}` is the quoted check column).
+    # Ordered checks need a window over their own ordering key so they can't be batched.
+    batch_aggregates = {
+        'uniqueness': {
+            'total_rows': 'COUNT(*)',
+            'unique_rows': 'COUNT(DISTINCT {c}) + COALESCE(MAX(CASE WHEN {c} IS NULL THEN 1 ELSE 0 END), 0)',
+        },
+        'non_null': {
+            'total_rows': 'COUNT(*)',
+            'null_rows': 'COUNT(*) - COUNT({c})',
+        },
+        'freshness': {
+            'last_value': 'MAX({c})',
+        },
+        'outliers': {
+            'total_rows': 'COUNT({c})',
+            'mean': 'AVG({c})',
+            'stddev': 'STDDEV_SAMP({c})',
+        },
+    }
+
+    def get_sqla_engine(self, hostname: str, port: int, database: str, username: str = None, password: str = None,
+                        **engine_kwargs):
+        raise NotImplementedError()
+
+    def quote(self, name: str, cursor=None) -> str:
+        raise NotImplementedError()
+
+    @staticmethod
+    def tag_query(statement: str, execution_ids) -> str:
+        return '{}{} */ {}'.format(QUERY_TAG_PREFIX, ','.join(str(i) for i in execution_ids), statement)
+
+    @staticmethod
+    def tagged_execution_ids(query: str) -> list:
+        match = QUERY_TAG_RE.match(query or '')
+        return [int(i) for i in match.group(1).split(',') if i] if match else []
+
+    def set_statement_timeout(self, connection, timeout_seconds: int = None):
+        """
+        Limits the run time of the next statement on the given SQLAlchemy connection, a no-op for engines without
+        `statement_timeout`.
+        """
+        pass
+
+    def cancel_queries(self, engine, execution_id: int) -> int:
+        """
+        Kills the running queries tagged with the given check execution id, returns the number of killed queries.
+        """
         raise NotImplementedError()
 
+    @staticmethod
+    def batch_alias(check, metric: str) -> str:
+        return f'c{check.id}_{metric}'
+
+    def literal(self, value: str, column_type: str = None, cursor=None) -> str:
+        """
+        SQL literal for a partition value (always a string in the partition name) based on the column data type.
+        """
+        column_type = (column_type or '').lower()
+        if column_type.startswith(NUMERIC_TYPES):
+            return repr(float(value)) if '.' in value else str(int(value))
+
+        prefix = ''
+        if column_type == 'date':
+            prefix = 'DATE '
+        elif column_type.startswith('timestamp'):
+            prefix = 'TIMESTAMP '
+        return "{}'{}'".format(prefix, value.replace("'", "''"))
+
+    def partition_predicate(self, check, partition, cursor=None) -> str:
+        """
+        WHERE condition selecting a single partition, from partition names like `dt=2021-01-01/hour=00`.
+        """
+        conditions = []
+        for part in partition.name.split('/'):
+            column_name, value = part.split('=', 1)
+            column = check.table.get_column(column_name)
+            conditions.append('{} = {}'.format(
+                self.quote(column_name, cursor), self.literal(value, column.type if column else None, cursor)
+            ))
+        return ' AND '.join(conditions)
+
+    def watermark_predicate(self, check, lower=None, upper=None, cursor=None) -> str:
+        """
+        WHERE condition selecting the rows of an incremental check in the watermark range `(lower, upper]`.
+        """
+        column = check.watermark_column
+        conditions = []
+        if lower is not None:
+            conditions.append('{} > {}'.format(self.quote(column.name, cursor), self.literal(lower, column.type, cursor)))
+        if upper is not None:
+            conditions.append('{} <= {}'.format(self.quote(column.name, cursor), self.literal(upper, column.type, cursor)))
+        return ' AND '.join(conditions)
+
+    def source_q(self, check, cursor=None, partition=None, watermark=None) -> str:
+        """
+        Relation the check queries read from: the whole table, or a subquery with only the rows of the given partition
+        and/or watermark range (`(lower, upper)`, see `watermark_predicate`). Engines push the predicates down to the
+        table scan, so only those rows are read. Sampled checks read a random sample of those rows (see `sample_q`).
+        """
+        table = '{}.{}'.format(self.quote(check.schema.name, cursor), self.quote(check.table.name, cursor))
+        conditions = []
+        if partition is not None:
+            conditions.append(self.partition_predicate(check, partition, cursor))
+        if watermark is not None:
+            conditions.append(self.watermark_predicate(check, *watermark, cursor=cursor))
+        conditions = [c for c in conditions if c]
+
+        if check.is_sampled:
+            return self.sample_q(check, table, conditions)
+        if not conditions:
+            return table
+        return '(SELECT * FROM {} WHERE {}) AS source'.format(table, ' AND '.join(conditions))
+
+    def sample_q(self, check, table: str, conditions: list) -> str:
+        """
+        Random sample of the table rows matching the conditions, following the check sampling policy:
+         - `rows`: fixed number of rows (uniformly picked, the source DB still reads all the rows but only the sample
+           goes through the check)
+         - `percent`: each row is kept with the given probability
+         - `bernoulli`/`system`: native TABLESAMPLE (row or block level) where the engine supports it, so only the
+           sampled rows/blocks are read. Other engines fall back to `percent`.
+        """
+        method, size = check.sample_method, check.sample_size
+        sample = ''
+        if method in self.tablesample_methods:
+            sample = ' TABLESAMPLE {} ({})'.format(method.upper(), repr(float(size)))
+        elif method != 'rows':
+            conditions = conditions + ['{} < {}'.format(self.random_function, repr(float(size) / 100))]
+
+        q = 'SELECT * FROM {}{}'.format(table, sample)
+        if conditions:
+            q += ' WHERE {}'.format(' AND '.join(conditions))
+        if method == 'rows':
+            q += ' ORDER BY {} LIMIT {}'.format(self.random_function, int(size))
+        return '({}) AS source'.format(q)
+
+    def watermark_q_template(self, check, cursor=None, partition=None, lower=None) -> str:
+        """
+        Current high-watermark of an incremental check, i.e. the max of the watermark column past the `lower` one
+        (NULL when there are no new rows).
+        """
+        return """
+            SELECT MAX({watermark_column}) AS watermark
+            FROM {source}
+        """.format(
+            watermark_column=self.quote(check.watermark_column.name, cursor),
+            source=self.source_q(check, cursor, partition, (lower, None))
+        )
+
+    def table_batch_q_template(self, checks, cursor=None, partition=None):
+        """
+        Single aggregate query with the metrics of all the given checks (all on the same table), so the table is
+        scanned once whatever the number of checks. Each metric is aliased as `c<check id>_<metric>`.
+        """
+        aggregates = []
+        for check in checks:
+            column = self.quote(check.column.name, cursor)
+            for metric, expression in self.batch_aggregates[check.type].items():
+                aggregates.append('{} AS {}'.format(
+                    expression.format(c=column), self.quote(self.batch_alias(check, metric), cursor)
+                ))
+
+        return """
+            SELECT {aggregates}
+            FROM {source}
+        """.format(
+            aggregates=',\n                '.join(aggregates),
+            source=self.source_q(checks[0], cursor, partition)
+        )
+
+    def table_batch_outliers_q_template(self, checks, bounds, cursor=None, partition=None):
+        """
+        Second pass for batched outlier checks, counts the rows outside `bounds[check.id] = (lower, upper)` for all the
+        given checks in a single scan.
+        """
+        aggregates = []
+        for check in checks:
+            column = self.quote(check.column.name, cursor)
+            lower, upper = bounds[check.id]
+            aggregates.append('SUM(CASE WHEN {c} < {lower} OR {c} > {upper} THEN 1 ELSE 0 END) AS {alias}'.format(
+                c=column, lower=repr(float(lower)), upper=repr(float(upper)),
+                alias=self.quote(self.batch_alias(check, 'outlier_rows'), cursor)
+            ))
+
+        return """
+            SELECT {aggregates}
+            FROM {source}
+        """.format(
+            aggregates=',\n                '.join(aggregates),
+            source=self.source_q(checks[0], cursor, partition)
+        )
+
+    def metadata_q_template(self, schema_name: str = None, table_name: str = None) -> str:
+        """
+        Query of the columns of all the tables of the DB (or of the `:schema_name` schema, or of its `:table_name` table),
+        ordered by schema and table.
+        Rows are `(schema name, table name, column name, column type, is partition column)`.
+        """
+        return """
+            SELECT table_schema, table_name, column_name, UPPER(data_type), FALSE
+            FROM information_schema.columns
+            WHERE table_schema <> 'information_schema' {schema_filter}
+            ORDER BY table_schema, table_name, ordinal_position
+        """.format(schema_filter=self.metadata_filter('table_schema', 'table_name', schema_name, table_name))
+
+    @staticmethod
+    def metadata_filter(schema_column: str, table_column: str, schema_name: str = None, table_name: str = None) -> str:
+        conditions = []
+        if schema_name is not None:
+            conditions.append(f'AND {schema_column} = :schema_name')
+        if table_name is not None:
+            conditions.append(f'AND {table_column} = :table_name')
+        return ' '.join(conditions)
+
+    def crawl_metadata(self, engine, schema_name: str = None, table_name: str = None, chunk_size: int = 10000):
+        """
+        Streams the metadata rows of `metadata_q_template`, the whole DB (or schema) is read with a single query instead
+        of inspector calls per schema and table. Every metadata fetch goes through it, so column types are always
+        spelled the same way (and table fingerprints only change when the columns do).
+        """
+        params = {k: v for k, v in (('schema_name', schema_name), ('table_name', table_name)) if v is not None}
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(
+                text(self.metadata_q_template(schema_name, table_name)), **params
+            )
+            while True:
+                rows = result.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+
     @staticmethod
     def get_schema_names(inspector):
         return sorted(inspector.get_schema_names())
@@ -55,9 +309,50 @@ class BaseEngineSpec:
             FROM ":schema".":table" 
         """
 
+    def unique_column_stats_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def unique_column_duplicates_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def approx_unique_column_stats_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def merge_sketches_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def non_null_column_stats_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def outlier_column_stats_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def outlier_rows_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
+    def ordered_rows_q_template(self, *args, **kwargs):
+        raise NotImplementedError()
+
     def get_partitions_q_template(self, *args, **kwargs):
         return NotImplementedError()
 
+    def partitions_q(self, table, watermark: str = None) -> str:
+        """
+        Partitions of the table, only those from the `watermark` partition on when given (e.g. from `dt=2021-01-01` for
+        `dt=2021-01-01/hour=00`, so new sub-partitions of the newest value are found too).
+        """
+        partitions_q = self.get_partitions_q_template().format(
+            schema=self.quote(table.schema.name), partitions_table=self.quote(f'{table.name}$partitions')
+        )
+        if watermark is None:
+            return partitions_q
+
+        column_name, value = watermark.split('/')[0].split('=', 1)
+        column = table.get_column(column_name)
+        return '{} WHERE {} >= {}'.format(
+            partitions_q.strip(), self.quote(column_name), self.literal(value, column.type if column else None)
+        )
+
     def partition_exists_q_template(self, *args, **kwargs):
         raise NotImplementedError()
 
@@ -77,9 +372,35 @@ class PrestoEngineSpec(BaseEngineSpec):
     supported so we default to python format instead.
     """
     engine = 'presto'
-
-    def get_sqla_engine(self, hostname: str, port: int, database: str, username: str = None, password: str = None):
-        return create_engine(f'presto://{username or "dq-default"}@{hostname}:{port}/{database}/default')
+    push_down = True
+    tablesample_methods = ('bernoulli', 'system')
+    random_function = 'rand()'
+    approx_distinct = True
+    # Max standard error of `approx_set` (4096 buckets), also used for `approx_distinct` so both agree
+    approx_relative_error = 0.01625
+
+    def get_sqla_engine(self, hostname: str, port: int, database: str, username: str = None, password: str = None,
+                        **engine_kwargs):
+        return create_engine(f'presto://{username or "dq-default"}@{hostname}:{port}/{database}/default', **engine_kwargs)
+
+    def quote(self, name, cursor=None):
+        return '"{}"'.format(name.replace('"', '""'))
+
+    def cancel_queries(self, engine, execution_id):
+        # `query_max_run_time` is a session property and PyHive sessions live as long as the pooled engine, so Presto
+        # relies on the worker watchdog for timeouts. No `%` in the statements, PyHive would take them as parameters.
+        with engine.connect() as conn:
+            queries = conn.execute(f"""
+                SELECT query_id, query
+                FROM system.runtime.queries
+                WHERE state NOT IN ('FINISHED', 'FAILED') AND strpos(query, '{QUERY_TAG_PREFIX}') = 1
+            """).fetchall()
+            query_ids = [query_id for query_id, query in queries if execution_id in self.tagged_execution_ids(query)]
+            for query_id in query_ids:
+                conn.execute(
+                    f"CALL system.runtime.kill_query(query_id => '{query_id}', message => 'Cancelled by Auto-DQ')"
+                )
+        return len(query_ids)
 
     @staticmethod
     def get_columns(inspector, schema_name: str, table_name: str):
@@ -104,28 +425,168 @@ class PrestoEngineSpec(BaseEngineSpec):
 
         return columns
 
-    @staticmethod
-    def _plain_select_column_q(check):
+    def _plain_select_column_q(self, check, partition=None, watermark=None):
+        return """
+            SELECT {column_to_check}
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name)
+        )
+
+    @required_args(['check'])
+    def unique_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
+
+    @required_args(['check'])
+    def outlier_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
+
+    @required_args(['check'])
+    def non_null_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
+
+    @required_args(['check'])
+    def unique_column_stats_q_template(self, check, partition=None, watermark=None):
+        # COUNT(DISTINCT) ignores NULLs, add them back as one more distinct value (same as pandas drop_duplicates)
         return """
-            SELECT "{column_to_check}"
-            FROM "{schema}"."{table}" 
-        """.format(schema=check.schema.name, table=check.table.name, column_to_check=check.column.name)
+            SELECT
+                COUNT(*) AS total_rows,
+                COUNT(DISTINCT {column_to_check})
+                    + COALESCE(MAX(CASE WHEN {column_to_check} IS NULL THEN 1 ELSE 0 END), 0) AS unique_rows
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name)
+        )
 
     @required_args(['check'])
-    def unique_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def unique_column_duplicates_q_template(self, check, partition=None, watermark=None):
+        return """
+            SELECT {column_to_check} AS column_to_check, COUNT(*) AS duplicates
+            FROM {source}
+            GROUP BY 1
+            HAVING COUNT(*) > 1
+            ORDER BY 2 DESC
+            LIMIT {limit}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name),
+            limit=self.sample_limit
+        )
 
     @required_args(['check'])
-    def outlier_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def approx_unique_column_stats_q_template(self, check, partition=None, watermark=None):
+        # approx_distinct uses the same max standard error as the approx_set sketch, which is kept (serialized) so the
+        # sketches of several runs can be merged later without scanning the table again
+        return """
+            SELECT
+                COUNT(*) AS total_rows,
+                approx_distinct({column_to_check}, {relative_error})
+                    + COALESCE(MAX(CASE WHEN {column_to_check} IS NULL THEN 1 ELSE 0 END), 0) AS unique_rows,
+                to_base64(CAST(approx_set({column_to_check}) AS varbinary)) AS sketch,
+                COALESCE(MAX(CASE WHEN {column_to_check} IS NULL THEN 1 ELSE 0 END), 0) AS has_nulls
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name),
+            relative_error=self.approx_relative_error
+        )
+
+    def merge_sketches_q_template(self, sketches):
+        # Sketches are base64 strings, safe to inline as literals
+        return """
+            SELECT cardinality(merge(CAST(from_base64(sketch) AS HyperLogLog))) AS unique_rows
+            FROM (VALUES {sketches}) AS sketches (sketch)
+        """.format(sketches=', '.join("'{}'".format(s) for s in sketches))
 
     @required_args(['check'])
-    def non_null_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def non_null_column_stats_q_template(self, check, partition=None, watermark=None):
+        return """
+            SELECT COUNT(*) AS total_rows, COUNT(*) - COUNT({column_to_check}) AS null_rows
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name)
+        )
+
+    @required_args(['check'])
+    def outlier_column_stats_q_template(self, check, partition=None, watermark=None):
+        return """
+            SELECT COUNT({column_to_check}) AS total_rows, AVG({column_to_check}) AS mean,
+                STDDEV({column_to_check}) AS stddev
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name)
+        )
+
+    @required_args(['check', 'lower', 'upper'])
+    def outlier_rows_q_template(self, check, lower, upper, partition=None, watermark=None):
+        # The window count runs before the LIMIT, so we get the total outliers and a bounded sample in one query
+        return """
+            SELECT {column_to_check} AS column_to_check, COUNT(*) OVER () AS outlier_rows
+            FROM {source}
+            WHERE {column_to_check} < {lower} OR {column_to_check} > {upper}
+            LIMIT {limit}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name),
+            lower=repr(float(lower)), upper=repr(float(upper)), limit=self.sample_limit
+        )
+
+    @required_args(['check'])
+    def ordered_rows_q_template(self, check, partition=None, watermark=None):
+        # Compare each value with the previous one following the ordering key, only out-of-order rows come back
+        return """
+            SELECT column_to_check, previous_value, COUNT(*) OVER () AS unordered_rows
+            FROM (
+                SELECT {column_to_check} AS column_to_check,
+                    LAG({column_to_check}) OVER (ORDER BY {order_column}) AS previous_value
+                FROM {source}
+            ) lagged
+            WHERE column_to_check < previous_value
+            LIMIT {limit}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name),
+            order_column=self.quote(check.ordering_column.name), limit=self.sample_limit
+        )
+
+    @required_args(['check'])
+    def freshness_column_q_template(self, check, partition=None, watermark=None):
+        return """
+            SELECT MAX({column_to_check}) AS column_to_check
+            FROM {source}
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name)
+        )
+
+    @required_args(['check'])
+    def ordered_table_q_template(self, check, partition=None, watermark=None):
+        return """
+            SELECT {column_to_check}
+            FROM {source}
+            ORDER BY {order_column} ASC
+        """.format(
+            source=self.source_q(check, partition=partition, watermark=watermark),
+            column_to_check=self.quote(check.column.name), order_column=self.quote(check.ordering_column.name)
+        )
+
+    def metadata_q_template(self, schema_name=None, table_name=None):
+        # Hive partition keys are flagged in `extra_info`, struct columns are named as by `get_columns`
+        return """
+            SELECT table_schema, table_name, column_name, replace(upper(data_type), 'ROW(', 'STRUCT('),
+                COALESCE(extra_info = 'partition key', FALSE)
+            FROM information_schema.columns
+            WHERE table_schema <> 'information_schema' {schema_filter}
+            ORDER BY table_schema, table_name, ordinal_position
+        """.format(schema_filter=self.metadata_filter('table_schema', 'table_name', schema_name, table_name))
 
     def get_partitions_q_template(self):
         return """
-            SELECT * FROM "{schema}"."{table}$partitions"
+            SELECT * FROM {schema}.{partitions_table}
         """
 
     def partition_exists_q_template(self):
@@ -143,58 +604,182 @@ class PostgresEngineSpec(BaseEngineSpec):
     the query template already formatted.
     """
     engine = 'postgresql'
-
-    def get_sqla_engine(self, hostname, port, database, username=None, password=None):
-        return create_engine(f'postgresql://{username}:{password}@{hostname}:{port}/{database}')
+    push_down = True
+    tablesample_methods = ('bernoulli', 'system')
+    statement_timeout = True
+
+    def get_sqla_engine(self, hostname, port, database, username=None, password=None, **engine_kwargs):
+        return create_engine(f'postgresql://{username}:{password}@{hostname}:{port}/{database}', **engine_kwargs)
+
+    def quote(self, name, cursor=None):
+        return sql.Identifier(name).as_string(cursor)
+
+    def literal(self, value, column_type=None, cursor=None):
+        # Untyped string literals are coerced by Postgres to the type of the column they are compared to
+        return sql.Literal(value).as_string(cursor)
+
+    def set_statement_timeout(self, connection, timeout_seconds=None):
+        # SET LOCAL lasts until the end of the transaction, pooled connections are rolled back when they are returned
+        if timeout_seconds:
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute('SET LOCAL statement_timeout = %s', (int(timeout_seconds * 1000),))
+            finally:
+                cursor.close()
+
+    def cancel_queries(self, engine, execution_id):
+        with engine.connect() as conn:
+            queries = conn.execute(
+                "SELECT pid, query FROM pg_stat_activity WHERE state = 'active' AND query LIKE %s "
+                "AND pid <> pg_backend_pid()",
+                (QUERY_TAG_PREFIX + '%',)
+            ).fetchall()
+            pids = [pid for pid, query in queries if execution_id in self.tagged_execution_ids(query)]
+            for pid in pids:
+                conn.execute('SELECT pg_cancel_backend(%s)', (pid,))
+        return len(pids)
+
+    def metadata_q_template(self, schema_name=None, table_name=None):
+        # Tables and foreign tables, as `get_table_names`
+        return """
+            SELECT c.table_schema, c.table_name, c.column_name, UPPER(c.data_type), FALSE
+            FROM information_schema.columns c
+            JOIN information_schema.tables t ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+            WHERE t.table_type IN ('BASE TABLE', 'FOREIGN', 'FOREIGN TABLE')
+                AND c.table_schema <> 'information_schema' AND LEFT(c.table_schema, 3) <> 'pg_' {schema_filter}
+            ORDER BY c.table_schema, c.table_name, c.ordinal_position
+        """.format(schema_filter=self.metadata_filter('c.table_schema', 'c.table_name', schema_name, table_name))
 
     def get_table_names(self, inspector, schema):
         tables = inspector.get_table_names(schema)
         tables.extend(inspector.get_foreign_table_names(schema))
         return sorted(tables)
 
-    @staticmethod
-    def _plain_select_column_q(check, cursor):
+    def _plain_select_column_q(self, check, cursor, partition=None, watermark=None):
         return sql.SQL("""
             SELECT {column_to_check} 
-            FROM {schema}.{table} 
+            FROM {source}
         """).format(
-            schema=sql.Identifier(check.schema.name),
-            table=sql.Identifier(check.table.name),
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
             column_to_check=sql.Identifier(check.column.name)
         ).as_string(cursor)
 
     @required_args(['check', 'cursor'])
-    def unique_column_q_template(self, check, cursor):
-        return self._plain_select_column_q(check, cursor)
+    def unique_column_q_template(self, check, cursor, partition=None, watermark=None):
+        return self._plain_select_column_q(check, cursor, partition, watermark)
 
     @required_args(['check', 'cursor'])
-    def outlier_column_q_template(self, check, cursor):
-        return self._plain_select_column_q(check, cursor)
+    def outlier_column_q_template(self, check, cursor, partition=None, watermark=None):
+        return self._plain_select_column_q(check, cursor, partition, watermark)
 
     @required_args(['check', 'cursor'])
-    def non_null_column_q_template(self, check, cursor):
-        return self._plain_select_column_q(check, cursor)
+    def non_null_column_q_template(self, check, cursor, partition=None, watermark=None):
+        return self._plain_select_column_q(check, cursor, partition, watermark)
 
     @required_args(['check', 'cursor'])
-    def ordered_table_q_template(self, check, cursor):
+    def unique_column_stats_q_template(self, check, cursor, partition=None, watermark=None):
+        # COUNT(DISTINCT) ignores NULLs, add them back as one more distinct value (same as pandas drop_duplicates)
         return sql.SQL("""
-            SELECT {column_to_check} 
-            FROM {schema}.{table} 
-            GROUP BY 1 ORDER BY 1 ASC
+            SELECT
+                COUNT(*) AS total_rows,
+                COUNT(DISTINCT {column_to_check})
+                    + COALESCE(MAX(CASE WHEN {column_to_check} IS NULL THEN 1 ELSE 0 END), 0) AS unique_rows
+            FROM {source}
         """).format(
-            schema=sql.Identifier(check.schema.name),
-            table=sql.Identifier(check.table.name),
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
             column_to_check=sql.Identifier(check.column.name)
         ).as_string(cursor)
 
     @required_args(['check', 'cursor'])
-    def freshness_column_q_template(self, check, cursor):
+    def unique_column_duplicates_q_template(self, check, cursor, partition=None, watermark=None):
+        return sql.SQL("""
+            SELECT {column_to_check} AS column_to_check, COUNT(*) AS duplicates
+            FROM {source}
+            GROUP BY 1
+            HAVING COUNT(*) > 1
+            ORDER BY 2 DESC
+            LIMIT {limit}
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name),
+            limit=sql.Literal(self.sample_limit)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor'])
+    def non_null_column_stats_q_template(self, check, cursor, partition=None, watermark=None):
+        return sql.SQL("""
+            SELECT COUNT(*) AS total_rows, COUNT(*) - COUNT({column_to_check}) AS null_rows
+            FROM {source}
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor'])
+    def outlier_column_stats_q_template(self, check, cursor, partition=None, watermark=None):
+        return sql.SQL("""
+            SELECT COUNT({column_to_check}) AS total_rows, AVG({column_to_check}) AS mean,
+                STDDEV_SAMP({column_to_check}) AS stddev
+            FROM {source}
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor', 'lower', 'upper'])
+    def outlier_rows_q_template(self, check, cursor, lower, upper, partition=None, watermark=None):
+        # The window count runs before the LIMIT, so we get the total outliers and a bounded sample in one query
+        return sql.SQL("""
+            SELECT {column_to_check} AS column_to_check, COUNT(*) OVER () AS outlier_rows
+            FROM {source}
+            WHERE {column_to_check} < {lower} OR {column_to_check} > {upper}
+            LIMIT {limit}
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name),
+            lower=sql.Literal(float(lower)),
+            upper=sql.Literal(float(upper)),
+            limit=sql.Literal(self.sample_limit)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor'])
+    def ordered_rows_q_template(self, check, cursor, partition=None, watermark=None):
+        # Compare each value with the previous one following the ordering key, only out-of-order rows come back
+        return sql.SQL("""
+            SELECT column_to_check, previous_value, COUNT(*) OVER () AS unordered_rows
+            FROM (
+                SELECT {column_to_check} AS column_to_check,
+                    LAG({column_to_check}) OVER (ORDER BY {order_column}) AS previous_value
+                FROM {source}
+            ) lagged
+            WHERE column_to_check < previous_value
+            LIMIT {limit}
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name),
+            order_column=sql.Identifier(check.ordering_column.name),
+            limit=sql.Literal(self.sample_limit)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor'])
+    def ordered_table_q_template(self, check, cursor, partition=None, watermark=None):
+        return sql.SQL("""
+            SELECT {column_to_check} 
+            FROM {source}
+            ORDER BY {order_column} ASC
+        """).format(
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
+            column_to_check=sql.Identifier(check.column.name),
+            order_column=sql.Identifier(check.ordering_column.name)
+        ).as_string(cursor)
+
+    @required_args(['check', 'cursor'])
+    def freshness_column_q_template(self, check, cursor, partition=None, watermark=None):
         return sql.SQL("""
             SELECT MAX({column_to_check}) AS column_to_check
-            FROM {schema}.{table} 
+            FROM {source}
         """).format(
-            schema=sql.Identifier(check.schema.name),
-            table=sql.Identifier(check.table.name),
+            source=sql.SQL(self.source_q(check, cursor, partition, watermark)),
             column_to_check=sql.Identifier(check.column.name)
         ).as_string(cursor)
 
@@ -204,47 +789,162 @@ class MysqlEngineSpec(BaseEngineSpec):
     Use back ticks (`) instead of double quotes to escape columns, tables and schemas.
     """
     engine = 'mysql'
-
-    def get_sqla_engine(self, hostname, port, database, username=None, password=None):
-        return create_engine(f'mysql://{username}:{password}@{hostname}:{port}/{database}')
+    push_down = True
+    random_function = 'RAND()'
+    statement_timeout = True
+
+    def get_sqla_engine(self, hostname, port, database, username=None, password=None, **engine_kwargs):
+        return create_engine(f'mysql://{username}:{password}@{hostname}:{port}/{database}', **engine_kwargs)
+
+    def quote(self, name, cursor=None):
+        return '`{}`'.format(name.replace('`', '``'))
+
+    def literal(self, value, column_type=None, cursor=None):
+        return super().literal(value.replace('\\', '\\\\'), column_type, cursor)
+
+    def set_statement_timeout(self, connection, timeout_seconds=None):
+        # `max_execution_time` (SELECTs only) is a session variable that stays on the pooled connection, so it's set
+        # back to 0 (no timeout) for queries without one and only sent when it changes
+        timeout_ms = int((timeout_seconds or 0) * 1000)
+        info = connection.connection.info
+        if info.get('max_execution_time', 0) != timeout_ms:
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(f'SET SESSION max_execution_time = {timeout_ms}')
+            finally:
+                cursor.close()
+            info['max_execution_time'] = timeout_ms
+
+    def cancel_queries(self, engine, execution_id):
+        with engine.connect() as conn:
+            queries = conn.execute(
+                'SELECT ID, INFO FROM information_schema.PROCESSLIST WHERE INFO LIKE %s AND ID <> CONNECTION_ID()',
+                (QUERY_TAG_PREFIX + '%',)
+            ).fetchall()
+            connection_ids = [i for i, query in queries if execution_id in self.tagged_execution_ids(query)]
+            for connection_id in connection_ids:
+                conn.execute(f'KILL QUERY {int(connection_id)}')
+        return len(connection_ids)
+
+    def metadata_q_template(self, schema_name=None, table_name=None):
+        return """
+            SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, UPPER(c.COLUMN_TYPE), FALSE
+            FROM information_schema.COLUMNS c
+            JOIN information_schema.TABLES t ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+            WHERE t.TABLE_TYPE = 'BASE TABLE'
+                AND c.TABLE_SCHEMA NOT IN ('information_schema', 'mysql', 'performance_schema', 'sys') {schema_filter}
+            ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+        """.format(schema_filter=self.metadata_filter('c.TABLE_SCHEMA', 'c.TABLE_NAME', schema_name, table_name))
 
     def get_table_names(self, inspector, schema):
         tables = inspector.get_table_names(schema)
         tables.extend(inspector.get_foreign_table_names(schema))
         return sorted(tables)
 
-    @staticmethod
-    def _plain_select_column_q(check):
+    def _plain_select_column_q(self, check, partition=None, watermark=None):
+        column = self.quote(check.column.name)
         return f"""
-            SELECT `{check.column.name}` 
-            FROM `{check.schema.name}`.`{check.table.name}`
+            SELECT {column} 
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
         """
 
     @required_args(['check'])
-    def unique_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def unique_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
 
     @required_args(['check'])
-    def outlier_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def outlier_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
 
     @required_args(['check'])
-    def non_null_column_q_template(self, check):
-        return self._plain_select_column_q(check)
+    def non_null_column_q_template(self, check, partition=None, watermark=None):
+        return self._plain_select_column_q(check, partition, watermark)
 
     @required_args(['check'])
-    def freshness_column_q_template(self, check):
+    def unique_column_stats_q_template(self, check, partition=None, watermark=None):
+        # COUNT(DISTINCT) ignores NULLs, add them back as one more distinct value (same as pandas drop_duplicates)
+        column = self.quote(check.column.name)
         return f"""
-            SELECT MAX(`{check.column.name}`) AS column_to_check
-            FROM `{check.schema.name}`.`{check.table.name}` 
+            SELECT
+                COUNT(*) AS total_rows,
+                COUNT(DISTINCT {column})
+                    + COALESCE(MAX(CASE WHEN {column} IS NULL THEN 1 ELSE 0 END), 0) AS unique_rows
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
         """
 
     @required_args(['check'])
-    def ordered_table_q_template(self, check):
+    def unique_column_duplicates_q_template(self, check, partition=None, watermark=None):
+        column = self.quote(check.column.name)
         return f"""
-            SELECT `{check.column.name}` 
-            FROM `{check.schema.name}`.`{check.table.name}`
-            GROUP BY 1 ORDER BY 1 ASC
+            SELECT {column} AS column_to_check, COUNT(*) AS duplicates
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+            GROUP BY 1
+            HAVING COUNT(*) > 1
+            ORDER BY 2 DESC
+            LIMIT {self.sample_limit}
+        """
+
+    @required_args(['check'])
+    def non_null_column_stats_q_template(self, check, partition=None, watermark=None):
+        column = self.quote(check.column.name)
+        return f"""
+            SELECT COUNT(*) AS total_rows, COUNT(*) - COUNT({column}) AS null_rows
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+        """
+
+    @required_args(['check'])
+    def outlier_column_stats_q_template(self, check, partition=None, watermark=None):
+        # MySQL STDDEV() is the population one, use the sample stddev like the other engines (and pandas)
+        column = self.quote(check.column.name)
+        return f"""
+            SELECT COUNT({column}) AS total_rows, AVG({column}) AS mean,
+                STDDEV_SAMP({column}) AS stddev
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+        """
+
+    @required_args(['check', 'lower', 'upper'])
+    def outlier_rows_q_template(self, check, lower, upper, partition=None, watermark=None):
+        # The window count runs before the LIMIT, so we get the total outliers and a bounded sample in one query
+        column = self.quote(check.column.name)
+        return f"""
+            SELECT {column} AS column_to_check, COUNT(*) OVER () AS outlier_rows
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+            WHERE {column} < {float(lower)!r} OR {column} > {float(upper)!r}
+            LIMIT {self.sample_limit}
+        """
+
+    @required_args(['check'])
+    def ordered_rows_q_template(self, check, partition=None, watermark=None):
+        # Compare each value with the previous one following the ordering key (window functions need MySQL 8)
+        column = self.quote(check.column.name)
+        order_column = self.quote(check.ordering_column.name)
+        return f"""
+            SELECT column_to_check, previous_value, COUNT(*) OVER () AS unordered_rows
+            FROM (
+                SELECT {column} AS column_to_check,
+                    LAG({column}) OVER (ORDER BY {order_column}) AS previous_value
+                FROM {self.source_q(check, partition=partition, watermark=watermark)}
+            ) lagged
+            WHERE column_to_check < previous_value
+            LIMIT {self.sample_limit}
+        """
+
+    @required_args(['check'])
+    def freshness_column_q_template(self, check, partition=None, watermark=None):
+        column = self.quote(check.column.name)
+        return f"""
+            SELECT MAX({column}) AS column_to_check
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+        """
+
+    @required_args(['check'])
+    def ordered_table_q_template(self, check, partition=None, watermark=None):
+        column = self.quote(check.column.name)
+        order_column = self.quote(check.ordering_column.name)
+        return f"""
+            SELECT {column} 
+            FROM {self.source_q(check, partition=partition, watermark=watermark)}
+            ORDER BY {order_column} ASC
         """
 
 
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+
+from sqlalchemy import event
+
+from core.admission import db_admission
+from core.config import settings
+from core.db_engines import engine_specs
+from core.query_tags import current_tags
+
+
+class EngineRegistry:
+    """
+    Process-wide registry of SQLAlchemy engines for the source DBs, so scheduler threads, Celery tasks and API calls
+    share one connection pool per DB instead of building (and throwing away) a new engine on every query.
+
+    Engines are keyed by DB id and connection parameters, idle engines are disposed after `idle_seconds` and the least
+    recently used one is evicted when there are more than `max_engines`.
+    """
+
+    def __init__(self, pool_size: int, max_overflow: int, pool_recycle: int, idle_seconds: int, max_engines: int):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.idle_seconds = idle_seconds
+        self.max_engines = max_engines
+
+        self._engines = OrderedDict()  # key -> (engine, last used time), oldest first
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(db):
+        # Connection params are part of the key, so an engine with outdated credentials (or limits) is never reused
+        password_hash = sha256((db.password or '').encode()).hexdigest()
+        return db.id, db.type, db.hostname, db.port, db.database, db.username, password_hash, db.max_queries_per_minute
+
+    def get_engine(self, db):
+        key = self._key(db)
+        with self._lock:
+            self._dispose_idle()
+
+            if key in self._engines:
+                engine, _ = self._engines.pop(key)
+            else:
+                engine_spec = engine_specs.get(db.type)
+                engine = engine_spec.get_sqla_engine(
+                    hostname=db.hostname,
+                    port=db.port,
+                    database=db.database,
+                    username=db.username,
+                    password=db.password,
+                    pool_size=self.pool_size,
+                    max_overflow=self.max_overflow,
+                    pool_recycle=self.pool_recycle,
+                    pool_pre_ping=True,
+                )
+                self._throttle_queries(engine, db.id, db.max_queries_per_minute)
+                self._tag_queries(engine, engine_spec)
+            self._engines[key] = (engine, time.monotonic())
+
+            while len(self._engines) > self.max_engines:
+                _, (lru_engine, _) = self._engines.popitem(last=False)
+                lru_engine.dispose()
+
+            return engine
+
+    @staticmethod
+    def _throttle_queries(engine, db_id: int, max_queries_per_minute: int):
+        # Every query sent to the DB (by checks or metadata tasks) takes one from its per-minute budget
+        if max_queries_per_minute:
+            event.listen(
+                engine, 'before_cursor_execute',
+                lambda *args, **kwargs: db_admission.throttle_query(db_id, max_queries_per_minute)
+            )
+
+    @staticmethod
+    def _tag_queries(engine, engine_spec):
+        # Queries sent inside `tag_queries` blocks carry the ids of their check executions and their statement timeout
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            execution_ids, timeout_seconds = current_tags()
+            engine_spec.set_statement_timeout(conn, timeout_seconds)
+            if execution_ids:
+                statement = engine_spec.tag_query(statement, execution_ids)
+            return statement, parameters
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute, retval=True)
+
+    def invalidate(self, db_id: int):
+        """
+        Dispose all the engines of the given DB (e.g. after its connection details have been edited).
+        """
+        with self._lock:
+            for key in [k for k in self._engines.keys() if k[0] == db_id]:
+                engine, _ = self._engines.pop(key)
+                engine.dispose()
+
+    def dispose_all(self):
+        with self._lock:
+            while self._engines:
+                _, (engine, _) = self._engines.popitem()
+                engine.dispose()
+
+    def _dispose_idle(self):
+        now = time.monotonic()
+        for key in [k for k, (_, last_used) in self._engines.items() if now - last_used > self.idle_seconds]:
+            engine, _ = self._engines.pop(key)
+            engine.dispose()
+
+    def _reset_after_fork(self):
+        # Pooled connections belong to the parent process, the child (e.g. a Celery pool worker) starts empty
+        self._engines = OrderedDict()
+        self._lock = threading.RLock()
+
+
+engine_registry = EngineRegistry(
+    pool_size=settings.SOURCE_DB_POOL_SIZE,
+    max_overflow=settings.SOURCE_DB_MAX_OVERFLOW,
+    pool_recycle=settings.SOURCE_DB_POOL_RECYCLE_SECONDS,
+    idle_seconds=settings.SOURCE_DB_ENGINE_IDLE_SECONDS,
+    max_engines=settings.SOURCE_DB_MAX_ENGINES,
+)
+os.register_at_fork(after_in_child=engine_registry._reset_after_fork)
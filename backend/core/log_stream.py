@@ -0,0 +1,161 @@
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+
+import redis
+
+from core.config import settings
+
+
+class LogStream:
+    """
+    Live logs of the running check executions: the workers publish each log line on a Redis pub/sub channel per
+    execution (plus a short backlog for late subscribers) and the API streams them to the UI. Lines are numbered, so
+    lines both in the backlog and on the channel are only sent once. Nothing is kept once the execution is over, the
+    logs are still saved on the execution when it finishes.
+    """
+
+    def __init__(self, client: redis.Redis, backlog_lines: int, backlog_seconds: int):
+        self.client = client
+        self.backlog_lines = backlog_lines
+        self.backlog_seconds = backlog_seconds
+
+    @staticmethod
+    def _channel(execution_id: int) -> str:
+        return f'dq:execution:{execution_id}:logs'
+
+    @staticmethod
+    def _backlog(execution_id: int) -> str:
+        return f'dq:execution:{execution_id}:logs:backlog'
+
+    def publish_many(self, messages: list):
+        """
+        Publishes `('log', execution_id, seq, line)` and `('end', execution_id, status)` messages in order, with a
+        single round trip.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for event, execution_id, *data in messages:
+            if event == 'end':
+                pipe.publish(self._channel(execution_id), json.dumps({'event': 'end', 'data': data[0]}))
+                pipe.delete(self._backlog(execution_id))
+                continue
+
+            message = json.dumps({'event': 'log', 'seq': data[0], 'data': data[1]})
+            pipe.rpush(self._backlog(execution_id), message)
+            pipe.ltrim(self._backlog(execution_id), -self.backlog_lines, -1)
+            pipe.expire(self._backlog(execution_id), self.backlog_seconds)
+            pipe.publish(self._channel(execution_id), message)
+        pipe.execute()
+
+    def subscribe(self, execution_id: int, is_running, poll_seconds: float = 1, check_seconds: float = 30):
+        """
+        Yields the `(event, data)` messages of the execution, the backlog first, until the `end` message. Every
+        `check_seconds` without messages `is_running()` is called, the stream ends if the execution is no longer
+        running (e.g. its worker died before publishing the end).
+        """
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(execution_id))
+        try:
+            last_seq = -1
+            for message in self.client.lrange(self._backlog(execution_id), 0, -1):
+                message = json.loads(message)
+                last_seq = message['seq']
+                yield message['event'], message['data']
+
+            last_message = time.monotonic()
+            while True:
+                message = pubsub.get_message(timeout=poll_seconds)
+                if message is None:
+                    if time.monotonic() - last_message > check_seconds:
+                        if not is_running():
+                            yield 'end', None
+                            return
+                        last_message = time.monotonic()
+                        yield 'keepalive', None
+                    continue
+
+                last_message = time.monotonic()
+                message = json.loads(message['data'])
+                if message['event'] == 'end':
+                    yield 'end', message['data']
+                    return
+                if message['seq'] > last_seq:
+                    last_seq = message['seq']
+                    yield message['event'], message['data']
+        finally:
+            pubsub.close()
+
+
+class LogPublisher:
+    """
+    Write-behind buffer of the live log messages of the executions running in the current process, a background thread
+    publishes them every `flush_seconds`, so a slow or unavailable Redis never holds up a check. At most `max_pending`
+    messages wait (the oldest are dropped), and after a failed publish the messages are dropped for `backoff_seconds`.
+    """
+
+    def __init__(self, stream: LogStream, flush_seconds: float, max_pending: int, backoff_seconds: float):
+        self.stream = stream
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.backoff_seconds = backoff_seconds
+        self._reset()
+
+    def _reset(self):
+        self._pending = collections.deque(maxlen=self.max_pending)
+        self._paused_until = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def publish(self, execution_id: int, seq: int, line: str):
+        self._put(('log', execution_id, seq, line))
+
+    def end(self, execution_id: int, status: str):
+        self._put(('end', execution_id, status))
+
+    def _put(self, message: tuple):
+        if time.monotonic() < self._paused_until:
+            return
+        with self._lock:
+            self._pending.append(message)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dq-log-publisher', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                messages = list(self._pending)
+                self._pending.clear()
+            if not messages:
+                return
+
+            try:
+                self.stream.publish_many(messages)
+            except Exception as e:
+                self._paused_until = time.monotonic() + self.backoff_seconds
+                print(f'Live logs paused for {self.backoff_seconds} seconds, {len(messages)} messages dropped: {e}')
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+
+log_stream = LogStream(
+    client=redis.Redis.from_url(settings.REDIS_BACKEND),
+    backlog_lines=settings.CHECK_LOG_STREAM_BACKLOG_LINES,
+    backlog_seconds=settings.CHECK_LOG_STREAM_BACKLOG_SECONDS,
+)
+log_publisher = LogPublisher(
+    stream=log_stream,
+    flush_seconds=settings.CHECK_LOG_STREAM_FLUSH_SECONDS,
+    max_pending=settings.CHECK_LOG_STREAM_MAX_PENDING,
+    backoff_seconds=settings.CHECK_LOG_STREAM_BACKOFF_SECONDS,
+)
+atexit.register(log_publisher.flush)
+# Buffered messages belong to the parent process, the child (e.g. a Celery pool worker) starts empty
+os.register_at_fork(after_in_child=log_publisher._reset)
@@ -0,0 +1,23 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional, Tuple
+
+_local = threading.local()
+
+
+@contextmanager
+def tag_queries(execution_ids: Iterable[int], timeout_seconds: Optional[int] = None):
+    """
+    Queries sent to the source DBs by the current thread while the block runs are tagged with the given check execution
+    ids (so they can be found and cancelled on the source DB) and limited to `timeout_seconds`, see `EngineRegistry`.
+    """
+    previous = getattr(_local, 'tags', None)
+    _local.tags = (tuple(execution_ids), timeout_seconds)
+    try:
+        yield
+    finally:
+        _local.tags = previous
+
+
+def current_tags() -> Tuple[Tuple[int, ...], Optional[int]]:
+    return getattr(_local, 'tags', None) or ((), None)
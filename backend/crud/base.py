@@ -3,6 +3,7 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy import asc, desc
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from db.base_class import Base
@@ -72,6 +73,33 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.refresh(db_obj)
         return db_obj
 
+    def upsert(self, db: Session, *, rows: List[Dict[str, Any]], constraint: str, update_fields: List[str] = None,
+               returning: List[str] = None) -> list:
+        """
+        Inserts all the rows with a single `INSERT ... ON CONFLICT` statement on the given unique constraint, rows that
+        already exist get their `update_fields` updated (left untouched if None). Returns the `returning` fields of the
+        inserted or updated rows.
+        """
+        if not rows:
+            return []
+
+        constraint_columns = next(c for c in self.model.__table__.constraints if c.name == constraint).columns
+        # A statement can't update the same row twice, the last of the duplicated rows wins
+        rows = list({tuple(row[c.name] for c in constraint_columns): row for row in rows}.values())
+
+        stmt = insert(self.model.__table__).values(rows)
+        if update_fields:
+            stmt = stmt.on_conflict_do_update(constraint=constraint, set_={f: stmt.excluded[f] for f in update_fields})
+        else:
+            stmt = stmt.on_conflict_do_nothing(constraint=constraint)
+        if returning:
+            stmt = stmt.returning(*[getattr(self.model.__table__.c, f) for f in returning])
+
+        result = db.execute(stmt)
+        rows = result.fetchall() if returning else []
+        db.commit()
+        return rows
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
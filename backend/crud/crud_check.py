@@ -13,6 +13,9 @@ class CRUDCheck(CRUDBase[Check, CheckCreate, CheckUpdate]):
         return self.model.id, self.model.name, self.model.schedule, self.model.type, self.model.description,\
                self.model.false_positives, self.model.delta_threshold_seconds, self.model.active, \
                self.model.database_id, self.model.schema_id, self.model.table_id, self.model.column_id, \
+               self.model.order_column_id, self.model.latest_partition_only, self.model.watermark_column_id, \
+               self.model.watermark_value, self.model.approximate, self.model.sample_method, self.model.sample_size, \
+               self.model.statement_timeout_seconds, \
                func.max(CheckExecution.id).label('last_check_execution_id')
 
     def get_all(self, db: Session, *, skip: int = 0, limit: int = 10) -> List[Check]:
@@ -5,6 +5,7 @@ from sqlalchemy import func, case
 from crud.base import CRUDBase, ORDER_BY_MAP
 from models import CheckBase
 from models.check_execution import CheckExecution, CheckExecutionStatus
+from models.check_execution_log import CheckExecutionLog
 from schemas.check_execution import CheckExecutionCreate, CheckExecutionUpdate, CheckExecutionWithCheckName
 
 
@@ -12,13 +13,20 @@ class CRUDCheckExecution(CRUDBase[CheckExecution, CheckExecutionCreate, CheckExe
 
     def _base_cols(self):
         return self.model.id, self.model.status, self.model.exec_time, self.model.results, self.model.check_id, \
+               self.model.table_partition_id, self.model.heartbeat_at, \
                CheckBase.name.label('check_name'), CheckBase.check_class.label('check_class')
 
-    def get_with_logs(self, db: Session, id: Optional[Any] = None, **kwargs) -> CheckExecution:
+    def get_with_logs(self, db: Session, id: Optional[Any] = None, **kwargs) -> Optional[dict]:
+        q = db.query(*self._base_cols(), CheckExecutionLog.data.label('logs_data')).join(self.model.check).outerjoin(self.model.log)
         if id:
-            return db.query(*self._base_cols(), self.model.logs).join(self.model.check).filter(self.model.id == id).first()
+            row = q.filter(self.model.id == id).first()
         else:
-            return db.query(*self._base_cols(), self.model.logs).join(self.model.check).filter(*self.get_filter_by_args(kwargs)).first()
+            row = q.filter(*self.get_filter_by_args(kwargs)).first()
+        if row is None:
+            return None
+
+        execution = row._asdict()
+        return dict(execution, logs=CheckExecutionLog.decompress(execution.pop('logs_data')))
 
     def get_all(self, db: Session, *, skip: int = 0, limit: int = 10, sort: list = None, **kwargs) -> List[CheckExecutionWithCheckName]:
         order_by = None
@@ -32,6 +40,52 @@ class CRUDCheckExecution(CRUDBase[CheckExecution, CheckExecutionCreate, CheckExe
             .offset(skip).limit(limit) \
             .all()
 
+    def get_by_check(self, db: Session, check_id: int, from_time: datetime = None, to_time: datetime = None) -> List[CheckExecution]:
+        filters = [self.model.check_id == check_id]
+        if from_time:
+            filters.append(self.model.exec_time >= from_time)
+        if to_time:
+            filters.append(self.model.exec_time < to_time)
+        return db.query(self.model).filter(*filters).order_by(self.model.exec_time).all()
+
+    def create_queued(self, db: Session, check_id: int, partition_id: int = None) -> CheckExecution:
+        """
+        Creates the execution of a check that was just sent to the workers, they set it as running once they pick it up.
+        """
+        return self.create(db=db, obj_in=CheckExecutionCreate(
+            exec_time=datetime.now(), check_id=check_id, table_partition_id=partition_id,
+            status=CheckExecutionStatus.QUEUED.value
+        ))
+
+    def reap_stale(self, db: Session, stale_before: datetime) -> List[CheckExecution]:
+        """
+        Sets as timed out the running executions without a heartbeat since `stale_before` (e.g. their worker died
+        mid-check), rows locked by a concurrent reaper are skipped.
+        """
+        stale = db.query(self.model) \
+            .filter(self.model.status == CheckExecutionStatus.RUNNING.value) \
+            .filter(func.coalesce(self.model.heartbeat_at, self.model.exec_time) < stale_before) \
+            .with_for_update(skip_locked=True) \
+            .all()
+        for execution in stale:
+            execution.status = CheckExecutionStatus.TIMEOUT.value
+            execution.logs = '{}\nNo heartbeat since {}, the process running the check is gone'.format(
+                execution.logs or '', execution.heartbeat_at or execution.exec_time
+            ).lstrip()
+        db.commit()
+        return stale
+
+    def purge_logs(self, db: Session, older_than: datetime) -> int:
+        """
+        Deletes the logs of the executions older than `older_than`, the executions themselves (and their results) stay.
+        """
+        old_executions = db.query(self.model.id).filter(self.model.exec_time < older_than)
+        deleted = db.query(CheckExecutionLog) \
+            .filter(CheckExecutionLog.check_execution_id.in_(old_executions)) \
+            .delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
     def stats(self, db: Session):
         # Group by date, count total check executions and successful ones
         return db.query(
@@ -11,7 +11,8 @@ class CRUDCustomCheck(CRUDBase[CustomCheck, CustomCheckCreate, CustomCheckUpdate
 
     def _base_cols(self):
         return self.model.id, self.model.name, self.model.schedule, self.model.description, self.model.source, \
-               self.model.active, self.model.database_id, func.max(CheckExecution.id).label('last_check_execution_id')
+               self.model.active, self.model.database_id, self.model.statement_timeout_seconds, \
+               func.max(CheckExecution.id).label('last_check_execution_id')
 
     def get_all(self, db: Session, *, skip: int = 0, limit: int = 10) -> List[CustomCheck]:
         return db.query(self.model).offset(skip).limit(limit).all()
@@ -1,10 +1,28 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
 from crud.base import CRUDBase
 from models.db_column import DBColumn
 from schemas.db_column import DBColumnCreate, DBColumnUpdate
 
 
 class CRUDDBColumn(CRUDBase[DBColumn, DBColumnCreate, DBColumnUpdate]):
-    pass
+
+    def sync(self, db: Session, columns: Dict[int, List[Tuple[str, str, bool]]]) -> int:
+        """
+        Saves the `(name, type, is_partition_column)` columns of each table id with a single upsert: missing columns
+        are added and existing ones get their type updated (columns no longer on the source are kept). Returns the
+        number of columns saved.
+        """
+        rows = [
+            {'table_id': table_id, 'name': name, 'type': type, 'is_partition_column': is_partition_column}
+            for table_id, table_columns in columns.items() for name, type, is_partition_column in table_columns
+        ]
+        self.upsert(
+            db=db, rows=rows, constraint='unique_column_name_table_id', update_fields=['type', 'is_partition_column']
+        )
+        return len(rows)
 
 
 db_column = CRUDDBColumn(DBColumn)
@@ -1,10 +1,46 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
 from crud.base import CRUDBase
 from models.db_table import DBTable
 from schemas.db_table import DBTableCreate, DBTableUpdate
 
 
 class CRUDDBTable(CRUDBase[DBTable, DBTableCreate, DBTableUpdate]):
-    pass
+
+    def _get_fingerprints(self, db: Session, tables: List[Tuple[int, str]]) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        if not tables:
+            return {}
+        return {
+            (schema_id, name): (id, fingerprint) for schema_id, name, id, fingerprint in
+            db.query(self.model.schema_id, self.model.name, self.model.id, self.model.fingerprint).filter(
+                tuple_(self.model.schema_id, self.model.name).in_(tables)
+            )
+        }
+
+    def get_or_create(self, db: Session, tables: List[Tuple[int, str]]) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        """
+        `(id, fingerprint)` of the `(schema_id, name)` tables, the missing ones are created (without fingerprint) with a
+        single insert. Existing tables are only read, so they are never rewritten.
+        """
+        existing = self._get_fingerprints(db, tables)
+        missing = [t for t in tables if t not in existing]
+        created = self.upsert(
+            db=db, rows=[{'schema_id': schema_id, 'name': name} for schema_id, name in missing],
+            constraint='unique_table_name_schema_id', returning=['schema_id', 'name', 'id', 'fingerprint']
+        )
+        existing.update({(schema_id, name): (id, fingerprint) for schema_id, name, id, fingerprint in created})
+
+        # Tables created by a concurrent crawl since the first read aren't returned by the insert
+        existing.update(self._get_fingerprints(db, [t for t in missing if t not in existing]))
+        return existing
+
+    def set_fingerprints(self, db: Session, fingerprints: Dict[int, str]):
+        if fingerprints:
+            db.bulk_update_mappings(self.model, [{'id': id, 'fingerprint': f} for id, f in fingerprints.items()])
+            db.commit()
 
 
 db_table = CRUDDBTable(DBTable)
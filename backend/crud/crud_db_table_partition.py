@@ -1,10 +1,43 @@
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
 from crud.base import CRUDBase
+from models.db_table import DBTable
 from models.db_table_partition import DBTablePartition
 from schemas.db_table_partition import DBTablePartitionCreate, DBTablePartitionUpdate
+from tasks.partitions import newest_partition, partition_values
 
 
 class CRUDDBTablePartition(CRUDBase[DBTablePartition, DBTablePartitionCreate, DBTablePartitionUpdate]):
-    pass
+
+    def get_latest(self, db: Session, table_id: int) -> Optional[DBTablePartition]:
+        """
+        Newest partition of the table, partition values are compared by value and not as names (`hour=10` comes after
+        `hour=9`). That's the partition watermark once the partitions have been fetched.
+        """
+        watermark = db.query(DBTable.partition_watermark).filter(DBTable.id == table_id).scalar()
+        partitions = db.query(self.model).filter(self.model.table_id == table_id)
+        if watermark is not None:
+            partition = partitions.filter(self.model.name == watermark).first()
+            if partition is not None:
+                return partition
+
+        partitions = {p.name: p for p in partitions}
+        if not partitions:
+            return None
+        names = pd.Series(list(partitions))
+        return partitions[newest_partition(partition_values(names), names)]
+
+    def create_missing(self, db: Session, table_id: int, names: List[str]):
+        """
+        Adds the partitions of the table not saved yet, with a single statement.
+        """
+        self.upsert(
+            db=db, rows=[{'table_id': table_id, 'name': name} for name in names],
+            constraint='unique_partition_name_table_id'
+        )
 
 
 db_table_partition = CRUDDBTablePartition(DBTablePartition)
@@ -5,6 +5,7 @@ from models.check_base import CheckBase # noqa
 from models.check import Check # noqa
 from models.custom_check import CustomCheck # noqa
 from models.check_execution import CheckExecution # noqa
+from models.check_execution_log import CheckExecutionLog # noqa
 from models.db import DB # noqa
 from models.db_schema import DBSchema # noqa
 from models.db_table import DBTable # noqa
@@ -1,8 +1,9 @@
 #!/bin/sh
 
+# `main` runs the metadata tasks, `checks` the check executions (run more `checks` workers to scale them out)
 celery --app tasks.celery_worker worker \
     -l info \
-    -Q main \
-    -c 1 \
+    -Q "${CELERY_QUEUES:-main,checks}" \
+    -c "${CELERY_CONCURRENCY:-1}" \
     --uid=nobody \
     --gid=nogroup
@@ -2,6 +2,7 @@ from .check_base import CheckBase
 from .check import Check
 from .custom_check import CustomCheck
 from .check_execution import CheckExecution, CheckExecutionStatus
+from .check_execution_log import CheckExecutionLog
 from .db import DB
 from .db_schema import DBSchema
 from .db_table import DBTable
@@ -1,8 +1,8 @@
 import re
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Boolean, Column, Float, Integer, String, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 
 from models.check_base import CheckBase
@@ -28,6 +28,22 @@ class CheckType(str, Enum):
     ORDERED = 'ordered'
 
 
+class SampleMethod(str, Enum):
+    ROWS = 'rows'
+    PERCENT = 'percent'
+    BERNOULLI = 'bernoulli'
+    SYSTEM = 'system'
+
+
+# Check types that can run on a random sample, a violation found in the sample is a violation of the table (the
+# freshness of a table can't be told from a sample, so those checks always read all the rows). Only the violation rate
+# of non null and outliers checks is estimated, duplicated and unordered rows of a sample don't scale to the table.
+SAMPLED_CHECK_TYPES = (CheckType.UNIQUENESS, CheckType.NON_NULL, CheckType.OUTLIERS, CheckType.ORDERED)
+
+# Check types whose results can be merged run after run, so incremental checks only read the rows past the watermark
+INCREMENTAL_CHECK_TYPES = (CheckType.NON_NULL, CheckType.FRESHNESS, CheckType.OUTLIERS, CheckType.ORDERED)
+
+
 class Check(CheckBase):
     """
     "Check" is a type of Check where users can specify the source DB, schema, table (and optionally column) and type of
@@ -47,12 +63,52 @@ class Check(CheckBase):
     table = relationship('DBTable')
 
     column_id = Column(Integer, ForeignKey('dbcolumn.id'))
-    column = relationship('DBColumn')
+    column = relationship('DBColumn', foreign_keys=[column_id])
+
+    # Uniqueness checks estimate the distinct values with a HyperLogLog sketch instead of counting them exactly
+    approximate = Column(Boolean)
+
+    # Sampling policy: checks run on a random sample of the rows (see `SampleMethod`) and report violation rates with
+    # confidence bounds. `sample_size` is the number of rows for `rows` and the percentage of rows for the others.
+    sample_method = Column(String)
+    sample_size = Column(Float)
+
+    # Scheduled runs only check the newest partition of the table (partitioned tables only)
+    latest_partition_only = Column(Boolean)
+
+    # Column that defines the row order for "ordered" checks (defaults to the checked column itself)
+    order_column_id = Column(Integer, ForeignKey('dbcolumn.id'))
+    order_column = relationship('DBColumn', foreign_keys=[order_column_id])
+
+    # Incremental mode: each run only reads the rows with a watermark column value greater than the last one seen,
+    # and merges its aggregates with the state saved by the previous runs
+    watermark_column_id = Column(Integer, ForeignKey('dbcolumn.id'))
+    watermark_column = relationship('DBColumn', foreign_keys=[watermark_column_id])
+    watermark_value = Column(String)
+    incremental_state = Column(JSONB)
 
     __mapper_args__ = {
         'polymorphic_identity': 'check'
     }
 
+    @property
+    def ordering_column(self):
+        return self.order_column or self.column
+
+    @property
+    def is_sampled(self):
+        return self.sample_method is not None and CheckType(self.type) in SAMPLED_CHECK_TYPES
+
+    @property
+    def is_incremental(self):
+        # The state of a sampled check can't be merged with the next runs
+        return self.watermark_column_id is not None and CheckType(self.type) in INCREMENTAL_CHECK_TYPES \
+            and not self.is_sampled
+
+    def reset_watermark(self):
+        self.watermark_value = None
+        self.incremental_state = None
+
     def get_func(self):
         from tasks import scripts
         return getattr(scripts, self.type)
@@ -66,9 +122,17 @@ class Check(CheckBase):
             'description': self.description,
             'active': self.active,
             'database_id': self.database_id,
+            'statement_timeout_seconds': self.statement_timeout_seconds,
             'schema_id': self.schema_id,
             'table_id': self.table_id,
             'column_id': self.column_id,
+            'order_column_id': self.order_column_id,
             'false_positives': self.false_positives,
             'delta_threshold_seconds': self.delta_threshold_seconds,
+            'latest_partition_only': self.latest_partition_only,
+            'approximate': self.approximate,
+            'sample_method': self.sample_method,
+            'sample_size': self.sample_size,
+            'watermark_column_id': self.watermark_column_id,
+            'watermark_value': self.watermark_value,
         }
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
 from sqlalchemy.orm import relationship
 
+from core.config import settings
 from db.base_class import Base
 
 
@@ -14,6 +15,7 @@ class CheckBase(Base):
     indicating the type of check.
 
     Optionally checks can have description, they can be enabled/disabled, and they can have one or more executions.
+    Queries of a check run for at most `statement_timeout_seconds` on the source DB (see `get_statement_timeout`).
     """
 
     __tablename__ = 'check'
@@ -34,6 +36,13 @@ class CheckBase(Base):
     database_id = Column(Integer, ForeignKey('db.id'), nullable=False)
     database = relationship('DB')
 
+    statement_timeout_seconds = Column(Integer)
+
+    def get_statement_timeout(self):
+        # Set on the check itself, otherwise on its DB, otherwise the global default
+        return self.statement_timeout_seconds or self.database.statement_timeout_seconds \
+            or settings.CHECK_STATEMENT_TIMEOUT_SECONDS
+
     def json(self):
         return {
             'id': self.id,
@@ -42,4 +51,5 @@ class CheckBase(Base):
             'description': self.description,
             'active': self.active,
             'database_id': self.database_id,
+            'statement_timeout_seconds': self.statement_timeout_seconds,
         }
@@ -1,37 +1,63 @@
 import enum
 
-from sqlalchemy import Column, ForeignKey, Integer, String, TIMESTAMP, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, TIMESTAMP, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from db.base_class import Base
+from models.check_execution_log import CheckExecutionLog
 
 
 class CheckExecutionStatus(enum.Enum):
+    QUEUED = 'queued'
     SUCCESS = 'success'
     RUNNING = 'running'
     FAIL = 'fail'
+    CANCELLED = 'cancelled'
+    TIMEOUT = 'timeout'
+    SKIPPED = 'skipped'
 
 
 class CheckExecution(Base):
     """
     CheckExecution class represents each individual execution of a DQ check, it keeps information about the check that
-    is being executed, the execution time, the status, the results and the logs.
+    is being executed, the execution time, the status, the results and the logs (stored compressed on their own table,
+    see `CheckExecutionLog`).
     """
 
+    __table_args__ = (
+        Index('ix_checkexecution_running', 'status', postgresql_where=text("status = 'running'")),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     exec_time = Column(TIMESTAMP, nullable=False)
     status = Column(String)
     # TODO: right now just storing free key-values on the `results`, could standardize the json schema/spec
     results = Column(JSONB)
-    logs = Column(Text)
+    # Updated periodically by the process running the execution, executions without a recent heartbeat are set as
+    # timed out by the reaper (see `crud.check_execution.reap_stale`)
+    heartbeat_at = Column(TIMESTAMP)
 
     check_id = Column(Integer, ForeignKey('check.id'))
     check = relationship('CheckBase', back_populates='executions')
 
-    # TODO: let check executions run on specific table partitions
-    # table_partition_id = Column(Integer, ForeignKey('dbtablepartition.id'))
-    # table_partition = relationship('DBTablePartition', back_populates='check_executions')
+    # Partition the execution ran on (null when the whole table was checked)
+    table_partition_id = Column(Integer, ForeignKey('dbtablepartition.id'), index=True)
+    table_partition = relationship('DBTablePartition', back_populates='check_executions')
+
+    log = relationship(CheckExecutionLog, uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+
+    @property
+    def logs(self):
+        return self.log.contents if self.log is not None else None
+
+    @logs.setter
+    def logs(self, logs):
+        if not logs and self.log is None:
+            return
+        if self.log is None:
+            self.log = CheckExecutionLog()
+        self.log.contents = logs
 
     def json(self):
         return {
@@ -39,6 +65,7 @@ class CheckExecution(Base):
             'exec_time': self.exec_time,
             'status': self.status,
             'results': self.results,
-            'logs': self.logs,
             'check_id': self.check_id,
+            'table_partition_id': self.table_partition_id,
+            'heartbeat_at': self.heartbeat_at,
         }
@@ -0,0 +1,48 @@
+import gzip
+
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, LargeBinary
+
+from core.config import settings
+from db.base_class import Base
+
+
+class CheckExecutionLog(Base):
+    """
+    CheckExecutionLog keeps the logs of a check execution out of the `checkexecution` rows scanned by the executions
+    list and stats queries, they are only loaded when a single execution is shown. Logs are gzip-compressed and capped
+    to `CHECK_EXECUTION_LOGS_MAX_BYTES` (the end of the logs is kept).
+    """
+
+    check_execution_id = Column(Integer, ForeignKey('checkexecution.id', ondelete='CASCADE'), primary_key=True)
+    data = Column(LargeBinary)
+    # Uncompressed size of the logs (before truncating) and whether they were truncated
+    size = Column(Integer)
+    truncated = Column(Boolean)
+
+    @property
+    def contents(self) -> str:
+        return self.decompress(self.data)
+
+    @contents.setter
+    def contents(self, logs: str):
+        self.data, self.size, self.truncated = self.compress(logs)
+
+    @staticmethod
+    def compress(logs: str):
+        """
+        Compressed logs (capped to `CHECK_EXECUTION_LOGS_MAX_BYTES`), their uncompressed size and whether they were
+        truncated.
+        """
+        raw = (logs or '').encode()
+        size = len(raw)
+        truncated = size > settings.CHECK_EXECUTION_LOGS_MAX_BYTES
+        if truncated:
+            raw = '[{} bytes truncated]\n'.format(size - settings.CHECK_EXECUTION_LOGS_MAX_BYTES).encode() + \
+                raw[-settings.CHECK_EXECUTION_LOGS_MAX_BYTES:]
+        return gzip.compress(raw), size, truncated
+
+    @staticmethod
+    def decompress(data: bytes):
+        if data is None:
+            return None
+        return gzip.decompress(data).decode(errors='replace')
@@ -29,4 +29,5 @@ class CustomCheck(CheckBase):
             'source': self.source,
             'active': self.active,
             'database_id': self.database_id,
+            'statement_timeout_seconds': self.statement_timeout_seconds,
         }
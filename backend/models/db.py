@@ -1,9 +1,12 @@
+from contextlib import contextmanager
+
 from sqlalchemy import Column, Integer, String
 from sqlalchemy_utils import EncryptedType
 from sqlalchemy.orm import relationship
 from core.config import settings
 from db.base_class import Base
 from core.db_engines import engine_specs
+from core.engine_registry import engine_registry
 
 
 class DB(Base):
@@ -31,18 +34,42 @@ class DB(Base):
     # Comma separated list of schemas that shouldn't be included in the metadata (accepts regex too)
     blacklist = Column(String)
 
+    # Admission control: max check executions running at once against the DB (defaults to
+    # `SOURCE_DB_MAX_CONCURRENT_CHECKS`) and max queries sent to it per minute (unlimited if not set)
+    max_concurrent_checks = Column(Integer)
+    max_queries_per_minute = Column(Integer)
+
+    # Max run time of the check queries sent to the DB, unless set on the check (defaults to
+    # `CHECK_STATEMENT_TIMEOUT_SECONDS`)
+    statement_timeout_seconds = Column(Integer)
+
     def get_conn(self):
-        engine_spec = engine_specs.get(self.type)
-        return engine_spec.get_sqla_engine(
-            hostname=self.hostname,
-            port=self.port,
-            database=self.database,
-            username=self.username,
-            password=self.password
-        )
+        return engine_registry.get_engine(self)
+
+    @contextmanager
+    def raw_cursor(self):
+        """
+        DBAPI cursor from the shared pool, the connection goes back to the pool once the block is done.
+        """
+        conn = self.get_conn().raw_connection()
+        try:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+
+    def cancel_queries(self, execution_id: int) -> int:
+        """
+        Kills the queries of the given check execution that are running on the DB.
+        """
+        return engine_specs.get(self.type).cancel_queries(self.get_conn(), execution_id)
 
     def fetchone(self, statement):
-        return self.get_conn().execute(statement).fetchone()
+        with self.get_conn().connect() as conn:
+            return conn.execute(statement).fetchone()
 
     def json(self):
         return {
@@ -54,5 +81,8 @@ class DB(Base):
             'database': self.database,
             'username': self.username,
             'password': self.password,
-            'blacklist': self.blacklist
+            'blacklist': self.blacklist,
+            'max_concurrent_checks': self.max_concurrent_checks,
+            'max_queries_per_minute': self.max_queries_per_minute,
+            'statement_timeout_seconds': self.statement_timeout_seconds,
         }
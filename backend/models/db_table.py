@@ -1,3 +1,6 @@
+import json
+from hashlib import sha256
+
 from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
@@ -16,6 +19,12 @@ class DBTable(Base):
     # TODO auto-profiling metrics
     # profiling = Column(JSONB)
 
+    # Hash of the columns as last fetched from the source (see `columns_fingerprint`), refreshes skip unchanged tables
+    fingerprint = Column(String(64))
+
+    # Newest partition fetched (e.g. `dt=2021-01-01/hour=00`), later fetches only query the partitions from it on
+    partition_watermark = Column(String)
+
     schema_id = Column(Integer, ForeignKey('dbschema.id'), index=True)
     schema = relationship('DBSchema', back_populates='tables')
 
@@ -28,6 +37,13 @@ class DBTable(Base):
         UniqueConstraint('name', 'schema_id', name='unique_table_name_schema_id'),
     )
 
+    @staticmethod
+    def columns_fingerprint(columns) -> str:
+        """
+        Fingerprint of the ordered `(name, type, is_partition_column)` columns of a table.
+        """
+        return sha256(json.dumps([list(c) for c in columns]).encode()).hexdigest()
+
     @property
     def partition_column(self):
         for c in self.columns:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from db.base_class import Base
@@ -15,8 +15,11 @@ class DBTablePartition(Base):
     table_id = Column(Integer, ForeignKey('dbtable.id'), index=True)
     table = relationship('DBTable', back_populates='partitions')
 
-    # TODO: let check executions run on specific table partitions
-    # check_executions = relationship('CheckExecution', back_populates='table_partition')
+    check_executions = relationship('CheckExecution', back_populates='table_partition')
+
+    __table_args__ = (
+        UniqueConstraint('name', 'table_id', name='unique_partition_name_table_id'),
+    )
 
     def json(self):
         return {
@@ -2,6 +2,8 @@ import pandas as pd
 
 from pyhive.exc import DatabaseError
 
+from core.config import settings
+
 
 def df_from_query(q, conn, params=None, retries=5):
     trial = 1
@@ -11,4 +13,27 @@ def df_from_query(q, conn, params=None, retries=5):
         except DatabaseError as e:
             print(e)
             trial += 1
-    return ValueError(f'No result after {trial} retries')
+    raise ValueError(f'No result after {trial} retries')
+
+
+def iter_df_from_query(q, conn, params=None, chunksize=None):
+    """
+    Streams the query results as DataFrames of at most `chunksize` rows, so memory is bounded by the chunk size and not
+    by the size of the result. SQLAlchemy `stream_results` makes psycopg2 use a server-side (named) cursor on Postgres
+    and mysqlclient use a `SSCursor` on MySQL, PyHive already pages the Presto results on `fetchmany`.
+
+    Unlike `df_from_query` there are no retries, as a stream can't be resumed once some chunks have been consumed.
+    """
+    chunksize = chunksize or settings.CHECK_FETCH_CHUNK_SIZE
+    with conn.connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(q, params) if params \
+            else connection.execution_options(stream_results=True).execute(q)
+        try:
+            columns = result.keys()
+            while True:
+                rows = result.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+        finally:
+            result.close()
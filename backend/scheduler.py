@@ -1,9 +1,14 @@
 import re
+import threading
+from datetime import datetime, timedelta
+
 import crud
 
+from celery_app import celery_app
 from pytz import utc
 from sqlalchemy.orm import sessionmaker
 from db.session import engine
+from core.alert_outbox import alert_dispatcher
 from core.config import settings
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
@@ -13,13 +18,108 @@ from apscheduler.jobstores.base import JobLookupError
 jobstores = {
     'default': SQLAlchemyJobStore(url=settings.SQLALCHEMY_DATABASE_URI)
 }
+# Jobs only enqueue the check in Celery (see `enqueue_check`), the checks themselves run on the workers
 executors = {
     'default': ThreadPoolExecutor(20)
 }
+# Missed runs of a check are coalesced into one, overlapping runs are skipped by the per-check lock (`check_locks`)
 job_defaults = {
-    'coalesce': False,
-    'max_instances': 3
+    'coalesce': True,
+    'max_instances': 1
 }
+REAPER_JOB_ID = '__reap_stale_executions'
+LOGS_RETENTION_JOB_ID = '__purge_execution_logs'
+ALERTS_JOB_ID = '__dispatch_alerts'
+
+
+class DueChecks:
+    """
+    Scheduled runs of the checks of a table with the same schedule fire together, they are collected for
+    `window_seconds` and sent as a single `exec_table_checks` run, so the checks that can share a scan read the table
+    once instead of once per check.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._due = {}  # (table id, schedule) -> check ids
+        self._lock = threading.Lock()
+
+    def add(self, table_id: int, schedule: str, check_id: int):
+        with self._lock:
+            check_ids = self._due.setdefault((table_id, schedule), [])
+            check_ids.append(check_id)
+            if len(check_ids) > 1:
+                return
+        timer = threading.Timer(self.window_seconds, self.send, args=[table_id, schedule])
+        timer.daemon = True
+        timer.start()
+
+    def send(self, table_id: int, schedule: str):
+        with self._lock:
+            check_ids = self._due.pop((table_id, schedule), [])
+        if len(check_ids) == 1:
+            celery_app.send_task('tasks.celery_worker.exec_check', args=[check_ids[0], None, None])
+        elif check_ids:
+            celery_app.send_task('tasks.celery_worker.exec_table_checks', args=[table_id, None, check_ids])
+
+
+due_checks = DueChecks(window_seconds=settings.SCHEDULED_CHECKS_BATCH_SECONDS)
+
+
+def enqueue_check(check_id: int, partition_id: int = None, execution_id: int = None):
+    """
+    Scheduler job of every check, sends the check to the Celery `checks` queue so the check runs on a worker node
+    instead of the API process (module level function so the job store can reference it). Checks triggered from the API
+    pass the id of their already queued execution.
+    Scheduled runs of table checks go through `due_checks`, to run together with the other checks due on the table.
+    """
+    if partition_id is None and execution_id is None and settings.SCHEDULED_CHECKS_BATCH_SECONDS > 0:
+        session = sessionmaker(bind=engine)()
+        try:
+            check = crud.check_base.get(db=session, id=check_id)
+            table_id = getattr(check, 'table_id', None)
+            schedule = check.schedule if check is not None else None
+        finally:
+            session.close()
+        if table_id is not None:
+            due_checks.add(table_id, schedule, check_id)
+            return
+
+    celery_app.send_task('tasks.celery_worker.exec_check', args=[check_id, partition_id, execution_id])
+
+
+def reap_stale_executions():
+    """
+    Scheduler job that sets as timed out the running check executions whose process stopped sending heartbeats (e.g.
+    a worker that died mid-check), so they don't stay as running forever. The locks of their checks are left alone,
+    they expire once nobody renews them (a stalled metadata DB doesn't stop a live worker from renewing its lock).
+    """
+    session = sessionmaker(bind=engine)()
+    try:
+        stale_before = datetime.now() - timedelta(seconds=settings.CHECK_EXECUTION_STALE_SECONDS)
+        for execution in crud.check_execution.reap_stale(db=session, stale_before=stale_before):
+            print(f'Check execution {execution.id} of check {execution.check_id} timed out')
+    finally:
+        session.close()
+
+
+def purge_execution_logs():
+    """
+    Scheduler job that deletes the logs of the check executions older than `CHECK_EXECUTION_LOGS_RETENTION_DAYS`.
+    """
+    session = sessionmaker(bind=engine)()
+    try:
+        older_than = datetime.now() - timedelta(days=settings.CHECK_EXECUTION_LOGS_RETENTION_DAYS)
+        print(f'Deleted the logs of {crud.check_execution.purge_logs(db=session, older_than=older_than)} executions')
+    finally:
+        session.close()
+
+
+def dispatch_alerts():
+    """
+    Scheduler job that sends the digests of the alerts enqueued by the checks since its previous run.
+    """
+    alert_dispatcher.dispatch()
 
 
 class DQScheduler(BackgroundScheduler):
@@ -39,6 +139,24 @@ class DQScheduler(BackgroundScheduler):
             args=args, next_run_time=None, misfire_grace_time=60
         )
 
+    def add_reaper_job(self):
+        super().add_job(
+            reap_stale_executions, id=REAPER_JOB_ID, trigger='interval', replace_existing=True, coalesce=True,
+            max_instances=1, seconds=settings.CHECK_EXECUTION_REAPER_INTERVAL_SECONDS
+        )
+
+    def add_logs_retention_job(self):
+        super().add_job(
+            purge_execution_logs, id=LOGS_RETENTION_JOB_ID, trigger='interval', replace_existing=True, coalesce=True,
+            max_instances=1, hours=24
+        )
+
+    def add_alerts_job(self):
+        super().add_job(
+            dispatch_alerts, id=ALERTS_JOB_ID, trigger='interval', replace_existing=True, coalesce=True,
+            max_instances=1, seconds=settings.ALERT_DIGEST_SECONDS
+        )
+
     def reschedule_job(self, id, cron):
         cron_dict = CRON_REGEX.match(cron).groupdict()
         super().reschedule_job(
@@ -55,10 +173,13 @@ class DQScheduler(BackgroundScheduler):
     def app_init_start(self):
         self.safe_start()
         self.remove_all_jobs()
+        self.add_reaper_job()
+        self.add_logs_retention_job()
+        self.add_alerts_job()
         session = sessionmaker(bind=engine)()
         all_checks = crud.check_base.get_all(db=session, limit=None)
         for check in all_checks:
-            self.add_job(func=check.get_func(), id=check.name, cron=check.schedule, args=[check.id])
+            self.add_job(func=enqueue_check, id=check.name, cron=check.schedule, args=[check.id])
             if check.active:
                 self.resume_job(check.name)
 
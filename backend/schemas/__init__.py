@@ -1,10 +1,10 @@
 from .check_base import CheckBase, CheckBaseWithLastExecution
 from .check import Check, CheckCreate, CheckInDB, CheckUpdate, CheckWithExecutions, CheckWithLastExecution, \
-    CheckUpdateMultiple
+    CheckUpdateMultiple, CheckDistinctEstimate
 from .custom_check import CustomCheck, CustomCheckCreate, CustomCheckInDB, CustomCheckUpdate, \
     CustomCheckUpdateMultiple, CustomCheckName, CustomCheckWithExecutions, CustomCheckWithLastExecution
 from .check_execution import CheckExecution, CheckExecutionCreate, CheckExecutionInDB, CheckExecutionUpdate, \
-    CheckExecutionWithCheckName, CheckExecutionWithLogs, CheckExecutionBase, Stats
+    CheckExecutionWithCheckName, CheckExecutionWithLogs, CheckExecutionBase, CheckExecutionState, Stats
 from .db import DB, DBCreate, DBInDB, DBUpdate, DBCreateInternal, DBWithSchemas, TestDBConn, SupportedDBs
 from .db_schema import DBSchema, DBSchemaCreate, DBSchemaInDB, DBSchemaUpdate, DBSchemaWithTables
 from .db_table import DBTable, DBTableCreate, DBTableInDB, DBTableUpdate, DBTableWithColumns
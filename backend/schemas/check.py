@@ -1,7 +1,7 @@
 from typing import Optional, List, Any
 from pydantic import BaseModel, validator
 
-from models.check import CheckType
+from models.check import CheckType, SampleMethod
 from scheduler import CRON_REGEX
 
 
@@ -17,6 +17,13 @@ class CheckBase(BaseModel):
     schema_id: int
     table_id: int
     column_id: Optional[int]
+    order_column_id: Optional[int]
+    latest_partition_only: Optional[bool] = False
+    approximate: Optional[bool] = False
+    sample_method: Optional[SampleMethod]
+    sample_size: Optional[float]
+    watermark_column_id: Optional[int]
+    statement_timeout_seconds: Optional[int]
 
     class Config:
         orm_mode = True
@@ -26,6 +33,15 @@ class CheckBase(BaseModel):
         assert CRON_REGEX.match(cron) is not None, "Invalid 'schedule' cron format"
         return cron
 
+    @validator('sample_size', always=True)
+    def validate_sample_size(cls, sample_size, values):
+        sample_method = values.get('sample_method')
+        if sample_method is not None:
+            assert sample_size is not None and sample_size > 0, "'sample_size' must be positive when sampling"
+            if sample_method != SampleMethod.ROWS:
+                assert sample_size <= 100, "'sample_size' is a percentage for non 'rows' sampling"
+        return sample_size
+
 
 class CheckCreate(CheckBase):
     pass
@@ -37,6 +53,7 @@ class CheckUpdate(CheckBase):
 
 class CheckInDBBase(CheckBase):
     id: int
+    watermark_value: Optional[str]
 
 
 class Check(CheckInDBBase):
@@ -45,6 +62,7 @@ class Check(CheckInDBBase):
 
 class CheckWithLastExecution(CheckBase):
     id: int
+    watermark_value: Optional[str]
     last_check_execution_id: Optional[int]
 
 
@@ -62,3 +80,13 @@ class CheckInDB(CheckInDBBase):
 
 class CheckUpdateMultiple(BaseModel):
     active: Optional[bool]
+
+
+class CheckDistinctEstimate(BaseModel):
+    check_id: int
+    executions: int
+    approximate: bool
+    unique_rows: int
+    relative_error: float
+    unique_rows_lower: int
+    unique_rows_upper: int
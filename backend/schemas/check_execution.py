@@ -9,6 +9,8 @@ class CheckExecutionBase(BaseModel):
     check_id: int
     exec_time: datetime.datetime
     status: Optional[str] = None
+    table_partition_id: Optional[int] = None
+    heartbeat_at: Optional[datetime.datetime] = None
 
     class Config:
         orm_mode = True
@@ -42,6 +44,7 @@ class CheckExecutionWithCheckName(CheckExecutionInDBBase):
     check_name: Optional[str]
     check_class: Optional[str]
     results: Optional[Any]
+    table_partition_id: Optional[int]
 
 
 class CheckExecutionWithLogs(CheckExecutionInDBBase):
@@ -52,9 +55,16 @@ class CheckExecutionWithLogs(CheckExecutionInDBBase):
     check_name: Optional[str]
     check_class: Optional[str]
     results: Optional[Any]
+    table_partition_id: Optional[int]
     logs: Optional[str]
 
 
+class CheckExecutionState(CheckExecutionInDBBase):
+    # Lightweight view (no logs) polled by the UI while the execution is queued or running
+    id: int
+    results: Optional[Any]
+
+
 class CheckExecutionInDB(CheckExecutionInDBBase):
     pass
 
@@ -11,6 +11,7 @@ class CustomCheckBase(BaseModel):
     description: Optional[str] = None
     source: Optional[str] = None
     active: Optional[bool] = False
+    statement_timeout_seconds: Optional[int]
 
     class Config:
         orm_mode = True
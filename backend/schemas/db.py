@@ -10,6 +10,9 @@ class DBBase(BaseModel):
     port: Optional[int] = None
     database: Optional[str] = None
     blacklist: Optional[str] = None
+    max_concurrent_checks: Optional[int] = None
+    max_queries_per_minute: Optional[int] = None
+    statement_timeout_seconds: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -29,6 +32,9 @@ class DBCreateInternal(DBBase):
     username: Optional[str] = None
     password: Optional[str] = None
     blacklist: Optional[str] = None
+    max_concurrent_checks: Optional[int] = None
+    max_queries_per_minute: Optional[int] = None
+    statement_timeout_seconds: Optional[int] = None
 
 
 class DBUpdate(DBCreateInternal):
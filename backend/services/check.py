@@ -1,7 +1,14 @@
+import json
+from datetime import datetime
 from typing import Tuple, Dict
 
+from fastapi import HTTPException
+
+import crud
 from models.check import CheckType
+from models.deps import df_from_query
 from services.base import BaseService
+from tasks.hll import HyperLogLog, approx_distinct_results
 
 from core.db_engines import engine_specs
 
@@ -11,26 +18,107 @@ ORDERED_METRIC_NAME = 'count'
 
 class CheckService(BaseService):
 
-    def get_query(self, check, cursor=None) -> Tuple[str, Dict]:
+    def get_query(self, check, cursor=None, partition=None, watermark=None) -> Tuple[str, Dict]:
         # TODO: need to have some better logic that handles:
         #  - (done) different databases (the db engine should dictate the check syntax in it's own class, not here)
         #  - different check types
         #  - individual column vs table checks
-        #  - running for latest partition
-        #  - running for old partitions on-demand
+        #  - (done) running for latest partition
+        #  - (done) running for old partitions on-demand
 
         engine_spec = engine_specs.get(check.database.type)
 
         q = 'SELECT 1'
         if check.type == CheckType.UNIQUENESS:
-            q = engine_spec.unique_column_q_template(check=check, cursor=cursor)
+            q = engine_spec.unique_column_q_template(check=check, cursor=cursor, partition=partition, watermark=watermark)
         if check.type == CheckType.NON_NULL:
-            q = engine_spec.non_null_column_q_template(check=check, cursor=cursor)
+            q = engine_spec.non_null_column_q_template(check=check, cursor=cursor, partition=partition, watermark=watermark)
         if check.type == CheckType.OUTLIERS:
-            q = engine_spec.outlier_column_q_template(check=check, cursor=cursor)
+            q = engine_spec.outlier_column_q_template(check=check, cursor=cursor, partition=partition, watermark=watermark)
         elif check.type == CheckType.FRESHNESS:
-            q = engine_spec.freshness_column_q_template(check=check, cursor=cursor)
+            q = engine_spec.freshness_column_q_template(check=check, cursor=cursor, partition=partition, watermark=watermark)
         elif check.type == CheckType.ORDERED:
-            q = engine_spec.ordered_table_q_template(check=check, cursor=cursor)
+            q = engine_spec.ordered_table_q_template(check=check, cursor=cursor, partition=partition, watermark=watermark)
 
         return q, {'schema': check.schema.name, 'table': check.table.name, 'column_to_check': check.column.name}
+
+    @staticmethod
+    def can_push_down(check) -> bool:
+        return engine_specs.get(check.database.type).push_down
+
+    def get_push_down_query(self, check, step: str, cursor=None, **kwargs) -> str:
+        """
+        Query for one step of a check whose aggregates are computed on the source DB (only for engines that support
+        push-down). Extra kwargs are passed to the template, e.g. the partition or results from previous steps such as
+        the outlier bounds.
+        """
+        engine_spec = engine_specs.get(check.database.type)
+
+        templates = {
+            (CheckType.UNIQUENESS, 'stats'): engine_spec.unique_column_stats_q_template,
+            (CheckType.UNIQUENESS, 'duplicates'): engine_spec.unique_column_duplicates_q_template,
+            (CheckType.UNIQUENESS, 'approx_stats'): engine_spec.approx_unique_column_stats_q_template,
+            (CheckType.NON_NULL, 'stats'): engine_spec.non_null_column_stats_q_template,
+            (CheckType.OUTLIERS, 'stats'): engine_spec.outlier_column_stats_q_template,
+            (CheckType.OUTLIERS, 'outliers'): engine_spec.outlier_rows_q_template,
+            (CheckType.ORDERED, 'unordered'): engine_spec.ordered_rows_q_template,
+        }
+        return templates[(CheckType(check.type), step)](check=check, cursor=cursor, **kwargs)
+
+    @staticmethod
+    def can_push_down_approx(check) -> bool:
+        return engine_specs.get(check.database.type).approx_distinct
+
+    @staticmethod
+    def can_batch(check) -> bool:
+        engine_spec = engine_specs.get(check.database.type)
+        return engine_spec.push_down and check.column is not None and check.type in engine_spec.batch_aggregates \
+            and not check.is_incremental and not check.approximate and not check.is_sampled
+
+    def get_batch_query(self, checks, cursor=None, outlier_bounds=None, partition=None) -> str:
+        """
+        Single aggregate query for several checks on the same table. With `outlier_bounds` ({check id: (lower, upper)})
+        it's the second pass query that counts the outliers of the given outlier checks.
+        """
+        engine_spec = engine_specs.get(checks[0].database.type)
+        if outlier_bounds is not None:
+            return engine_spec.table_batch_outliers_q_template(checks, outlier_bounds, cursor=cursor, partition=partition)
+        return engine_spec.table_batch_q_template(checks, cursor=cursor, partition=partition)
+
+    def get_watermark_query(self, check, cursor=None, partition=None) -> str:
+        """
+        Query for the current high-watermark of an incremental check, only reading the rows past the saved one.
+        """
+        engine_spec = engine_specs.get(check.database.type)
+        return engine_spec.watermark_q_template(check, cursor=cursor, partition=partition, lower=check.watermark_value)
+
+    def get_distinct_estimate(self, check, from_time: datetime = None, to_time: datetime = None) -> Dict:
+        """
+        Distinct count of the union of all the rows read by the approximate uniqueness executions of a check in the
+        given time range (e.g. a week of daily partitions), merging the HLL sketches saved in their results instead of
+        scanning the table again. Sketches from the engine native HLL are merged on the source DB.
+        """
+        sketches = []
+        for execution in crud.check_execution.get_by_check(db=self.db, check_id=check.id, from_time=from_time, to_time=to_time):
+            results = json.loads(execution.results) if isinstance(execution.results, str) else execution.results
+            if results and results.get('sketch'):
+                sketches.append(results)
+        if not sketches:
+            raise HTTPException(status_code=404, detail='No approximate uniqueness executions found')
+
+        sketch_formats = {s['sketch_format'] for s in sketches}
+        if len(sketch_formats) > 1:
+            raise HTTPException(status_code=400, detail=f'Can not merge sketches of different formats: {sketch_formats}')
+
+        if sketch_formats == {HyperLogLog.SKETCH_FORMAT}:
+            hll = HyperLogLog.merge_sketches(s['sketch'] for s in sketches)
+            unique_rows, relative_error = hll.estimate(), hll.relative_error
+        else:
+            engine_spec = engine_specs.get(check.database.type)
+            merge_query = engine_spec.merge_sketches_q_template([s['sketch'] for s in sketches])
+            unique_rows = int(df_from_query(merge_query, conn=check.database.get_conn())['unique_rows'][0])
+            # The native sketches don't count NULLs, add them back as one more distinct value
+            unique_rows += int(any(s.get('has_nulls') for s in sketches))
+            relative_error = engine_spec.approx_relative_error
+
+        return dict(approx_distinct_results(None, unique_rows, relative_error), check_id=check.id, executions=len(sketches))
@@ -25,6 +25,9 @@ class DBService(BaseService):
             username=db_in.username,
             password=db_in.password,
             blacklist=db_in.blacklist,
+            max_concurrent_checks=db_in.max_concurrent_checks,
+            max_queries_per_minute=db_in.max_queries_per_minute,
+            statement_timeout_seconds=db_in.statement_timeout_seconds,
         )
         db_res = crud.db.create(db=self.db, obj_in=db_in_internal)
         return db_res
@@ -16,15 +16,22 @@ class DBTableService(BaseService):
 
         return db_table.get_filtered(db=self.db, skip=skip, limit=limit, sort=sort_list, **filter_dict)
 
-    def trigger_checks(self, id):
+    def trigger_checks(self, id, partitions=None):
         table = db_table.get(db=self.db, id=id)
         if not table:
             raise HTTPException(status_code=404, detail='DBTable not found')
 
-        for check in db_table.checks:
-            celery_app.send_task('tasks.celery_worker.exec_check', args=[check.id])
+        table_partition_ids = {p.id for p in table.partitions}
+        for partition_id in partitions or []:
+            if partition_id not in table_partition_ids:
+                raise HTTPException(status_code=404, detail='DBTablePartition {} not found'.format(partition_id))
 
-        return db_table.checks
+        # All the table checks run together, so the ones that can share a scan are batched into a single query. With
+        # partitions there is one run per partition, each one scanning only its partition
+        for partition_id in partitions or [None]:
+            celery_app.send_task('tasks.celery_worker.exec_table_checks', args=[table.id, partition_id])
+
+        return table.checks
 
     def trigger_fetch_table_tree(self, id):
         table = db_table.get(db=self.db, id=id)
@@ -1,18 +1,17 @@
-import json
-import requests
-
+from core.alert_outbox import alert_dispatcher
 from core.config import settings
 from tasks.utils import is_url
 
 
 def send_mm_alert(check):
+    """
+    Enqueues the failure alert of the check, the alerts are sent in digests by the scheduler (see `AlertDispatcher`).
+    """
     hook = settings.MATTERMOST_HOOK
     if is_url(hook):
-        msg = """
-    #### :x: Check "{check_name}" failed.
-    **Url**: {url} 
-        """.format(
+        alert_dispatcher.enqueue(
+            channel=hook,
+            check_id=check.id,
             check_name=check.name,
             url=settings.SERVER_HOST + f'/#/{"custom_checks" if check.check_class == "customcheck" else "checks"}/?filter={{"id":{check.id}}}'
         )
-        requests.post(hook, data=json.dumps({'text': msg}), headers={'Content-Type': 'application/json'})
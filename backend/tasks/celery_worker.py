@@ -1,16 +1,29 @@
 import re
+from itertools import groupby
+
 import pyhive
 import sqlalchemy
-from sqlalchemy import inspect, create_engine
+from sqlalchemy import create_engine
+from celery.signals import worker_process_shutdown
 from sqlalchemy.orm import sessionmaker, Session
 
 import crud
 import schemas
+from core.admission import AdmissionTimeout, CheckAlreadyRunning, check_locks, db_admission
 from core.config import settings
 from core.db_engines import engine_specs
 from celery_app import celery_app
-from models import DB
+from models import DB, DBTable, CheckExecutionStatus
 from models.deps import df_from_query
+from tasks.execution_writer import execution_writer
+from tasks.partitions import newest_partition, partition_names
+from tasks.scripts import skip_check_execution, table_checks
+
+
+@worker_process_shutdown.connect
+def flush_execution_writes(**kwargs):
+    # Pool processes don't run the `atexit` handlers
+    execution_writer.flush()
 
 
 def get_sessionmaker_instance(uri: str) -> sessionmaker:
@@ -34,151 +47,176 @@ def delete_blacklisted_schema(db_session: Session, schema_name: str, database: D
                 return True
 
 
+def save_db_metadata(db_session: Session, database: DB, rows, batch_tables: int = 1000):
+    """
+    Saves the metadata rows streamed by the engine spec `crawl_metadata` (grouped by table), `batch_tables` tables at a
+    time: new schemas, tables and columns are added and the types of existing columns updated, tables whose columns
+    fingerprint didn't change are skipped. Tables with partition columns get their partitions fetched too.
+    """
+    schema_ids = {s.name: s.id for s in database.schemas}
+    blacklisted = {}  # schema name -> is blacklisted
+
+    def schema_id(schema_name):
+        if schema_name not in blacklisted:
+            # If schema is one of the blacklisted schemas on this DB, do not add it (and delete it if it existed)
+            blacklisted[schema_name] = bool(delete_blacklisted_schema(db_session, schema_name, database))
+            if blacklisted[schema_name]:
+                schema_ids.pop(schema_name, None)
+            elif schema_name not in schema_ids:
+                schema_ids[schema_name] = crud.db_schema.create(
+                    db=db_session, obj_in=schemas.DBSchemaCreate(name=schema_name, database_id=database.id)
+                ).id
+        return None if blacklisted[schema_name] else schema_ids[schema_name]
+
+    def save_batch(batch):
+        tables = crud.db_table.get_or_create(db=db_session, tables=list(batch))
+        # Only the columns of the tables whose fingerprint changed since the last fetch are written
+        changed, changed_columns = {}, {}
+        for key, columns in batch.items():
+            id, fingerprint = tables[key]
+            new_fingerprint = DBTable.columns_fingerprint(columns)
+            if new_fingerprint != fingerprint:
+                changed[id], changed_columns[id] = new_fingerprint, columns
+        crud.db_column.sync(db=db_session, columns=changed_columns)
+        crud.db_table.set_fingerprints(db=db_session, fingerprints=changed)
+
+        for key, columns in batch.items():
+            if any(is_partition_column for _, _, is_partition_column in columns):
+                celery_app.send_task('tasks.celery_worker.fetch_db_table_partitions', args=[tables[key][0]])
+
+    batch = {}  # (schema_id, table name) -> columns
+    for (schema_name, table_name), table_rows in groupby(rows, key=lambda row: (row[0], row[1])):
+        table_schema_id = schema_id(schema_name)
+        if table_schema_id is None:
+            continue
+        # Types are stored (and fingerprinted) upper case with single spaces, however the source spells them
+        batch[(table_schema_id, table_name)] = [
+            (c, ' '.join(str(t).upper().split()), bool(p)) for _, _, c, t, p in table_rows
+        ]
+        if len(batch) >= batch_tables:
+            save_batch(batch)
+            batch = {}
+    if batch:
+        save_batch(batch)
+
+
 @celery_app.task(acks_late=True)
 def fetch_db_tree(db_id: int):
     db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
-    database = crud.db.get(db=db_session, id=db_id)
-
-    engine_spec = engine_specs.get(database.type)
-    engine = engine_spec.get_sqla_engine(
-        hostname=database.hostname, port=database.port, database=database.database,
-        username=database.username, password=database.password
-    )
-    insp = inspect(engine)
-    schema_names = insp.get_schema_names()
-
-    existing_schemas_names = [s.name for s in database.schemas]
-
-    # Fetch schemas and save then into DQ db
-    for schema_name in schema_names:
-
-        # If schema is one of the blacklisted schemas on this DB, do not add it (and delete it)
-        blacklisted = delete_blacklisted_schema(db_session, schema_name, database)
-        if not blacklisted and schema_name not in existing_schemas_names:
-            schema = crud.db_schema.create(db=db_session, obj_in=schemas.DBSchemaCreate(name=schema_name, database_id=database.id))
-            celery_app.send_task('tasks.celery_worker.fetch_db_schema_tree', args=[schema.id])
+    try:
+        database = crud.db.get(db=db_session, id=db_id)
+        engine_spec = engine_specs.get(database.type)
 
-    db_session.flush()
+        # All the schemas, tables and columns of the DB come from a single metadata query instead of a task (and
+        # inspector calls) per schema and table
+        save_db_metadata(db_session, database, engine_spec.crawl_metadata(database.get_conn()))
+    finally:
+        db_session.close()
 
 
 @celery_app.task(acks_late=True)
 def fetch_db_schema_tree(db_schema_id: int, force: bool = False):
+    """
+    Fetches the tables and columns of the schema. Existing tables are always compared with the source (`force` is kept
+    for the tasks already queued), only those whose columns fingerprint changed are written.
+    """
     db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
-    db_schema = crud.db_schema.get(db=db_session, id=db_schema_id)
-    database = db_schema.database
-    engine_spec = engine_specs.get(database.type)
-
-    engine = engine_spec.get_sqla_engine(
-        hostname=db_schema.database.hostname, port=database.port, database=database.database,
-        username=database.username, password=database.password
-    )
-    insp = inspect(engine)
-
-    table_names = insp.get_table_names(schema=db_schema.name)
-
-    # Fetch tables and save then into DQ db
-    existing_tables = {t.name: t.id for t in db_schema.tables}
-    for table_name in table_names:
-        if table_name not in existing_tables.keys():
-            table = crud.db_table.create(db=db_session, obj_in=schemas.DBTableCreate(name=table_name, schema_id=db_schema.id))
-            celery_app.send_task('tasks.celery_worker.fetch_db_table_tree', args=[table.id])
-        elif force:
-            # If force, we will fetch columns for existing tables too
-            celery_app.send_task('tasks.celery_worker.fetch_db_table_tree', args=[existing_tables[table_name]])
-
-    db_session.flush()
+    try:
+        db_schema = crud.db_schema.get(db=db_session, id=db_schema_id)
+        database = db_schema.database
+        engine_spec = engine_specs.get(database.type)
+        save_db_metadata(
+            db_session, database, engine_spec.crawl_metadata(database.get_conn(), schema_name=db_schema.name)
+        )
+    finally:
+        db_session.close()
 
 
 @celery_app.task(acks_late=True)
 def fetch_db_table_tree(db_table_id: int):
+    """
+    Fetches the columns of the table, with the same metadata query as the whole DB crawl (just filtered by table).
+    """
     db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
-    db_table = crud.db_table.get(db=db_session, id=db_table_id)
-    database = db_table.schema.database
-    engine_spec = engine_specs.get(database.type)
-
-    engine = engine_spec.get_sqla_engine(
-        hostname=db_table.schema.database.hostname, port=database.port, database=database.database,
-        username=database.username, password=database.password
-    )
-    insp = engine_spec.get_inspector(engine)
     try:
-        indexes = engine_spec.get_indexes(inspector=insp, table_name=db_table.name, schema_name=db_table.schema.name)
-        print(indexes)
-        # [{'name': 'partition', 'column_names': ['database', 'table', 'kf_date'], 'unique': False}]
-        partition_columns = []
-        for index in indexes:
-            if index['name'] == 'partition':
-                partition_columns = index['column_names']
-
-        # If it's a partitioned table, launch task to fetch partition metadata
-        if partition_columns:
-            celery_app.send_task('tasks.celery_worker.fetch_db_table_partitions', args=[db_table_id])
-
-        columns = engine_spec.get_columns(inspector=insp, table_name=db_table.name, schema_name=db_table.schema.name)
-        existing_columns = [c.name for c in db_table.columns]
-        for column in columns:
-
-            # If the column doesn't exist already, then create it
-            if column.get('name') not in existing_columns:
-                crud.db_column.create(
-                    db=db_session,
-                    obj_in=schemas.DBColumnCreate(
-                        name=column.get('name'),
-                        type=str(column.get('type')),
-                        table_id=db_table.id,
-                        is_partition_column=column.get('name') in partition_columns
-                    )
-                )
-
-            # If the column exists, update it
-            else:
-                db_column = crud.db_column.get(db=db_session, id=db_table.get_column(column.get('name')).id)
-                db_column_in = schemas.DBColumnUpdate(**db_column.json())
-                db_column_in.type = str(column.get('type'))
-                db_column_in.is_partition_column = column.get('name') in partition_columns
-                crud.db_column.update(
-                    db=db_session,
-                    db_obj=db_column,
-                    obj_in=db_column_in
-                )
-
-        db_session.flush()
+        db_table = crud.db_table.get(db=db_session, id=db_table_id)
+        database = db_table.schema.database
+        engine_spec = engine_specs.get(database.type)
+        save_db_metadata(db_session, database, engine_spec.crawl_metadata(
+            database.get_conn(), schema_name=db_table.schema.name, table_name=db_table.name
+        ))
     except (sqlalchemy.exc.DatabaseError, pyhive.exc.DatabaseError, Exception) as e:
         print(e.__class__)
         print(e)
+    finally:
+        db_session.close()
 
 
 @celery_app.task(acks_late=True)
-def fetch_db_table_partitions(db_table_id: int):
+def fetch_db_table_partitions(db_table_id: int, full: bool = False):
+    """
+    Fetches the partitions of the table added since the previous fetch (from its partition watermark on), `full` scans
+    all of them again (e.g. to find backfilled partitions older than the watermark).
+    """
     db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
-    db_table = crud.db_table.get(db=db_session, id=db_table_id)
-    database = db_table.schema.database
-    engine_spec = engine_specs.get(database.type)
-
-    engine = engine_spec.get_sqla_engine(
-        hostname=db_table.schema.database.hostname, port=database.port, database=database.database,
-        username=database.username, password=database.password
-    )
-    partitions_q = engine_spec.get_partitions_q_template().format(schema=db_table.schema.name, table=db_table.name)
-    df = df_from_query(partitions_q, conn=engine)
-    df['part'] = df.apply(lambda x: '/'.join([f'{c}={x[c]}' for c in df.columns]), axis=1)
-
-    existing_partitions = [p.name for p in db_table.partitions]
-    for part in df['part'].tolist():
-        if part not in existing_partitions:
-            crud.db_table_partition.create(
-                db=db_session,
-                obj_in=schemas.DBTablePartitionCreate(
-                    name=part,
-                    table_id=db_table_id
-                )
-            )
-    db_session.flush()
+    try:
+        db_table = crud.db_table.get(db=db_session, id=db_table_id)
+        database = db_table.schema.database
+        engine_spec = engine_specs.get(database.type)
 
+        partitions_q = engine_spec.partitions_q(db_table, watermark=None if full else db_table.partition_watermark)
+        df = df_from_query(partitions_q, conn=database.get_conn())
+        if df.empty:
+            return
 
-@celery_app.task(acks_late=True)
-def exec_check(check_id: int, partition_id: int = None):
+        names = partition_names(df)
+        crud.db_table_partition.create_missing(db=db_session, table_id=db_table_id, names=names.tolist())
+
+        # The query returns the partitions from the watermark on, so the newest of them is the new watermark
+        db_table.partition_watermark = newest_partition(df, names)
+        db_session.commit()
+    finally:
+        db_session.close()
+
+
+@celery_app.task(bind=True, acks_late=True, max_retries=None)
+def exec_check(self, check_id: int, partition_id: int = None, execution_id: int = None):
     db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
-    check = crud.check.get(db=db_session, id=check_id)
+    try:
+        # Scheduled jobs enqueue any kind of check (generated or custom)
+        check = crud.check_base.get(db=db_session, id=check_id)
+        if check is None:
+            return
+        # Queued executions can be cancelled before a worker picks them up
+        if execution_id is not None:
+            check_execution = crud.check_execution.get(db=db_session, id=execution_id)
+            if check_execution.status == CheckExecutionStatus.CANCELLED.value:
+                return
+        check_func, database = check.get_func(), check.database
+    finally:
+        db_session.close()
+
+    # Runs of a check that is already running are skipped, executions over the source DB concurrency limit go back to
+    # the queue instead of failing
+    try:
+        with check_locks.hold(check_id), db_admission.slot(database, timeout=settings.SOURCE_DB_ADMISSION_WAIT_SECONDS):
+            check_func(check_id, partition_id, execution_id)
+    except CheckAlreadyRunning:
+        skip_check_execution(check_id, partition_id, execution_id)
+    except AdmissionTimeout as e:
+        raise self.retry(exc=e, countdown=settings.SOURCE_DB_ADMISSION_RETRY_SECONDS)
+
+
+@celery_app.task(bind=True, acks_late=True, max_retries=None)
+def exec_table_checks(self, db_table_id: int, partition_id: int = None, check_ids: list = None):
+    db_session = get_sessionmaker_instance(settings.SQLALCHEMY_DATABASE_URI)()
+    try:
+        database = crud.db_table.get(db=db_session, id=db_table_id).schema.database
+    finally:
+        db_session.close()
 
-    check.get_func()(check.id, partition_id)
+    try:
+        with db_admission.slot(database, timeout=settings.SOURCE_DB_ADMISSION_WAIT_SECONDS):
+            table_checks(db_table_id, partition_id, check_ids)
+    except AdmissionTimeout as e:
+        raise self.retry(exc=e, countdown=settings.SOURCE_DB_ADMISSION_RETRY_SECONDS)
@@ -0,0 +1,195 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+from psycopg2.extras import execute_values
+
+from core.config import settings
+from db.session import engine
+from models.check_execution import CheckExecution, CheckExecutionStatus
+from models.check_execution_log import CheckExecutionLog
+
+
+class ExecutionWriter:
+    """
+    Write-behind buffer of the check execution rows. The executions started and finished by all the checks running in
+    the current process are written every `flush_seconds` (or as soon as `max_pending` writes are waiting) with a single
+    bulk statement per kind of write, instead of a commit (and refresh) per execution and status change. Execution ids
+    come straight from the table sequence, so they are known before the rows are written.
+
+    Executions cancelled from the API keep their status and results when their final update is written.
+    """
+
+    UPDATE_Q = """
+        UPDATE checkexecution AS e SET
+            status = CASE WHEN e.status = '{cancelled}' THEN e.status ELSE COALESCE(v.status, e.status) END,
+            results = CASE WHEN e.status = '{cancelled}' THEN e.results ELSE COALESCE(v.results::jsonb, e.results) END,
+            table_partition_id = COALESCE(v.table_partition_id::integer, e.table_partition_id),
+            heartbeat_at = COALESCE(v.heartbeat_at::timestamp, e.heartbeat_at)
+        FROM (VALUES %s) AS v (id, status, results, table_partition_id, heartbeat_at)
+        WHERE e.id = v.id
+    """.format(cancelled=CheckExecutionStatus.CANCELLED.value)
+
+    def __init__(self, flush_seconds: float, max_pending: int, max_attempts: int = 3):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._reset()
+
+    def _reset(self):
+        self._inserts = {}  # id -> row
+        self._updates = {}  # id -> changed columns
+        self._logs = {}  # id -> (compressed logs, size, truncated)
+        self._attempts = {}  # id -> failed flushes
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    @staticmethod
+    def next_id() -> int:
+        with engine.connect() as conn:
+            return conn.execute("SELECT nextval(pg_get_serial_sequence('checkexecution', 'id'))").scalar()
+
+    def insert(self, check_execution: CheckExecution):
+        self._write(lambda: self._inserts.__setitem__(check_execution.id, {
+            'id': check_execution.id,
+            'exec_time': check_execution.exec_time,
+            'status': check_execution.status,
+            'results': json.dumps('{}'),
+            'check_id': check_execution.check_id,
+            'table_partition_id': check_execution.table_partition_id,
+            'heartbeat_at': check_execution.heartbeat_at,
+        }))
+
+    def update(self, execution_id: int, status: str = None, results: str = None, table_partition_id: int = None,
+               heartbeat_at=None, logs: str = None):
+        """
+        Updates the given columns of the execution (None values are left as they are), `results` is a JSON string.
+        """
+        # Results are saved as a JSON string value (as the ORM saves the JSON string set on `CheckExecution.results`)
+        results = json.dumps(results) if results is not None else None
+        changes = {
+            k: v for k, v in (('status', status), ('results', results), ('table_partition_id', table_partition_id),
+                              ('heartbeat_at', heartbeat_at)) if v is not None
+        }
+
+        def write():
+            # Rows not written yet get the changes straight away
+            row = self._inserts.get(execution_id) or self._updates.setdefault(execution_id, {})
+            row.update(changes)
+            if logs:
+                self._logs[execution_id] = CheckExecutionLog.compress(logs)
+
+        self._write(write)
+
+    def _write(self, write):
+        with self._lock:
+            write()
+            pending = len(self._inserts) + len(self._updates) + len(self._logs)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dq-execution-writer', daemon=True)
+                self._thread.start()
+        if pending >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                inserts, updates, logs = self._inserts, self._updates, self._logs
+                self._inserts, self._updates, self._logs = {}, {}, {}
+            if not (inserts or updates or logs):
+                return
+
+            conn = engine.raw_connection()
+            try:
+                try:
+                    self._write_rows(conn.cursor(), inserts, updates, logs)
+                    conn.commit()
+                    failed = []
+                except Exception as e:
+                    # A single bad row fails the whole batch, the executions are then written one by one
+                    conn.rollback()
+                    print(e)
+                    failed = [id for id in set(inserts) | set(updates) | set(logs)
+                              if not self._write_one(conn, id, inserts, updates, logs)]
+            finally:
+                conn.close()
+
+            with self._lock:
+                for id in set(inserts) | set(updates) | set(logs):
+                    if id not in failed:
+                        self._attempts.pop(id, None)
+            if failed:
+                self._requeue(failed, inserts, updates, logs)
+
+    def _write_one(self, conn, id, inserts, updates, logs) -> bool:
+        try:
+            self._write_rows(
+                conn.cursor(),
+                {id: inserts[id]} if id in inserts else {},
+                {id: updates[id]} if id in updates else {},
+                {id: logs[id]} if id in logs else {},
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            print(e)
+            return False
+
+    def _write_rows(self, cursor, inserts, updates, logs):
+        if inserts:
+            execute_values(
+                cursor,
+                'INSERT INTO checkexecution (id, exec_time, status, results, check_id, table_partition_id, '
+                'heartbeat_at) VALUES %s',
+                [(r['id'], r['exec_time'], r['status'], r['results'], r['check_id'], r['table_partition_id'],
+                  r['heartbeat_at']) for r in inserts.values()]
+            )
+        if updates:
+            execute_values(cursor, self.UPDATE_Q, [
+                (id, u.get('status'), u.get('results'), u.get('table_partition_id'), u.get('heartbeat_at'))
+                for id, u in updates.items()
+            ])
+        if logs:
+            execute_values(
+                cursor,
+                'INSERT INTO checkexecutionlog (check_execution_id, data, size, truncated) VALUES %s '
+                'ON CONFLICT (check_execution_id) DO UPDATE '
+                'SET data = EXCLUDED.data, size = EXCLUDED.size, truncated = EXCLUDED.truncated',
+                [(id, data, size, truncated) for id, (data, size, truncated) in logs.items()]
+            )
+
+    def _requeue(self, failed, inserts, updates, logs):
+        # Failed writes go back to the buffer (newer changes win) until they have failed `max_attempts` times
+        with self._lock:
+            for id in failed:
+                self._attempts[id] = self._attempts.get(id, 0) + 1
+                if self._attempts[id] >= self.max_attempts:
+                    print(f'Dropping the writes of check execution {id} after {self._attempts.pop(id)} attempts')
+                    continue
+                if id in inserts:
+                    self._inserts[id] = dict(inserts[id], **self._updates.pop(id, {}))
+                elif id in updates:
+                    self._updates[id] = dict(updates[id], **self._updates.get(id, {}))
+                if id in logs:
+                    self._logs.setdefault(id, logs[id])
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                print(e)
+
+
+execution_writer = ExecutionWriter(
+    flush_seconds=settings.EXECUTION_WRITER_FLUSH_SECONDS,
+    max_pending=settings.EXECUTION_WRITER_MAX_PENDING,
+)
+atexit.register(execution_writer.flush)
+# Buffered writes belong to the parent process, the child (e.g. a Celery pool worker) starts empty
+os.register_at_fork(after_in_child=execution_writer._reset)
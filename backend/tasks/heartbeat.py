@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from core.admission import held_leases
+from core.config import settings
+from db.session import engine
+from models.check_execution import CheckExecution, CheckExecutionStatus
+
+
+class ExecutionHeartbeat:
+    """
+    Keeps the `heartbeat_at` of the check executions running in the current process up to date, so the reaper can tell
+    them apart from the executions of a process that died. A single background thread updates all of them at once, and
+    renews the admission slot and check lock leases held by the process.
+    """
+
+    def __init__(self, interval_seconds: int):
+        self.interval_seconds = interval_seconds
+        self._execution_ids = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, execution_id: int):
+        with self._lock:
+            self._execution_ids.add(execution_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dq-execution-heartbeat', daemon=True)
+                self._thread.start()
+
+    def remove(self, execution_id: int):
+        with self._lock:
+            self._execution_ids.discard(execution_id)
+
+    def beat(self):
+        held_leases.renew()
+        with self._lock:
+            execution_ids = list(self._execution_ids)
+        if not execution_ids:
+            return
+
+        table = CheckExecution.__table__
+        with engine.begin() as conn:
+            conn.execute(
+                table.update()
+                .where(table.c.id.in_(execution_ids))
+                .where(table.c.status == CheckExecutionStatus.RUNNING.value)
+                .values(heartbeat_at=datetime.now())
+            )
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                self.beat()
+            except Exception as e:
+                print(e)
+
+    def _reset_after_fork(self):
+        # The heartbeat thread doesn't survive a fork, the child process starts a new one for its own executions
+        self._execution_ids = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+
+execution_heartbeat = ExecutionHeartbeat(interval_seconds=settings.CHECK_EXECUTION_HEARTBEAT_SECONDS)
+os.register_at_fork(after_in_child=execution_heartbeat._reset_after_fork)
@@ -0,0 +1,94 @@
+import base64
+import math
+import zlib
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct count sketch over the 64 bit pandas hash of the values, so a column can be streamed in chunks
+    with a fixed amount of memory (2^precision one byte registers). Sketches of different chunks, partitions or runs
+    merge into the sketch of their union by taking the max of each register.
+
+    Like `UniquenessReducer`, NULLs hash to the same value so they count as one distinct value.
+    """
+
+    SKETCH_FORMAT = 'hll'
+
+    def __init__(self, precision: int = 12, registers: np.ndarray = None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def update(self, values: pd.Series):
+        if values.empty:
+            return
+
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+
+        # Rank is the position of the leftmost 1 bit of the remaining hash bits (bit length computed with a binary search)
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            is_long = rest >= (np.uint64(1) << np.uint64(shift))
+            bit_length[is_long] += shift
+            rest = np.where(is_long, rest >> np.uint64(shift), rest)
+        bit_length += (rest > 0).astype(np.int64)
+        rank = np.minimum(64 - bit_length + 1, 64 - self.precision + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError(f'Can not merge HLL sketches with precision {self.precision} and {other.precision}')
+        self.registers = np.maximum(self.registers, other.registers)
+        return self
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+
+        # Small range correction (linear counting) while there are empty registers
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros > 0:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_sketch(self) -> str:
+        return base64.b64encode(zlib.compress(bytes([self.precision]) + self.registers.tobytes())).decode()
+
+    @classmethod
+    def from_sketch(cls, sketch: str) -> 'HyperLogLog':
+        data = zlib.decompress(base64.b64decode(sketch))
+        return cls(precision=data[0], registers=np.frombuffer(data[1:], dtype=np.uint8).copy())
+
+    @classmethod
+    def merge_sketches(cls, sketches: Iterable[str]) -> 'HyperLogLog':
+        merged = None
+        for sketch in sketches:
+            hll = cls.from_sketch(sketch)
+            merged = hll if merged is None else merged.merge(hll)
+        return merged
+
+
+def approx_distinct_results(total_rows: int, unique_rows: int, relative_error: float) -> dict:
+    """
+    Results of an approximate distinct count, with the range that holds the exact count with ~99.7% confidence (3
+    standard errors). There can't be more distinct values than rows, so the estimate is capped to the row count.
+    """
+    unique_rows = min(int(unique_rows), int(total_rows)) if total_rows is not None else int(unique_rows)
+    return {
+        'approximate': True,
+        'unique_rows': unique_rows,
+        'relative_error': relative_error,
+        'unique_rows_lower': int(math.floor(unique_rows * (1 - 3 * relative_error))),
+        'unique_rows_upper': int(math.ceil(unique_rows * (1 + 3 * relative_error))),
+    }
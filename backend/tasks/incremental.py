@@ -0,0 +1,75 @@
+import json
+import math
+
+import pandas as pd
+
+from models.check import CheckType
+from tasks.utils import NpEncoder
+
+
+def column_moments(total_rows, mean, stddev) -> dict:
+    """
+    Count, mean and sum of squared deviations (`m2`) of a column from its count, mean and sample stddev.
+    """
+    total_rows = int(total_rows)
+    return {
+        'total_rows': total_rows,
+        'mean': 0.0 if total_rows == 0 or pd.isnull(mean) else float(mean),
+        'm2': 0.0 if total_rows < 2 or pd.isnull(stddev) else float(stddev) ** 2 * (total_rows - 1),
+    }
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    """
+    Merges the count, mean and sum of squared deviations (`m2`) of two sets of values (Chan et al. parallel variance),
+    so the mean and stddev of a column can be kept up to date without reading the old rows again.
+    """
+    total_rows = a['total_rows'] + b['total_rows']
+    if a['total_rows'] == 0 or b['total_rows'] == 0:
+        return dict(b if a['total_rows'] == 0 else a, total_rows=total_rows)
+
+    delta = b['mean'] - a['mean']
+    return {
+        'total_rows': total_rows,
+        'mean': a['mean'] + delta * b['total_rows'] / total_rows,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['total_rows'] * b['total_rows'] / total_rows,
+    }
+
+
+def moments_stddev(moments: dict):
+    if moments['total_rows'] < 2:
+        return None
+    return math.sqrt(moments['m2'] / (moments['total_rows'] - 1))
+
+
+def merge_state(check_type: str, state: dict, new: dict) -> dict:
+    """
+    Merges the aggregates of the rows read by an incremental check run (`new`) with the state saved by the previous
+    runs, the result is what a full scan of the table would have returned.
+    """
+    if not state:
+        return new
+
+    check_type = CheckType(check_type)
+    if check_type == CheckType.NON_NULL:
+        return {
+            'total_rows': state['total_rows'] + new['total_rows'],
+            'null_rows': state['null_rows'] + new['null_rows'],
+        }
+    if check_type == CheckType.FRESHNESS:
+        last_values = [pd.to_datetime(v) for v in (state['last_value'], new['last_value']) if v is not None]
+        return {'last_value': str(max(last_values)) if last_values else None}
+    if check_type == CheckType.OUTLIERS:
+        # Old rows are not compared again with the updated bounds, their outliers were counted when they were new
+        return dict(merge_moments(state, new), outlier_rows=state['outlier_rows'] + new['outlier_rows'])
+    if check_type == CheckType.ORDERED:
+        return {
+            'unordered_rows': state['unordered_rows'] + new['unordered_rows'],
+            'last_value': new['last_value'] if new['last_value'] is not None else state['last_value'],
+        }
+    raise ValueError(f'Check type {check_type} can not run incrementally')
+
+
+def to_json_state(state: dict) -> dict:
+    # JSONB column, numpy/pandas values are converted to plain JSON types
+    return json.loads(json.dumps(state, cls=NpEncoder))
@@ -0,0 +1,36 @@
+from functools import reduce
+
+import pandas as pd
+
+
+def partition_names(df: pd.DataFrame) -> pd.Series:
+    """
+    Names of the partitions (rows of the `$partitions` table) like `dt=2021-01-01/hour=00`, built column by column
+    instead of row by row.
+    """
+    return reduce(lambda a, b: a + '/' + b, [f'{c}=' + df[c].astype(str) for c in df.columns])
+
+
+def partition_values(names: pd.Series) -> pd.DataFrame:
+    """
+    Partition columns of the partitions `names` (the reverse of `partition_names`), for partitions only known by name.
+    Columns with numeric values only are converted, so they are compared as numbers too.
+    """
+    df = names.str.split('/', expand=True)
+    df.columns = [c.split('=', 1)[0] for c in df.iloc[0]]
+    df = df.apply(lambda c: c.str.split('=', n=1).str[1])
+    for c in df.columns:
+        try:
+            df[c] = pd.to_numeric(df[c])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def newest_partition(df: pd.DataFrame, names: pd.Series) -> str:
+    """
+    Name of the newest partition, partition columns are compared in order with the type they have on the source (so
+    `hour=10` comes after `hour=9`). Its first column is the highest one, the partition watermark filters on it.
+    """
+    newest = df.sort_values(list(df.columns), kind='mergesort', na_position='first')
+    return names[newest.index[-1]]
@@ -0,0 +1,75 @@
+import pandas as pd
+
+
+class UniquenessReducer:
+    """
+    Counts total and distinct values over a stream of chunks. Only a 64 bit hash per distinct value is kept in memory
+    (NULLs hash to the same value, so they count as one distinct value like in pandas `drop_duplicates`).
+    """
+
+    def __init__(self):
+        self.total_rows = 0
+        self._hashes = set()
+
+    def update(self, values: pd.Series):
+        self.total_rows += len(values)
+        self._hashes.update(pd.util.hash_pandas_object(values, index=False).tolist())
+
+    @property
+    def unique_rows(self):
+        return len(self._hashes)
+
+
+class NonNullReducer:
+    """
+    Counts total and null values over a stream of chunks.
+    """
+
+    def __init__(self):
+        self.total_rows = 0
+        self.null_rows = 0
+
+    def update(self, values: pd.Series):
+        self.total_rows += len(values)
+        self.null_rows += int(values.isnull().sum())
+
+
+class FreshnessReducer:
+    """
+    Keeps the latest timestamp seen over a stream of chunks.
+    """
+
+    def __init__(self):
+        self.last_value = None
+
+    def update(self, values: pd.Series):
+        chunk_max = pd.to_datetime(values).max()
+        if not pd.isnull(chunk_max) and (self.last_value is None or chunk_max > self.last_value):
+            self.last_value = chunk_max
+
+
+class OrderedReducer:
+    """
+    Counts values smaller than the previous one over a stream of chunks (already sorted by the ordering key), only the
+    last value of the previous chunk is carried over.
+    """
+
+    def __init__(self, last_value=None):
+        self.total_rows = 0
+        self.unordered_rows = 0
+        # Incremental checks start from the last value of the previous run (ISO strings for timestamps)
+        self.last_value = last_value
+
+    def update(self, values: pd.Series):
+        if values.empty:
+            return
+
+        if isinstance(self.last_value, str) and pd.api.types.is_datetime64_any_dtype(values):
+            self.last_value = pd.Timestamp(self.last_value)
+
+        self.total_rows += len(values)
+        previous = values.shift()
+        if self.last_value is not None:
+            previous.iloc[0] = self.last_value
+        self.unordered_rows += int((values < previous).sum())
+        self.last_value = values.iloc[-1]
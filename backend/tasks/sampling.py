@@ -0,0 +1,44 @@
+import math
+
+
+def wilson_interval(violations: int, sample_rows: int, z: float = 1.96):
+    """
+    Wilson score interval of a proportion (95% by default), unlike the normal approximation it stays within [0, 1] and
+    works with small samples and proportions close to 0, which is usually the case for violation rates.
+    """
+    if sample_rows == 0:
+        return 0.0, 1.0
+
+    rate = violations / sample_rows
+    denominator = 1 + z ** 2 / sample_rows
+    center = (rate + z ** 2 / (2 * sample_rows)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / sample_rows + z ** 2 / (4 * sample_rows ** 2)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def sample_results(check, sample_rows: int) -> dict:
+    """
+    Results of a check run on a sample, without estimates of the table: duplicated or unordered rows of a sample depend
+    on the sample size (and sampling breaks up adjacent rows), so only the violations found in the sample are reported.
+    """
+    return {
+        'sampled': True,
+        'sample_method': check.sample_method,
+        'sample_size': check.sample_size,
+        'sample_rows': int(sample_rows),
+    }
+
+
+def sampled_results(check, violations: int, sample_rows: int) -> dict:
+    """
+    Results of a check whose rows are violations independently of each other (non null and outliers checks) run on a
+    sample: the estimated violation rate of the table with its 95% confidence bounds.
+    """
+    violations, sample_rows = int(violations), int(sample_rows)
+    lower, upper = wilson_interval(violations, sample_rows)
+    return {
+        **sample_results(check, sample_rows),
+        'violation_rate': violations / sample_rows if sample_rows else 0.0,
+        'violation_rate_lower': lower,
+        'violation_rate_upper': upper,
+    }
@@ -1,4 +1,6 @@
 import json
+import threading
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 
 import numpy as np
@@ -6,226 +8,532 @@ import pandas as pd
 from sqlalchemy.orm import sessionmaker
 
 import crud
-import schemas
+from core.admission import CheckAlreadyRunning, check_locks
+from core.config import settings
+from core.db_engines import engine_specs
+from core.log_stream import log_publisher
+from core.query_tags import tag_queries
 from db.session import engine
-from models import CheckExecutionStatus
-from models.deps import df_from_query
+from models import CheckExecution, CheckExecutionStatus
+from models.check import CheckType
+from models.deps import df_from_query, iter_df_from_query
 from services.check import CheckService
 from tasks.alerts import send_mm_alert
+from tasks.execution_writer import execution_writer
+from tasks.heartbeat import execution_heartbeat
+from tasks.hll import HyperLogLog, approx_distinct_results
+from tasks.incremental import column_moments, merge_state, moments_stddev, to_json_state
+from tasks.reducers import FreshnessReducer, NonNullReducer, OrderedReducer, UniquenessReducer
+from tasks.sampling import sample_results, sampled_results
 from tasks.tail_logger import init_logger
+from tasks.utils import NpEncoder
 
 
-def init_check_execution(check_id: int):
+def init_check_execution(check_id: int, partition_id: int = None, execution_id: int = None):
     Session = sessionmaker(bind=engine)
     session = Session()
-    check_exec_in = schemas.CheckExecutionCreate(exec_time=datetime.now(), check_id=check_id)
-    check_execution = crud.check_execution.create(db=session, obj_in=check_exec_in)
+    now = datetime.now()
+    # The execution row is written by `execution_writer`, the object is never added to the session
+    check_execution = CheckExecution(
+        id=execution_id if execution_id is not None else execution_writer.next_id(),
+        exec_time=now,
+        heartbeat_at=now,
+        check_id=check_id,
+        table_partition_id=partition_id,
+        status=CheckExecutionStatus.RUNNING.value,
+    )
+    if execution_id is not None:
+        # Execution queued by the API when the check was triggered (see `crud.check_execution.create_queued`)
+        execution_writer.update(execution_id, status=check_execution.status, heartbeat_at=now,
+                                table_partition_id=partition_id)
+    else:
+        execution_writer.insert(check_execution)
+    execution_heartbeat.add(check_execution.id)
 
     logger, tail = init_logger(check_execution.id)
 
     return session, check_execution, logger, tail
 
 
-def uniqueness(check_id: int):
+@contextmanager
+def check_queries(checks, check_executions):
+    """
+    Tags the source DB queries sent inside the block with the ids of the check executions, so they can be cancelled from
+    the API, and limits their run time to the statement timeout of the checks. On engines that can't enforce statement
+    timeouts the queries still running when the timeout is over are cancelled by a watchdog timer.
+    """
+    database = checks[0].database
+    engine_spec = engine_specs.get(database.type)
+    execution_ids = [check_execution.id for check_execution in check_executions]
+    timeout_seconds = max(check.get_statement_timeout() for check in checks)
+
+    watchdog = None
+    if timeout_seconds and not engine_spec.statement_timeout:
+        # All the executions share the same tagged queries, cancelling those of the first one is enough
+        watchdog = threading.Timer(timeout_seconds, engine_spec.cancel_queries, [database.get_conn(), execution_ids[0]])
+        watchdog.daemon = True
+        watchdog.start()
+    try:
+        with tag_queries(execution_ids, timeout_seconds):
+            yield
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+
+
+def get_check_partition(session, check, check_execution):
+    """
+    Partition the check runs on: the one requested for the execution or, for checks with `latest_partition_only`, the
+    newest partition of the table. None means the whole table is checked.
+    """
+    if check_execution.table_partition_id is not None:
+        partition = crud.db_table_partition.get(db=session, id=check_execution.table_partition_id)
+        if partition is None or partition.table_id != check.table_id:
+            raise ValueError('Partition {} does not belong to table {}'.format(
+                check_execution.table_partition_id, check.table_id
+            ))
+        return partition
+
+    if check.latest_partition_only:
+        partition = crud.db_table_partition.get_latest(db=session, table_id=check.table_id)
+        if partition is not None:
+            check_execution.table_partition_id = partition.id
+        return partition
+
+    return None
+
+
+def get_check_watermark(check_service, check, cursor, partition, logger):
+    """
+    Watermark range `(lower, upper)` read by an incremental check run: from the value saved by the previous run to the
+    current max of the watermark column (None when there are no new rows). None for checks that read the whole source.
+    """
+    if not check.is_incremental:
+        return None
+
+    watermark_query = check_service.get_watermark_query(check, cursor, partition)
+    logger.debug(watermark_query)
+    upper = df_from_query(watermark_query, conn=check.database.get_conn())['watermark'][0]
+    upper = None if pd.isnull(upper) else str(upper)
+
+    logger.debug('Watermark range: ({}, {}]'.format(check.watermark_value, upper))
+    return check.watermark_value, upper
+
+
+def merge_check_state(check, watermark, results: dict) -> dict:
+    """
+    Results of an incremental check run merged with the state saved by the previous runs (as is for full scans).
+    """
+    if watermark is None:
+        return results
+    return merge_state(check.type, check.incremental_state, results)
+
+
+def save_check_watermark(check, watermark, state: dict):
+    if watermark is None:
+        return
+
+    if watermark[1] is not None:
+        check.watermark_value = watermark[1]
+    check.incremental_state = to_json_state(state)
+
+
+def finish_check_execution(session, check_execution, tail, status, results=None):
+    check_execution.status = status
+    execution_writer.update(
+        check_execution.id,
+        status=status,
+        results=json.dumps(results, cls=NpEncoder) if results is not None else None,
+        table_partition_id=check_execution.table_partition_id,
+        logs=tail.contents(),
+    )
+    # Watermark and incremental state of the check
+    session.commit()
+    execution_heartbeat.remove(check_execution.id)
+
+    if settings.CHECK_LOG_STREAMING:
+        # After the log lines already buffered
+        log_publisher.end(check_execution.id, check_execution.status)
+
+
+def skip_check_execution(check_id: int, partition_id: int = None, execution_id: int = None,
+                         reason: str = 'already running'):
+    """
+    Records a skipped execution of the check, so runs that didn't happen (e.g. the check was still running) show up too.
+    """
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
+    logger.debug('Skipped: {}'.format(reason))
+    finish_check_execution(session, check_execution, tail, CheckExecutionStatus.SKIPPED.value, {'skipped': reason})
+
+
+def run_locked(check_func, check_id: int, partition_id: int = None):
+    """
+    Runs the check function holding the per-check lock, runs of a check that is already running are skipped.
+    """
+    try:
+        with check_locks.hold(check_id):
+            check_func(check_id, partition_id)
+    except CheckAlreadyRunning:
+        skip_check_execution(check_id, partition_id)
+
+
+def uniqueness(check_id: int, partition_id: int = None, execution_id: int = None):
     """
     Checks that there are no duplicates in all values.
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
     logger.debug('uniqueness check_id: {}'.format(check_id))
 
     try:
         check = crud.check.get(db=session, id=check_id)
-        cursor = check.database.get_conn().raw_connection().cursor()
-        check_query, params = CheckService(session).get_query(check, cursor)
-        logger.debug('%s\n%s', check_query, params)
-
-        df = df_from_query(check_query, params=params, conn=check.database.get_conn())
-        logger.debug('Rows: {}'.format(df.shape[0]))
-        logger.debug('Unique rows: {}'.format(df.drop_duplicates().shape[0]))
-
-        # total rows equals unique rows
+        partition = get_check_partition(session, check, check_execution)
+        if partition is not None:
+            logger.debug('Partition: {}'.format(partition.name))
+
+        with check.database.raw_cursor() as cursor, check_queries([check], [check_execution]):
+            check_service = CheckService(session)
+
+            if check.approximate:
+                results = approx_uniqueness_results(check_service, check, cursor, partition, logger)
+            elif check_service.can_push_down(check):
+                # Source DB counts rows and distinct values, only the top duplicated keys are brought back
+                stats_query = check_service.get_push_down_query(check, 'stats', cursor, partition=partition)
+                logger.debug(stats_query)
+
+                stats = df_from_query(stats_query, conn=check.database.get_conn())
+                results = {'total_rows': int(stats['total_rows'][0]), 'unique_rows': int(stats['unique_rows'][0])}
+
+                if results['total_rows'] != results['unique_rows']:
+                    duplicates_query = check_service.get_push_down_query(check, 'duplicates', cursor, partition=partition)
+                    logger.debug(duplicates_query)
+                    duplicates = df_from_query(duplicates_query, conn=check.database.get_conn())
+                    logger.debug('Top duplicated values: {}'.format(duplicates))
+            else:
+                check_query, params = check_service.get_query(check, cursor, partition)
+                logger.debug('%s\n%s', check_query, params)
+
+                # Stream the column and keep only a hash per distinct value
+                reducer = UniquenessReducer()
+                for chunk in iter_df_from_query(check_query, params=params, conn=check.database.get_conn()):
+                    reducer.update(chunk.iloc[:, 0])
+                results = {'total_rows': reducer.total_rows, 'unique_rows': reducer.unique_rows}
+
+            logger.debug('Rows: {}'.format(results['total_rows']))
+            logger.debug('Unique rows: {}'.format(results['unique_rows']))
+            if check.is_sampled:
+                results.update(sample_results(check, results['total_rows']))
+
+        # total rows equals unique rows (or, for approximate checks, is within the error bound of the estimate)
         status = CheckExecutionStatus.SUCCESS.value
 
-        if df.shape[0] != df.drop_duplicates().shape[0]:
-            logger.debug('Duplicated rows: {}'.format(df[df.duplicated()]))
+        if results['total_rows'] > results.get('unique_rows_upper', results['unique_rows']):
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({
-                'total_rows': df.shape[0],
-                'unique_rows': df.drop_duplicates().shape[0]
-            })
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, status, results)
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
+
+
+def approx_uniqueness_results(check_service, check, cursor, partition, logger) -> dict:
+    """
+    Approximate distinct count with a HyperLogLog sketch, the engine native one or one built on the worker from the
+    streamed column. The serialized sketch is kept in the results so the sketches of several runs (e.g. daily
+    partitions) can be merged into the distinct count of their union without scanning the table again.
+    """
+    if check_service.can_push_down_approx(check):
+        stats_query = check_service.get_push_down_query(check, 'approx_stats', cursor, partition=partition)
+        logger.debug(stats_query)
+
+        stats = df_from_query(stats_query, conn=check.database.get_conn())
+        total_rows = int(stats['total_rows'][0])
+        results = approx_distinct_results(
+            total_rows, stats['unique_rows'][0], engine_specs.get(check.database.type).approx_relative_error
+        )
+        results.update({
+            'sketch': stats['sketch'][0],
+            'sketch_format': check.database.type,
+            'has_nulls': bool(stats['has_nulls'][0]),
+        })
+    else:
+        check_query, params = check_service.get_query(check, cursor, partition)
+        logger.debug('%s\n%s', check_query, params)
 
+        hll = HyperLogLog()
+        total_rows = 0
+        for chunk in iter_df_from_query(check_query, params=params, conn=check.database.get_conn()):
+            hll.update(chunk.iloc[:, 0])
+            total_rows += len(chunk)
+        results = approx_distinct_results(total_rows, hll.estimate(), hll.relative_error)
+        results.update({'sketch': hll.to_sketch(), 'sketch_format': HyperLogLog.SKETCH_FORMAT})
 
-def outliers(check_id: int):
+    logger.debug('Distinct values estimate: {} ({} - {})'.format(
+        results['unique_rows'], results['unique_rows_lower'], results['unique_rows_upper']
+    ))
+    return dict(results, total_rows=total_rows)
+
+
+def outliers(check_id: int, partition_id: int = None, execution_id: int = None):
     """
     Checks that all values from the input source are within 3 standard deviations (i.e there are no outliers)
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
     logger.debug('outliers check_id: {}'.format(check_id))
 
     try:
         check = crud.check.get(db=session, id=check_id)
-        cursor = check.database.get_conn().raw_connection().cursor()
-        check_query, params = CheckService(session).get_query(check, cursor)
-        logger.debug('%s\n%s', check_query, params)
+        partition = get_check_partition(session, check, check_execution)
+        if partition is not None:
+            logger.debug('Partition: {}'.format(partition.name))
+
+        with check.database.raw_cursor() as cursor, check_queries([check], [check_execution]):
+            check_service = CheckService(session)
+            watermark = get_check_watermark(check_service, check, cursor, partition, logger)
+
+            outlier_rows = 0
+            if watermark is not None and watermark[1] is None:
+                moments = column_moments(0, None, None)
+            elif check_service.can_push_down(check):
+                # First pass gets mean/stddev, second pass counts the rows out of bounds and returns a bounded sample
+                stats_query = check_service.get_push_down_query(check, 'stats', cursor, partition=partition, watermark=watermark)
+                logger.debug(stats_query)
+
+                stats = df_from_query(stats_query, conn=check.database.get_conn())
+                moments = column_moments(stats['total_rows'][0], stats['mean'][0], stats['stddev'][0])
+
+                # Incremental checks compare the new rows with the mean/stddev of all the rows seen so far
+                bounds_moments = merge_check_state(check, watermark, dict(moments, outlier_rows=0))
+                mean, stddev = bounds_moments['mean'], moments_stddev(bounds_moments)
+                logger.debug('Mean: {}, stddev: {}'.format(mean, stddev))
+
+                if moments['total_rows'] > 0 and stddev is not None:
+                    lower, upper = mean - 3 * stddev, mean + 3 * stddev
+                    outliers_query = check_service.get_push_down_query(
+                        check, 'outliers', cursor, partition=partition, watermark=watermark, lower=lower, upper=upper
+                    )
+                    logger.debug(outliers_query)
+
+                    outliers_df = df_from_query(outliers_query, conn=check.database.get_conn())
+                    if not outliers_df.empty:
+                        outlier_rows = int(outliers_df['outlier_rows'][0])
+                        logger.debug('Sample of outlier values: {}'.format(outliers_df['column_to_check'].tolist()))
+            else:
+                check_query, params = check_service.get_query(check, cursor, partition, watermark)
+                logger.debug('%s\n%s', check_query, params)
+
+                values = df_from_query(check_query, params=params, conn=check.database.get_conn())[check.column.name]
+                moments = column_moments(values.count(), values.mean(), values.std())
+
+                bounds_moments = merge_check_state(check, watermark, dict(moments, outlier_rows=0))
+                mean, stddev = bounds_moments['mean'], moments_stddev(bounds_moments)
+                logger.debug('Mean: {}, stddev: {}'.format(mean, stddev))
+
+                if stddev is not None:
+                    outlier_rows = int((np.abs(values - mean) > (3 * stddev)).sum())
+
+            state = merge_check_state(check, watermark, dict(moments, outlier_rows=outlier_rows))
+            results = {'outlier_rows': state['outlier_rows']}
+            if check.is_sampled:
+                results.update(sampled_results(check, state['outlier_rows'], state['total_rows']))
+            logger.debug('Rows with outliers: {}'.format(results['outlier_rows']))
 
-        df = df_from_query(check_query, params=params, conn=check.database.get_conn())
-        df['is_outlier'] = np.abs(df[check.column.name] - df[check.column.name].mean()) > (3 * df[check.column.name].std())
-        logger.debug('Rows with outliers: {}'.format(df[df['is_outlier']].shape[0]))
         status = CheckExecutionStatus.SUCCESS.value
 
-        if df[df['is_outlier']].shape[0] != 0:
+        if results['outlier_rows'] != 0:
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({'outlier_rows': df[df['is_outlier']].shape[0]})
-        check_execution.logs = tail.contents()
-        session.commit()
+        save_check_watermark(check, watermark, state)
+        finish_check_execution(session, check_execution, tail, status, results)
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
 
 
-def freshness(check_id: int):
+def freshness(check_id: int, partition_id: int = None, execution_id: int = None):
     """
     Checks that all values (timestamps) from the input source are within certain time delta
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
     logger.debug('freshness check_id: {}'.format(check_id))
 
     try:
         check = crud.check.get(db=session, id=check_id)
-        cursor = check.database.get_conn().raw_connection().cursor()
-        check_query, params = CheckService(session).get_query(check, cursor)
-        logger.debug('%s\n%s', check_query, params)
+        partition = get_check_partition(session, check, check_execution)
+        if partition is not None:
+            logger.debug('Partition: {}'.format(partition.name))
 
-        df = df_from_query(check_query, params=params, conn=check.database.get_conn())
+        with check.database.raw_cursor() as cursor, check_queries([check], [check_execution]):
+            check_service = CheckService(session)
+            watermark = get_check_watermark(check_service, check, cursor, partition, logger)
 
-        # TODO fix column conversion
-        logger.debug(df.head())
-        logger.debug(df[check.column.name].dtypes)
+            # Engines return MAX(column) as a single row, but a plain column select is streamed the same way
+            reducer = FreshnessReducer()
+            if watermark is None or watermark[1] is not None:
+                check_query, params = check_service.get_query(check, cursor, partition, watermark)
+                logger.debug('%s\n%s', check_query, params)
 
-        df[check.column.name] = pd.to_datetime(df[check.column.name])
-        oldest_possible_time = datetime.now() - timedelta(seconds=check.delta_threshold_seconds)
-        logger.debug('Oldest possible time: {}'.format(oldest_possible_time))
-        df['is_fresh'] = df[check.column.name] >= oldest_possible_time
-        logger.debug(df)
+                for chunk in iter_df_from_query(check_query, params=params, conn=check.database.get_conn()):
+                    reducer.update(chunk.iloc[:, 0])
+
+            state = merge_check_state(check, watermark, {
+                'last_value': str(reducer.last_value) if reducer.last_value is not None else None
+            })
+            last_value = pd.to_datetime(state['last_value'])
+
+            oldest_possible_time = datetime.now() - timedelta(seconds=check.delta_threshold_seconds)
+            logger.debug('Oldest possible time: {}'.format(oldest_possible_time))
+            logger.debug('Last value: {}'.format(last_value))
+            is_fresh = last_value is not None and last_value >= oldest_possible_time
 
-        logger.debug('Rows with non-fresh values: {}'.format(df[~df['is_fresh']].shape[0]))
         status = CheckExecutionStatus.SUCCESS.value
 
-        if df[~df['is_fresh']].shape[0] != 0:
+        if not is_fresh:
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({'non_fresh_rows': df[~df['is_fresh']].shape[0]})
-        check_execution.logs = tail.contents()
-        session.commit()
+        save_check_watermark(check, watermark, state)
+        finish_check_execution(session, check_execution, tail, status, {
+            'non_fresh_rows': 0 if is_fresh else 1,
+            'last_value': state['last_value']
+        })
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
 
 
-def non_null(check_id: int):
+def non_null(check_id: int, partition_id: int = None, execution_id: int = None):
     """
     Checks that all values from the input source are non-null
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
     logger.debug('non_null check_id: {}'.format(check_id))
 
     try:
         check = crud.check.get(db=session, id=check_id)
-        cursor = check.database.get_conn().raw_connection().cursor()
-        check_query, params = CheckService(session).get_query(check, cursor)
-        logger.debug('%s\n%s', check_query, params)
-
-        df = df_from_query(check_query, params=params, conn=check.database.get_conn())
+        partition = get_check_partition(session, check, check_execution)
+        if partition is not None:
+            logger.debug('Partition: {}'.format(partition.name))
+
+        with check.database.raw_cursor() as cursor, check_queries([check], [check_execution]):
+            check_service = CheckService(session)
+            watermark = get_check_watermark(check_service, check, cursor, partition, logger)
+
+            if watermark is not None and watermark[1] is None:
+                total_rows, null_rows = 0, 0
+            elif check_service.can_push_down(check):
+                # Source DB returns total and null counts in a single aggregate row
+                stats_query = check_service.get_push_down_query(check, 'stats', cursor, partition=partition, watermark=watermark)
+                logger.debug(stats_query)
+
+                stats = df_from_query(stats_query, conn=check.database.get_conn())
+                total_rows = int(stats['total_rows'][0])
+                null_rows = int(stats['null_rows'][0])
+            else:
+                check_query, params = check_service.get_query(check, cursor, partition, watermark)
+                logger.debug('%s\n%s', check_query, params)
+
+                reducer = NonNullReducer()
+                for chunk in iter_df_from_query(check_query, params=params, conn=check.database.get_conn()):
+                    reducer.update(chunk.iloc[:, 0])
+                total_rows, null_rows = reducer.total_rows, reducer.null_rows
+
+            state = merge_check_state(check, watermark, {'total_rows': total_rows, 'null_rows': null_rows})
+            results = dict(state)
+            if check.is_sampled:
+                results.update(sampled_results(check, state['null_rows'], state['total_rows']))
+            logger.debug('Rows: {}'.format(results['total_rows']))
+            logger.debug('Rows with null values: {}'.format(results['null_rows']))
 
-        df['has_null'] = df.isnull().values.sum() > 0
-        logger.debug(df[df['has_null']])
-
-        logger.debug('Rows with null values: {}'.format(df[df['has_null']].shape[0]))
         status = CheckExecutionStatus.SUCCESS.value
 
-        if df[df['has_null']].shape[0] != 0:
+        if results['null_rows'] != 0:
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({'null_rows': df[df['has_null']].shape[0]})
-        check_execution.logs = tail.contents()
-        session.commit()
+        save_check_watermark(check, watermark, state)
+        finish_check_execution(session, check_execution, tail, status, results)
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
 
 
-def ordered(check_id: int):
+def ordered(check_id: int, partition_id: int = None, execution_id: int = None):
     """
     Checks that all values from the input source are in order (smaller to bigger)
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
-    logger.debug('non_null check_id: {}'.format(check_id))
+    session, check_execution, logger, tail = init_check_execution(check_id, partition_id, execution_id)
+    logger.debug('ordered check_id: {}'.format(check_id))
     try:
         check = crud.check.get(db=session, id=check_id)
-        cursor = check.database.get_conn().raw_connection().cursor()
-        check_query, params = CheckService(session).get_query(check, cursor)
-        logger.debug('%s\n%s', check_query, params)
-
-        df = df_from_query(check_query, params=params, conn=check.database.get_conn())
+        partition = get_check_partition(session, check, check_execution)
+        if partition is not None:
+            logger.debug('Partition: {}'.format(partition.name))
+
+        with check.database.raw_cursor() as cursor, check_queries([check], [check_execution]):
+            check_service = CheckService(session)
+            logger.debug('Ordering column: {}'.format(check.ordering_column.name))
+            watermark = get_check_watermark(check_service, check, cursor, partition, logger)
+
+            # Incremental and sampled checks stream the (new or sampled) rows, they need the rows count or last value
+            if watermark is None and not check.is_sampled and check_service.can_push_down(check):
+                # LAG() over the ordering key runs on the source DB, only the out-of-order rows (capped) come back
+                unordered_query = check_service.get_push_down_query(check, 'unordered', cursor, partition=partition)
+                logger.debug(unordered_query)
+
+                unordered_df = df_from_query(unordered_query, conn=check.database.get_conn())
+                unordered_rows = 0
+                if not unordered_df.empty:
+                    unordered_rows = int(unordered_df['unordered_rows'][0])
+                    logger.debug('Sample of unordered values: {}'.format(unordered_df[['previous_value', 'column_to_check']]))
+                state = {'unordered_rows': unordered_rows}
+            else:
+                # Column comes sorted by the ordering key, only the last value of each chunk is carried over (and, for
+                # incremental checks, the last value of the previous run, so only the new rows are read)
+                reducer = OrderedReducer(last_value=(check.incremental_state or {}).get('last_value') if watermark else None)
+                if watermark is None or watermark[1] is not None:
+                    check_query, params = check_service.get_query(check, cursor, partition, watermark)
+                    logger.debug('%s\n%s', check_query, params)
+
+                    for chunk in iter_df_from_query(check_query, params=params, conn=check.database.get_conn()):
+                        reducer.update(chunk.iloc[:, 0])
+
+                state = merge_check_state(check, watermark, {
+                    'unordered_rows': reducer.unordered_rows, 'last_value': reducer.last_value
+                })
+                unordered_rows = state['unordered_rows']
+
+            logger.debug('Rows with unordered values: {}'.format(unordered_rows))
+            results = {'unordered_rows': unordered_rows}
+            if check.is_sampled:
+                results.update(sample_results(check, reducer.total_rows))
 
-        from models.check import ORDERED_METRIC_NAME
-        df['prev'] = df[ORDERED_METRIC_NAME].shift()
-        df['bigger_than_previous'] = df[ORDERED_METRIC_NAME] >= df['prev'].fillna(df[ORDERED_METRIC_NAME])
-        logger.debug(df)
-        logger.debug(df[~df['bigger_than_previous']])
-
-        logger.debug('Rows with unordered values: {}'.format(df[~df['bigger_than_previous']].shape[0]))
         status = CheckExecutionStatus.SUCCESS.value
 
-        if df[~df['bigger_than_previous']].shape[0] != 0:
+        if unordered_rows != 0:
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({'unordered_rows': df[~df['bigger_than_previous']].shape[0]})
-        check_execution.logs = tail.contents()
-        session.commit()
+        save_check_watermark(check, watermark, state)
+        finish_check_execution(session, check_execution, tail, status, results)
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
 
 
-def custom_check(check_id: int):
+def custom_check(check_id: int, partition_id: int = None, execution_id: int = None):
     """
-    Checks that the SQL from the custom check returns no rows
+    Checks that the SQL from the custom check returns no rows (the SQL defines its own source, the partition is ignored)
     """
-    session, check_execution, logger, tail = init_check_execution(check_id)
+    session, check_execution, logger, tail = init_check_execution(check_id, execution_id=execution_id)
     logger.debug('custom_check check_id: {}'.format(check_id))
     try:
         check = crud.custom_check.get(db=session, id=check_id)
         logger.debug(check.source)
 
-        df = df_from_query(check.source, conn=check.database.get_conn())
+        with check_queries([check], [check_execution]):
+            df = df_from_query(check.source, conn=check.database.get_conn())
         logger.debug(df)
 
         if df.empty:
@@ -234,12 +542,153 @@ def custom_check(check_id: int):
             status = CheckExecutionStatus.FAIL.value
             send_mm_alert(check)
 
-        check_execution.status = status
-        check_execution.results = json.dumps({'row_count': df.shape[0]})
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, status, {'row_count': df.shape[0]})
     except Exception as e:
         logger.debug(e)
-        check_execution.status = CheckExecutionStatus.FAIL.value
-        check_execution.logs = tail.contents()
-        session.commit()
+        finish_check_execution(session, check_execution, tail, CheckExecutionStatus.FAIL.value)
+
+
+def table_checks(table_id: int, partition_id: int = None, check_ids: list = None):
+    """
+    Runs all the active checks of a table, or only the `check_ids` ones (e.g. the scheduled checks due together).
+    Uniqueness, non_null, freshness and outlier checks are compiled into a single aggregate query (plus one more for the
+    outliers second pass), so the table is scanned once instead of once per check, and the results are fanned out into
+    a CheckExecution per check. Other checks run on their own.
+
+    With a `partition_id` all the checks run on that partition only, otherwise checks with `latest_partition_only` run
+    on the newest partition and the rest on the whole table (one batch per partition).
+    """
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    table = crud.db_table.get(db=session, id=table_id)
+    check_service = CheckService(session)
+
+    checks = [c for c in table.checks if c.active and (check_ids is None or c.id in check_ids)]
+    batch_checks = [c for c in checks if check_service.can_batch(c)]
+    for check in checks:
+        if check not in batch_checks:
+            run_locked(check.get_func(), check.id, partition_id)
+
+    latest_partition = None
+    if partition_id is None and any(c.latest_partition_only for c in batch_checks):
+        latest_partition = crud.db_table_partition.get_latest(db=session, table_id=table.id)
+
+    batches = {}
+    for check in batch_checks:
+        batch_partition_id = partition_id
+        if batch_partition_id is None and check.latest_partition_only and latest_partition is not None:
+            batch_partition_id = latest_partition.id
+        batches.setdefault(batch_partition_id, []).append(check)
+
+    for batch_partition_id, checks in batches.items():
+        # The batch holds the locks of all its checks, the ones already running are left out of it
+        with ExitStack() as locks:
+            locked_checks = []
+            for check in checks:
+                try:
+                    locks.enter_context(check_locks.hold(check.id))
+                    locked_checks.append(check)
+                except CheckAlreadyRunning:
+                    skip_check_execution(check.id, batch_partition_id)
+            if locked_checks:
+                table_batch_checks(session, table, locked_checks, batch_partition_id)
+
+
+def table_batch_checks(session, table, batch_checks, partition_id: int = None):
+    """
+    Runs the given batchable checks of a table with a single fused scan of the table (or of one of its partitions).
+    """
+    check_service = CheckService(session)
+    executions = {check.id: init_check_execution(check.id, partition_id) for check in batch_checks}
+    for check in batch_checks:
+        executions[check.id][2].debug('{} check_id: {} (batched with {} checks of table {})'.format(
+            check.type, check.id, len(batch_checks), table.name
+        ))
+
+    database = table.schema.database
+    engine_spec = engine_specs.get(database.type)
+    metrics = {}
+
+    def metric(check, name):
+        return metrics[engine_spec.batch_alias(check, name)]
+
+    try:
+        partition = None
+        if partition_id is not None:
+            partition = crud.db_table_partition.get(db=session, id=partition_id)
+            if partition is None or partition.table_id != table.id:
+                raise ValueError('Partition {} does not belong to table {}'.format(partition_id, table.id))
+            for _, _, logger, _ in executions.values():
+                logger.debug('Partition: {}'.format(partition.name))
+
+        check_executions = [check_execution for _, check_execution, _, _ in executions.values()]
+        with database.raw_cursor() as cursor, check_queries(batch_checks, check_executions):
+            batch_query = check_service.get_batch_query(batch_checks, cursor, partition=partition)
+            for _, _, logger, _ in executions.values():
+                logger.debug(batch_query)
+            metrics = df_from_query(batch_query, conn=database.get_conn()).iloc[0]
+
+            # Outliers second pass, one more scan for all the outlier checks with a defined stddev
+            outlier_bounds = {}
+            for check in batch_checks:
+                if check.type == CheckType.OUTLIERS:
+                    mean, stddev = metric(check, 'mean'), metric(check, 'stddev')
+                    if not pd.isnull(mean) and not pd.isnull(stddev):
+                        outlier_bounds[check.id] = (float(mean) - 3 * float(stddev), float(mean) + 3 * float(stddev))
+
+            outlier_counts = {}
+            if outlier_bounds:
+                outlier_checks = [c for c in batch_checks if c.id in outlier_bounds]
+                outliers_query = check_service.get_batch_query(
+                    outlier_checks, cursor, outlier_bounds=outlier_bounds, partition=partition
+                )
+                for check in outlier_checks:
+                    executions[check.id][2].debug(outliers_query)
+                outliers = df_from_query(outliers_query, conn=database.get_conn()).iloc[0]
+                for check in outlier_checks:
+                    outlier_counts[check.id] = outliers[engine_spec.batch_alias(check, 'outlier_rows')]
+    except Exception as e:
+        for check_session, check_execution, logger, tail in executions.values():
+            logger.debug(e)
+            finish_check_execution(check_session, check_execution, tail, CheckExecutionStatus.FAIL.value)
+        return
+
+    for check in batch_checks:
+        check_session, check_execution, logger, tail = executions[check.id]
+        try:
+            results, failed = batch_check_results(check, metric, outlier_counts)
+            logger.debug('Results: {}'.format(results))
+            status = CheckExecutionStatus.SUCCESS.value
+
+            if failed:
+                status = CheckExecutionStatus.FAIL.value
+                send_mm_alert(check)
+
+            finish_check_execution(check_session, check_execution, tail, status, results)
+        except Exception as e:
+            logger.debug(e)
+            finish_check_execution(check_session, check_execution, tail, CheckExecutionStatus.FAIL.value)
+
+
+def batch_check_results(check, metric, outlier_counts: dict):
+    """
+    `(results, failed)` of a batched check, from its metrics in the fused query (`metric(check, name)`) and the outlier
+    counts of the second pass ({check id: outlier rows}).
+    """
+    if check.type == CheckType.UNIQUENESS:
+        results = {'total_rows': int(metric(check, 'total_rows')), 'unique_rows': int(metric(check, 'unique_rows'))}
+        return results, results['total_rows'] != results['unique_rows']
+    if check.type == CheckType.NON_NULL:
+        results = {'total_rows': int(metric(check, 'total_rows')), 'null_rows': int(metric(check, 'null_rows'))}
+        return results, results['null_rows'] != 0
+    if check.type == CheckType.FRESHNESS:
+        last_value = pd.to_datetime(metric(check, 'last_value'))
+        oldest_possible_time = datetime.now() - timedelta(seconds=check.delta_threshold_seconds)
+        failed = pd.isnull(last_value) or last_value < oldest_possible_time
+        return {
+            'non_fresh_rows': 1 if failed else 0,
+            'last_value': None if pd.isnull(last_value) else str(last_value)
+        }, failed
+
+    results = {'outlier_rows': int(outlier_counts.get(check.id) or 0)}
+    return results, results['outlier_rows'] != 0
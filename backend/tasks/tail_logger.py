@@ -1,6 +1,9 @@
 import logging
 import collections
 
+from core.config import settings
+from core.log_stream import log_publisher
+
 
 class TailLogHandler(logging.Handler):
 
@@ -12,6 +15,26 @@ class TailLogHandler(logging.Handler):
         self.log_queue.append(self.format(record))
 
 
+class StreamLogHandler(logging.Handler):
+    """
+    Publishes the log lines of a check execution to its live log stream, through the background `LogPublisher` so
+    logging never waits for Redis.
+    """
+
+    def __init__(self, check_exec_id, publisher):
+        logging.Handler.__init__(self)
+        self.check_exec_id = check_exec_id
+        self.publisher = publisher
+        self.seq = 0
+
+    def emit(self, record):
+        try:
+            self.publisher.publish(self.check_exec_id, self.seq, self.format(record))
+            self.seq += 1
+        except Exception:
+            self.handleError(record)
+
+
 class TailLogger(object):
 
     def __init__(self, maxlen):
@@ -34,5 +57,10 @@ def init_logger(check_exec_id):
     log_handler = tail.log_handler
     log_handler.setFormatter(formatter)
     logger.addHandler(log_handler)
+
+    if settings.CHECK_LOG_STREAMING:
+        stream_handler = StreamLogHandler(check_exec_id, log_publisher)
+        stream_handler.setFormatter(formatter)
+        logger.addHandler(stream_handler)
     logger.setLevel(logging.DEBUG)
     return logger, tail
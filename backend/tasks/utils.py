@@ -1,5 +1,8 @@
 import json
+from datetime import date
+from decimal import Decimal
 from functools import wraps
+from inspect import signature
 
 import numpy as np
 
@@ -14,6 +17,10 @@ class NpEncoder(json.JSONEncoder):
             return float(obj)
         elif isinstance(obj, np.ndarray):
             return obj.tolist()
+        elif isinstance(obj, Decimal):
+            return float(obj)
+        elif isinstance(obj, date):
+            return obj.isoformat()
         else:
             return super(NpEncoder, self).default(obj)
 
@@ -27,14 +34,21 @@ def is_url(url):
 
 
 def required_args(params):
+    """
+    Required kwargs are passed positionally in the given order, optional kwargs are only passed if the decorated
+    function accepts them (so callers can pass the same kwargs, e.g. `cursor`, to every engine spec).
+    """
     def inner(func):
+        accepted = signature(func).parameters
+
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             req_args = []
             for p in params:
-                if not kwargs.get(p):
+                if kwargs.get(p) is None:
                     raise ValueError(f'Missing param {p}')
                 req_args.append(kwargs.get(p))
-            return func(self, *req_args)
+            opt_kwargs = {k: v for k, v in kwargs.items() if k not in params and k in accepted}
+            return func(self, *req_args, **opt_kwargs)
         return wrapper
     return inner
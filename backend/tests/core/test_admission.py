@@ -0,0 +1,126 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.admission import (
+    AdmissionTimeout, CheckAlreadyRunning, CheckLocks, DBAdmission, LocalAdmissionBackend, held_leases
+)
+
+
+def test_slot_caps_concurrent_checks() -> None:
+    admission = DBAdmission(LocalAdmissionBackend(), default_max_concurrent_checks=2, lease_seconds=60, poll_seconds=0.01)
+    db = SimpleNamespace(id=1, max_concurrent_checks=None)
+    running, max_running = [], []
+    lock = threading.Lock()
+
+    def run_check():
+        with admission.slot(db):
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=run_check) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # All the executions ran (queued, none failed) but never more than 2 at once
+    assert len(max_running) == 6
+    assert max(max_running) == 2
+
+
+def test_slot_timeout_and_per_db_limit() -> None:
+    admission = DBAdmission(LocalAdmissionBackend(), default_max_concurrent_checks=5, lease_seconds=60, poll_seconds=0.01)
+    db = SimpleNamespace(id=1, max_concurrent_checks=1)
+    other_db = SimpleNamespace(id=2, max_concurrent_checks=1)
+
+    with admission.slot(db):
+        with pytest.raises(AdmissionTimeout):
+            with admission.slot(db, timeout=0.05):
+                pass
+        # Limits are per DB
+        with admission.slot(other_db, timeout=0):
+            pass
+
+    # Slot is released after the block
+    with admission.slot(db, timeout=0):
+        pass
+
+
+def test_expired_slot_lease_is_freed() -> None:
+    admission = DBAdmission(LocalAdmissionBackend(), default_max_concurrent_checks=1, lease_seconds=0, poll_seconds=0.01)
+    db = SimpleNamespace(id=1, max_concurrent_checks=None)
+
+    # e.g. a worker that died while holding the slot
+    assert admission.backend.try_acquire('dq:db:1:slots', 'dead-worker', 1, 0)
+    with admission.slot(db, timeout=0.05):
+        pass
+
+
+def test_throttle_query_waits_for_next_window() -> None:
+    admission = DBAdmission(LocalAdmissionBackend(), default_max_concurrent_checks=1, lease_seconds=60, window_seconds=1)
+
+    start = time.time()
+    window = int(start)
+    for _ in range(3):
+        admission.throttle_query(db_id=1, max_queries_per_minute=3)
+    if int(time.time()) == window:
+        # Budget of the window is spent, the next query waits for the next one
+        admission.throttle_query(db_id=1, max_queries_per_minute=3)
+        assert int(time.time()) > window
+
+    # No budget means no throttling
+    for _ in range(100):
+        admission.throttle_query(db_id=2)
+
+
+def test_check_lock_skips_overlapping_runs() -> None:
+    locks = CheckLocks(LocalAdmissionBackend(), lease_seconds=60)
+
+    with locks.hold(check_id=1):
+        with pytest.raises(CheckAlreadyRunning):
+            with locks.hold(check_id=1):
+                pass
+        # Other checks are not blocked
+        with locks.hold(check_id=2):
+            pass
+
+
+def test_check_lock_of_a_dead_run_expires() -> None:
+    locks = CheckLocks(LocalAdmissionBackend(), lease_seconds=0.1)
+
+    with locks.hold(check_id=1):
+        # Nobody renews the lease, e.g. the worker died
+        time.sleep(0.15)
+        with locks.hold(check_id=1):
+            pass
+
+
+def test_held_leases_are_renewed() -> None:
+    admission = DBAdmission(LocalAdmissionBackend(), default_max_concurrent_checks=1, lease_seconds=0.2, poll_seconds=0.01)
+    locks = CheckLocks(admission.backend, lease_seconds=0.2)
+    db = SimpleNamespace(id=1, max_concurrent_checks=None)
+
+    with admission.slot(db), locks.hold(check_id=1):
+        for _ in range(3):
+            time.sleep(0.1)
+            # e.g. the execution heartbeat of a long running check
+            held_leases.renew()
+        # Still held after more than the lease
+        with pytest.raises(AdmissionTimeout):
+            with admission.slot(db, timeout=0):
+                pass
+        with pytest.raises(CheckAlreadyRunning):
+            with locks.hold(check_id=1):
+                pass
+
+    # Released leases are no longer renewed
+    held_leases.renew()
+    with admission.slot(db, timeout=0), locks.hold(check_id=1):
+        pass
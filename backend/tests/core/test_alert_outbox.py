@@ -0,0 +1,91 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from core.admission import LocalAdmissionBackend
+from core.alert_outbox import AlertDispatcher, LocalAlertOutbox
+
+
+@pytest.fixture
+def hook():
+    """
+    Local stand-in of the Mattermost hook, answers the statuses of `hook.statuses` in order (then 200).
+    """
+    posts, statuses = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            status = statuses.pop(0) if statuses else 200
+            if status == 200:
+                posts.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url, server.posts, server.statuses = f'http://127.0.0.1:{server.server_port}/hook', posts, statuses
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_dispatcher(**kwargs) -> AlertDispatcher:
+    return AlertDispatcher(**{
+        'outbox': LocalAlertOutbox(), 'backend': LocalAdmissionBackend(), 'dedupe_seconds': 60,
+        'max_posts_per_minute': 10, 'max_attempts': 2, 'timeout_seconds': 5, **kwargs
+    })
+
+
+def test_alerts_are_sent_as_one_deduplicated_digest(hook) -> None:
+    dispatcher = get_dispatcher()
+    for check_id in (1, 2, 1, 1):
+        dispatcher.enqueue(hook.url, check_id, f'check_{check_id}', f'http://dq/checks/{check_id}')
+
+    assert dispatcher.dispatch() == 1
+    assert len(hook.posts) == 1
+    assert '2 checks failed' in hook.posts[0]['text']
+    assert '"check_1" (3 times)' in hook.posts[0]['text']
+
+    # Already alerted checks are left out until `dedupe_seconds` are over
+    dispatcher.enqueue(hook.url, 1, 'check_1', 'http://dq/checks/1')
+    dispatcher.enqueue(hook.url, 3, 'check_3', 'http://dq/checks/3')
+    assert dispatcher.dispatch() == 1
+    assert 'Check "check_3" failed.' in hook.posts[1]['text']
+    assert 'check_1' not in hook.posts[1]['text']
+
+    # Nothing enqueued, nothing sent
+    assert dispatcher.dispatch() == 0
+
+
+def test_alerts_over_the_channel_rate_limit_wait(hook) -> None:
+    dispatcher = get_dispatcher(max_posts_per_minute=1)
+    dispatcher.enqueue(hook.url, 1, 'check_1', 'http://dq/checks/1')
+    assert dispatcher.dispatch() == 1
+
+    dispatcher.enqueue(hook.url, 2, 'check_2', 'http://dq/checks/2')
+    assert dispatcher.dispatch() == 0
+    assert len(hook.posts) == 1
+    # Still in the outbox for the next window
+    assert [a['check_id'] for a in dispatcher.outbox.take(10)] == [2]
+
+
+def test_failed_posts_are_retried_then_dropped(hook) -> None:
+    dispatcher = get_dispatcher()
+    hook.statuses.extend([500])
+    dispatcher.enqueue(hook.url, 1, 'check_1', 'http://dq/checks/1')
+    assert dispatcher.dispatch() == 0
+    # Retried despite the dedupe, the alert was never delivered
+    assert dispatcher.dispatch() == 1
+    assert 'check_1' in hook.posts[0]['text']
+
+    hook.statuses.extend([500, 500])
+    dispatcher.enqueue(hook.url, 2, 'check_2', 'http://dq/checks/2')
+    assert dispatcher.dispatch() == 0
+    assert dispatcher.dispatch() == 0
+    assert dispatcher.outbox.take(10) == []
@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.db_engines import BaseEngineSpec, MysqlEngineSpec, PrestoEngineSpec
+
+
+def get_table(**column_types):
+    columns = {name: SimpleNamespace(name=name, type=type) for name, type in column_types.items()}
+    return SimpleNamespace(get_column=columns.get)
+
+
+@pytest.mark.parametrize('value, column_type, literal', [
+    ('10', 'INTEGER', '10'),
+    ('1.5', 'DECIMAL(10,2)', '1.5'),
+    ('2021-01-01', 'DATE', "DATE '2021-01-01'"),
+    ('2021-01-01 00:00:00', 'TIMESTAMP WITHOUT TIME ZONE', "TIMESTAMP '2021-01-01 00:00:00'"),
+    ('2021-01-01', 'VARCHAR', "'2021-01-01'"),
+    ("it's", None, "'it''s'"),
+])
+def test_literal(value, column_type, literal) -> None:
+    assert BaseEngineSpec().literal(value, column_type) == literal
+
+
+def test_partition_predicate_quoting() -> None:
+    check = SimpleNamespace(table=get_table(dt='DATE', hour='INTEGER'))
+    partition = SimpleNamespace(name='dt=2021-01-01/hour=07')
+    assert PrestoEngineSpec().partition_predicate(check, partition) == "\"dt\" = DATE '2021-01-01' AND \"hour\" = 7"
+
+    # Quotes in names and values are escaped, values may contain `=`
+    check = SimpleNamespace(table=get_table())
+    partition = SimpleNamespace(name='we`ird=a=\'b\'')
+    assert MysqlEngineSpec().partition_predicate(check, partition) == "`we``ird` = 'a=''b'''"
+    partition = SimpleNamespace(name='we"ird=x')
+    assert PrestoEngineSpec().partition_predicate(check, partition) == "\"we\"\"ird\" = 'x'"
+
+
+def get_check(id: int, type: str, column: str, **kwargs):
+    return SimpleNamespace(**{
+        'id': id, 'type': type, 'column': SimpleNamespace(name=column), 'schema': SimpleNamespace(name='dq'),
+        'table': SimpleNamespace(name='events', get_column=lambda name: None), 'is_sampled': False, **kwargs
+    })
+
+
+def normalize(q: str) -> str:
+    return ' '.join(q.split())
+
+
+def test_table_batch_q_template() -> None:
+    checks = [get_check(1, 'uniqueness', 'id'), get_check(2, 'non_null', 'user_id'), get_check(3, 'outliers', 'amount')]
+    q = PrestoEngineSpec().table_batch_q_template(checks, partition=SimpleNamespace(name='dt=2021-01-01'))
+    assert normalize(q) == normalize("""
+        SELECT COUNT(*) AS "c1_total_rows",
+            COUNT(DISTINCT "id") + COALESCE(MAX(CASE WHEN "id" IS NULL THEN 1 ELSE 0 END), 0) AS "c1_unique_rows",
+            COUNT(*) AS "c2_total_rows",
+            COUNT(*) - COUNT("user_id") AS "c2_null_rows",
+            COUNT("amount") AS "c3_total_rows",
+            AVG("amount") AS "c3_mean",
+            STDDEV_SAMP("amount") AS "c3_stddev"
+        FROM (SELECT * FROM "dq"."events" WHERE "dt" = '2021-01-01') AS source
+    """)
+
+
+def test_table_batch_outliers_q_template() -> None:
+    checks = [get_check(3, 'outliers', 'amount'), get_check(4, 'outliers', 'we"ird')]
+    q = PrestoEngineSpec().table_batch_outliers_q_template(checks, {3: (-1, 10), 4: (0.5, 2.5)})
+    assert normalize(q) == normalize("""
+        SELECT SUM(CASE WHEN "amount" < -1.0 OR "amount" > 10.0 THEN 1 ELSE 0 END) AS "c3_outlier_rows",
+            SUM(CASE WHEN "we""ird" < 0.5 OR "we""ird" > 2.5 THEN 1 ELSE 0 END) AS "c4_outlier_rows"
+        FROM "dq"."events"
+    """)
+
+
+@pytest.mark.parametrize('engine_spec, column, order_column, source', [
+    (PrestoEngineSpec(), '"we""ird"', '"se""q"', '"dq"."events"'),
+    (MysqlEngineSpec(), '`we"ird`', '`se"q`', '`dq`.`events`'),
+])
+def test_push_down_templates_quote_names(engine_spec, column, order_column, source) -> None:
+    check = get_check(1, 'uniqueness', 'we"ird', ordering_column=SimpleNamespace(name='se"q'))
+    stddev = 'STDDEV' if isinstance(engine_spec, PrestoEngineSpec) else 'STDDEV_SAMP'
+
+    assert normalize(engine_spec.unique_column_stats_q_template(check=check)) == normalize(f"""
+        SELECT COUNT(*) AS total_rows,
+            COUNT(DISTINCT {column}) + COALESCE(MAX(CASE WHEN {column} IS NULL THEN 1 ELSE 0 END), 0) AS unique_rows
+        FROM {source}
+    """)
+    assert normalize(engine_spec.unique_column_duplicates_q_template(check=check)) == normalize(f"""
+        SELECT {column} AS column_to_check, COUNT(*) AS duplicates FROM {source}
+        GROUP BY 1 HAVING COUNT(*) > 1 ORDER BY 2 DESC LIMIT 10
+    """)
+    assert normalize(engine_spec.non_null_column_stats_q_template(check=check)) == normalize(f"""
+        SELECT COUNT(*) AS total_rows, COUNT(*) - COUNT({column}) AS null_rows FROM {source}
+    """)
+    assert normalize(engine_spec.outlier_column_stats_q_template(check=check)) == normalize(f"""
+        SELECT COUNT({column}) AS total_rows, AVG({column}) AS mean, {stddev}({column}) AS stddev FROM {source}
+    """)
+    assert normalize(engine_spec.outlier_rows_q_template(check=check, lower=-1, upper=1)) == normalize(f"""
+        SELECT {column} AS column_to_check, COUNT(*) OVER () AS outlier_rows FROM {source}
+        WHERE {column} < -1.0 OR {column} > 1.0 LIMIT 10
+    """)
+    assert normalize(engine_spec.ordered_rows_q_template(check=check)) == normalize(f"""
+        SELECT column_to_check, previous_value, COUNT(*) OVER () AS unordered_rows
+        FROM (
+            SELECT {column} AS column_to_check, LAG({column}) OVER (ORDER BY {order_column}) AS previous_value
+            FROM {source}
+        ) lagged
+        WHERE column_to_check < previous_value LIMIT 10
+    """)
+    assert normalize(engine_spec.unique_column_q_template(check=check)) == normalize(f'SELECT {column} FROM {source}')
+    assert normalize(engine_spec.ordered_table_q_template(check=check)) == \
+        normalize(f'SELECT {column} FROM {source} ORDER BY {order_column} ASC')
+
+
+def test_partitions_q_quoting() -> None:
+    table = SimpleNamespace(name='ev"ents', schema=SimpleNamespace(name='dq'), get_column=lambda name: None)
+    assert normalize(PrestoEngineSpec().partitions_q(table, watermark='dt=2021-01-01/hour=1')) == \
+        'SELECT * FROM "dq"."ev""ents$partitions" WHERE "dt" >= \'2021-01-01\''
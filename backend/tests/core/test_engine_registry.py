@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from core.engine_registry import EngineRegistry
+
+
+def get_db(id: int, password: str = 'secret'):
+    return SimpleNamespace(id=id, type='postgresql', hostname='localhost', port=5432, database='dq', username='dq',
+                           password=password, max_queries_per_minute=None)
+
+
+def get_registry(**kwargs) -> EngineRegistry:
+    return EngineRegistry(**{
+        'pool_size': 1, 'max_overflow': 0, 'pool_recycle': 60, 'idle_seconds': 60, 'max_engines': 10, **kwargs
+    })
+
+
+def track_dispose(engine, disposed: list):
+    engine.dispose = lambda: disposed.append(engine)
+    return engine
+
+
+def test_engines_are_shared_per_db_and_connection_params() -> None:
+    registry = get_registry()
+    engine = registry.get_engine(get_db(1))
+    assert registry.get_engine(get_db(1)) is engine
+    assert registry.get_engine(get_db(2)) is not engine
+
+    # Outdated credentials are never reused
+    assert registry.get_engine(get_db(1, password='changed')) is not engine
+    # The password itself is not part of the key
+    assert all('secret' not in map(str, key) for key in registry._engines)
+
+
+def test_least_recently_used_engine_is_evicted() -> None:
+    registry, disposed = get_registry(max_engines=2), []
+    first = track_dispose(registry.get_engine(get_db(1)), disposed)
+    second = track_dispose(registry.get_engine(get_db(2)), disposed)
+
+    # Using the first engine makes the second the least recently used one
+    registry.get_engine(get_db(1))
+    registry.get_engine(get_db(3))
+    assert disposed == [second]
+    assert registry.get_engine(get_db(1)) is first
+
+
+def test_idle_and_invalidated_engines_are_disposed() -> None:
+    registry, disposed = get_registry(idle_seconds=0), []
+    idle = track_dispose(registry.get_engine(get_db(1)), disposed)
+    registry.get_engine(get_db(2))
+    assert disposed == [idle]
+
+    registry, disposed = get_registry(), []
+    engines = [track_dispose(registry.get_engine(get_db(1, password=p)), disposed) for p in ('a', 'b')]
+    other = track_dispose(registry.get_engine(get_db(2)), disposed)
+    registry.invalidate(db_id=1)
+    assert disposed == engines
+
+    registry.dispose_all()
+    assert disposed == engines + [other]
+    assert not registry._engines
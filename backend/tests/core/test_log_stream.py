@@ -0,0 +1,69 @@
+import logging
+
+from core.log_stream import LogPublisher
+from tasks.tail_logger import StreamLogHandler
+
+
+class Stream:
+    """
+    Stand-in of `LogStream`, fails while `down` is set.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.down = False
+        self.calls = 0
+
+    def publish_many(self, messages):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError('Redis is down')
+        self.messages.extend(messages)
+
+
+def get_logger(publisher) -> logging.Logger:
+    logger = logging.getLogger('test_log_stream')
+    logger.handlers = [StreamLogHandler(1, publisher)]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def test_lines_are_published_in_order_with_the_end() -> None:
+    stream = Stream()
+    # Flushed by hand, the background flush never runs during the test
+    publisher = LogPublisher(stream, flush_seconds=3600, max_pending=100, backoff_seconds=60)
+    logger = get_logger(publisher)
+    logger.debug('first')
+    logger.debug('second')
+    publisher.end(1, 'success')
+    assert stream.messages == []
+
+    publisher.flush()
+    assert stream.calls == 1
+    assert stream.messages == [('log', 1, 0, 'first'), ('log', 1, 1, 'second'), ('end', 1, 'success')]
+
+
+def test_lines_are_dropped_while_redis_is_down(capsys) -> None:
+    stream = Stream()
+    publisher = LogPublisher(stream, flush_seconds=3600, max_pending=2, backoff_seconds=60)
+    logger = get_logger(publisher)
+    for i in range(5):
+        logger.debug(f'line {i}')
+    # Only the newest lines wait
+    assert [m[3] for m in publisher._pending] == ['line 3', 'line 4']
+
+    stream.down = True
+    publisher.flush()
+    # One message for the failure, nothing for the lines logged during the backoff
+    for i in range(100):
+        logger.debug(f'line {i}')
+    publisher.flush()
+    assert stream.calls == 1
+    assert capsys.readouterr().out.count('Live logs paused') == 1
+
+    stream.down = False
+    publisher._paused_until = 0
+    logger.debug('back')
+    publisher.flush()
+    assert stream.messages == [('log', 1, 105, 'back')]
@@ -0,0 +1,34 @@
+# Before `schemas`, which only imports once `crud` has been imported
+from services.db import DBService
+import schemas
+
+
+class Session:
+    """
+    Stand-in of the metadata DB session, keeps the added objects.
+    """
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
+
+def test_create_db_keeps_the_limits() -> None:
+    db_in = schemas.DBCreate(
+        name='test db', type='postgresql', hostname='localhost', port=5432, database='dq', username='dq',
+        password='dq', max_concurrent_checks=2, max_queries_per_minute=30, statement_timeout_seconds=60,
+    )
+    session = Session()
+    created = DBService(session).create_db(db_in)
+
+    assert session.added == [created]
+    assert (created.max_concurrent_checks, created.max_queries_per_minute, created.statement_timeout_seconds) == \
+        (2, 30, 60)
@@ -0,0 +1,119 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from models.check_execution import CheckExecutionStatus
+from tasks import execution_writer as execution_writer_module
+from tasks.execution_writer import ExecutionWriter
+
+
+class Connection:
+    """
+    Stand-in of a raw DB connection, `bad_ids` rows fail every statement they are part of.
+    """
+
+    def __init__(self, bad_ids):
+        self.bad_ids = bad_ids
+        self.pending, self.committed = [], []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+        self.commits += 1
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = Connection(bad_ids=set())
+
+    def execute_values(cursor, sql, rows):
+        if any(row[0] in cursor.bad_ids for row in rows):
+            raise ValueError(f'Bad rows {cursor.bad_ids}')
+        cursor.pending.extend((sql, row) for row in rows)
+
+    monkeypatch.setattr(execution_writer_module, 'engine', SimpleNamespace(raw_connection=lambda: conn))
+    monkeypatch.setattr(execution_writer_module, 'execute_values', execute_values)
+    return conn
+
+
+def get_execution(id: int):
+    return SimpleNamespace(
+        id=id, exec_time=None, status=CheckExecutionStatus.QUEUED, check_id=1, table_partition_id=None,
+        heartbeat_at=None
+    )
+
+
+def get_writer(**kwargs) -> ExecutionWriter:
+    # Flushed by hand, the background flush never runs during a test
+    return ExecutionWriter(**{'flush_seconds': 3600, 'max_pending': 100, 'max_attempts': 2, **kwargs})
+
+
+def test_writes_are_batched_and_merged(conn) -> None:
+    writer = get_writer()
+    writer.insert(get_execution(1))
+    writer.update(1, status=CheckExecutionStatus.SUCCESS, results='{"total_rows": 3}')
+    writer.update(2, status=CheckExecutionStatus.FAIL)
+    writer.flush()
+
+    assert conn.commits == 1
+    (insert_q, insert), (update_q, update) = conn.committed
+    assert insert_q.startswith('INSERT INTO checkexecution')
+    # Changes of a pending insert are written with the insert, results stay a JSON string value
+    assert insert[2] == CheckExecutionStatus.SUCCESS
+    assert json.loads(insert[3]) == '{"total_rows": 3}'
+    assert update_q == ExecutionWriter.UPDATE_Q
+    assert update == (2, CheckExecutionStatus.FAIL, None, None, None)
+
+
+def test_failed_batch_is_written_one_by_one(conn) -> None:
+    writer = get_writer()
+    conn.bad_ids.add(2)
+    for id in (1, 2, 3):
+        writer.insert(get_execution(id))
+    writer.flush()
+
+    # The good rows are committed on their own, the bad one waits for the next flush
+    assert sorted(row[0] for _, row in conn.committed) == [1, 3]
+    assert list(writer._inserts) == [2]
+
+    writer.update(2, status=CheckExecutionStatus.FAIL)
+    writer.flush()
+    assert sorted(row[0] for _, row in conn.committed) == [1, 3]
+    # Dropped after `max_attempts` failed flushes
+    assert writer._inserts == writer._updates == writer._attempts == {}
+
+    conn.bad_ids.clear()
+    writer.flush()
+    assert sorted(row[0] for _, row in conn.committed) == [1, 3]
+
+
+def test_requeued_rows_keep_the_newer_changes(conn) -> None:
+    writer = get_writer(max_attempts=3)
+    conn.bad_ids.add(1)
+    writer.update(1, status=CheckExecutionStatus.RUNNING, heartbeat_at='2021-01-01 00:00:00')
+    writer.flush()
+    writer.update(1, status=CheckExecutionStatus.SUCCESS)
+
+    conn.bad_ids.clear()
+    writer.flush()
+    (_, update), = conn.committed
+    assert update == (1, CheckExecutionStatus.SUCCESS, None, None, '2021-01-01 00:00:00')
+
+
+def test_cancelled_executions_keep_their_status_and_results() -> None:
+    cancelled = CheckExecutionStatus.CANCELLED.value
+    columns = [c.strip() for c in ExecutionWriter.UPDATE_Q.split('\n')]
+    status, results = [c for c in columns if c.startswith(('status =', 'results ='))]
+    assert status.startswith(f"status = CASE WHEN e.status = '{cancelled}' THEN e.status ELSE")
+    assert results.startswith(f"results = CASE WHEN e.status = '{cancelled}' THEN e.results ELSE")
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tasks.hll import HyperLogLog, approx_distinct_results
+
+
+@pytest.mark.parametrize('distinct', [10, 1000, 100000])
+def test_estimate_within_error_bounds(distinct) -> None:
+    hll = HyperLogLog()
+    hll.update(pd.Series(np.arange(distinct)).repeat(3))
+
+    # 3 standard errors, small counts are exact-ish thanks to linear counting
+    assert abs(hll.estimate() - distinct) <= 3 * hll.relative_error * distinct + 1
+
+
+def test_merged_sketches_equal_the_sketch_of_the_union() -> None:
+    a, b, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    first, second = pd.Series(np.arange(0, 6000)), pd.Series(np.arange(4000, 10000))
+    a.update(first)
+    b.update(second)
+    union.update(pd.concat([first, second]))
+
+    merged = HyperLogLog.merge_sketches([a.to_sketch(), b.to_sketch()])
+    assert np.array_equal(merged.registers, union.registers)
+    assert merged.estimate() == union.estimate()
+
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=10))
+
+
+def test_sketch_round_trip() -> None:
+    hll = HyperLogLog(precision=10)
+    hll.update(pd.Series(['a', 'b', None, 'a']))
+    # Empty chunks change nothing
+    hll.update(pd.Series([], dtype='object'))
+
+    restored = HyperLogLog.from_sketch(hll.to_sketch())
+    assert restored.precision == 10
+    assert np.array_equal(restored.registers, hll.registers)
+    assert restored.estimate() == 3
+    assert HyperLogLog.merge_sketches([]) is None
+
+
+def test_approx_distinct_results_are_capped_to_the_row_count() -> None:
+    results = approx_distinct_results(total_rows=100, unique_rows=102, relative_error=0.01)
+    assert results['unique_rows'] == 100
+    assert results['unique_rows_lower'] == 97 and results['unique_rows_upper'] == 103
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.check import CheckType
+from tasks.incremental import column_moments, merge_moments, merge_state, moments_stddev
+
+
+def moments(values: pd.Series) -> dict:
+    return column_moments(values.count(), values.mean(), values.std())
+
+
+def test_merged_moments_equal_a_full_recompute() -> None:
+    values = pd.Series(np.random.default_rng(0).normal(10, 3, size=1000))
+
+    merged = moments(values.iloc[:0])
+    for start in range(0, 1000, 137):
+        merged = merge_moments(merged, moments(values.iloc[start:start + 137]))
+
+    assert merged['total_rows'] == 1000
+    assert merged['mean'] == pytest.approx(values.mean())
+    assert moments_stddev(merged) == pytest.approx(values.std())
+
+
+def test_moments_of_tiny_sets() -> None:
+    single = moments(pd.Series([4.0]))
+    assert single == {'total_rows': 1, 'mean': 4.0, 'm2': 0.0}
+    assert moments_stddev(single) is None
+    assert moments_stddev(merge_moments(single, moments(pd.Series([6.0])))) == pytest.approx(pd.Series([4.0, 6.0]).std())
+
+
+def test_merged_state_equals_a_full_scan() -> None:
+    assert merge_state(CheckType.NON_NULL.value, {'total_rows': 10, 'null_rows': 2}, {'total_rows': 5, 'null_rows': 1}) \
+        == {'total_rows': 15, 'null_rows': 3}
+
+    assert merge_state(CheckType.FRESHNESS.value, {'last_value': '2021-01-02'}, {'last_value': None}) \
+        == {'last_value': '2021-01-02 00:00:00'}
+
+    assert merge_state(CheckType.ORDERED.value, {'unordered_rows': 1, 'last_value': 5}, {'unordered_rows': 0, 'last_value': None}) \
+        == {'unordered_rows': 1, 'last_value': 5}
+
+    old, new = pd.Series([1.0, 2.0, 3.0]), pd.Series([10.0, 20.0])
+    state = merge_state(
+        CheckType.OUTLIERS.value, dict(moments(old), outlier_rows=1), dict(moments(new), outlier_rows=2)
+    )
+    assert state['outlier_rows'] == 3
+    assert moments_stddev(state) == pytest.approx(pd.concat([old, new]).std())
+
+    # First run, nothing saved yet
+    assert merge_state(CheckType.NON_NULL.value, {}, {'total_rows': 1, 'null_rows': 0}) == {'total_rows': 1, 'null_rows': 0}
+
+    with pytest.raises(ValueError):
+        merge_state(CheckType.UNIQUENESS.value, {'total_rows': 1}, {'total_rows': 1})
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from tasks.partitions import newest_partition, partition_names, partition_values
+
+
+def test_partition_names() -> None:
+    df = pd.DataFrame({'dt': ['2021-01-01', '2021-01-02'], 'hour': [0, 13]})
+    assert partition_names(df).tolist() == ['dt=2021-01-01/hour=0', 'dt=2021-01-02/hour=13']
+
+
+def test_newest_partition_compares_typed_values() -> None:
+    # As strings `id=9` sorts after `id=10`, the watermark would stop moving forward
+    df = pd.DataFrame({'id': [8, 9, 10]})
+    names = partition_names(df)
+    assert names.max() == 'id=9'
+    assert newest_partition(df, names) == 'id=10'
+
+    # The first column comes first, it's the one the watermark filters on
+    df = pd.DataFrame({'dt': ['2021-01-02', '2021-01-01', '2021-01-02'], 'hour': [10, 23, 9]})
+    assert newest_partition(df, partition_names(df)) == 'dt=2021-01-02/hour=10'
+
+
+def test_partition_values_of_saved_names() -> None:
+    names = pd.Series(['dt=2021-01-02/hour=9', 'dt=2021-01-02/hour=10', 'dt=2021-01-01/hour=23'])
+    df = partition_values(names)
+    assert list(df.columns) == ['dt', 'hour']
+    assert df['hour'].tolist() == [9, 10, 23]
+    assert newest_partition(df, names) == 'dt=2021-01-02/hour=10'
+
+    names = pd.Series(['id=99', 'id=100', 'id=__HIVE_DEFAULT_PARTITION__'])
+    assert partition_values(names)['id'].tolist() == ['99', '100', '__HIVE_DEFAULT_PARTITION__']
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from tasks.reducers import FreshnessReducer, NonNullReducer, OrderedReducer, UniquenessReducer
+
+
+def run_chunks(reducer, values: pd.Series, chunk_size: int):
+    for start in range(0, len(values), chunk_size):
+        reducer.update(values.iloc[start:start + chunk_size].reset_index(drop=True))
+    return reducer
+
+
+def test_chunked_results_equal_a_single_pass() -> None:
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.integers(0, 50, size=1000)).astype('float').mask(rng.random(1000) < 0.1)
+    timestamps = pd.Series(pd.date_range('2021-01-01', periods=1000, freq='h')).sample(frac=1, random_state=0)
+    ordered = pd.Series(np.r_[np.arange(500), np.arange(500)])
+
+    for chunk_size in (1, 7, 1000):
+        single, chunked = UniquenessReducer(), run_chunks(UniquenessReducer(), values, chunk_size)
+        single.update(values)
+        assert (chunked.total_rows, chunked.unique_rows) == (single.total_rows, single.unique_rows)
+        # NULLs count as one distinct value, like pandas `drop_duplicates`
+        assert chunked.unique_rows == len(values.drop_duplicates())
+
+        chunked = run_chunks(NonNullReducer(), values, chunk_size)
+        assert (chunked.total_rows, chunked.null_rows) == (1000, int(values.isnull().sum()))
+
+        chunked = run_chunks(FreshnessReducer(), timestamps, chunk_size)
+        assert chunked.last_value == timestamps.max()
+
+        single, chunked = OrderedReducer(), run_chunks(OrderedReducer(), ordered, chunk_size)
+        single.update(ordered)
+        assert (chunked.total_rows, chunked.unordered_rows) == (single.total_rows, single.unordered_rows) == (1000, 1)
+
+
+def test_ordered_reducer_starts_from_the_previous_run() -> None:
+    reducer = OrderedReducer(last_value='2021-01-02 00:00:00')
+    reducer.update(pd.Series(pd.to_datetime(['2021-01-01', '2021-01-03'])))
+    assert reducer.unordered_rows == 1
+
+    # Empty chunks change nothing
+    reducer.update(pd.Series([], dtype='datetime64[ns]'))
+    assert (reducer.total_rows, reducer.last_value) == (2, pd.Timestamp('2021-01-03'))
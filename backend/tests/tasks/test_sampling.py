@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tasks.sampling import sample_results, sampled_results, wilson_interval
+
+
+def test_wilson_interval_edge_cases() -> None:
+    # No sample, nothing is known
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+    # No violations, the lower bound is 0 but the upper one isn't
+    lower, upper = wilson_interval(0, 100)
+    assert lower == 0.0 and 0 < upper < 0.05
+
+    # All violations, mirrored
+    lower, upper = wilson_interval(100, 100)
+    assert upper == pytest.approx(1.0) and 0.95 < lower < 1
+
+    # Always within [0, 1] and around the observed rate, narrower with bigger samples
+    for violations, sample_rows in ((1, 1), (1, 3), (5, 10), (50, 100)):
+        lower, upper = wilson_interval(violations, sample_rows)
+        assert 0 <= lower <= violations / sample_rows <= upper <= 1
+    assert wilson_interval(500, 1000)[1] - wilson_interval(500, 1000)[0] < upper - lower
+
+
+def test_sampled_results() -> None:
+    check = SimpleNamespace(sample_method='bernoulli', sample_size=10)
+    results = sampled_results(check, violations=5, sample_rows=50)
+    assert results['violation_rate'] == pytest.approx(0.1)
+    assert results['violation_rate_lower'] < 0.1 < results['violation_rate_upper']
+    assert sampled_results(check, violations=0, sample_rows=0)['violation_rate'] == 0.0
+
+
+def test_sample_results_have_no_estimates() -> None:
+    # Uniqueness and ordered checks only report what the sample holds
+    check = SimpleNamespace(sample_method='rows', sample_size=1000)
+    results = sample_results(check, sample_rows=1000)
+    assert results == {'sampled': True, 'sample_method': 'rows', 'sample_size': 1000, 'sample_rows': 1000}
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from core.db_engines import PrestoEngineSpec
+from tasks.scripts import batch_check_results
+
+
+def test_batch_results_are_fanned_out_per_check() -> None:
+    engine_spec = PrestoEngineSpec()
+    checks = [
+        SimpleNamespace(id=1, type='uniqueness'),
+        SimpleNamespace(id=2, type='non_null'),
+        SimpleNamespace(id=3, type='freshness', delta_threshold_seconds=60 * 60),
+        SimpleNamespace(id=4, type='outliers'),
+        SimpleNamespace(id=5, type='outliers'),
+    ]
+    # One row of the fused query, as returned by the source DB
+    metrics = pd.Series({
+        'c1_total_rows': 10, 'c1_unique_rows': 9, 'c2_total_rows': 10, 'c2_null_rows': 0,
+        'c3_last_value': datetime.now() - timedelta(hours=2), 'c4_total_rows': 10, 'c4_mean': 5.0, 'c4_stddev': 1.0,
+        'c5_total_rows': 0, 'c5_mean': None, 'c5_stddev': None,
+    })
+
+    def metric(check, name):
+        return metrics[engine_spec.batch_alias(check, name)]
+
+    results = {check.id: batch_check_results(check, metric, {4: 2}) for check in checks}
+    assert results[1] == ({'total_rows': 10, 'unique_rows': 9}, True)
+    assert results[2] == ({'total_rows': 10, 'null_rows': 0}, False)
+    assert results[3][0]['non_fresh_rows'] == 1 and results[3][1]
+    assert results[4] == ({'outlier_rows': 2}, True)
+    # No stddev, no second pass and no outliers
+    assert results[5] == ({'outlier_rows': 0}, False)
@@ -0,0 +1,20 @@
+import scheduler
+from scheduler import DueChecks
+
+
+def test_due_checks_of_a_table_are_sent_together(monkeypatch) -> None:
+    tasks = []
+    monkeypatch.setattr(scheduler.celery_app, 'send_task', lambda name, args: tasks.append((name, args)))
+
+    # Sent by hand, the window never ends during the test
+    due_checks = DueChecks(window_seconds=3600)
+    for table_id, schedule, check_id in ((1, '0 * * * *', 10), (1, '0 * * * *', 11), (1, '0 0 * * *', 12)):
+        due_checks.add(table_id, schedule, check_id)
+    due_checks.send(1, '0 * * * *')
+    due_checks.send(1, '0 0 * * *')
+    due_checks.send(1, '0 0 * * *')
+
+    assert tasks == [
+        ('tasks.celery_worker.exec_table_checks', [1, None, [10, 11]]),
+        ('tasks.celery_worker.exec_check', [12, None, None]),
+    ]
@@ -16,6 +16,13 @@ import AlarmOnIcon from '@material-ui/icons/AlarmOn';
 import { TopToolbarThin } from "../layout/TopToolbarThin";
 import { validateCrontab } from "./CustomChecks";
 
+const sampleMethodChoices = [
+    { id: 'rows', name: 'Fixed number of rows' },
+    { id: 'percent', name: 'Percentage of rows' },
+    { id: 'bernoulli', name: 'TABLESAMPLE BERNOULLI (percentage)' },
+    { id: 'system', name: 'TABLESAMPLE SYSTEM (percentage)' },
+];
+
 const sourceTypeChoices = [
     { id: 'column', name: 'Individual column' },
     { id: 'table', name: 'Table partitions' },
@@ -101,10 +108,10 @@ const useStyles = makeStyles({
     },
 });
 
-const triggerCheckExecution = (record) => {
+const triggerCheckExecution = (record, notify) => {
     httpClient(`${apiUrl}/checks/trigger/${record.id}`, {
         method: 'POST',
-    })
+    }).then(({ json }) => notify(`Check execution ${json.id} queued`))
 };
 
 const TriggerButton = (record) => {
@@ -117,7 +124,7 @@ const TriggerButton = (record) => {
             label='Trigger'
             onClick={() => { 
                 notify('Check will run shortly'); 
-                triggerCheckExecution(record);
+                triggerCheckExecution(record, notify);
             }}
             to={`/checks`}
         />
@@ -180,6 +187,7 @@ export const CheckEdit = props => (
             <TextInput multiline fullWidth source="description" />
             <CommaSeparatedListInput source="false_positives" label='False positive dates' />
             <NumberInput source="delta_threshold_seconds"/>
+            <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the DB timeout" />
             <BooleanInput source="active" label='Active'/>
         </SimpleForm>
     </Edit>
@@ -282,7 +290,43 @@ export const CheckCreate = props => {
                     <NumberInput source="delta_threshold_seconds"/>
                 }
             </FormDataConsumer>
+            <FormDataConsumer>
+                {({formData, ...rest}) => formData.type === 'ordered' &&
+                    <ReferenceInput label="Order by column" source="order_column_id" reference="db_columns" target="table_id" filter={{ table_id: formData.table_id }} sort={{ field: 'name', order: 'ASC' }} perPage={1000} allowEmpty
+                        helperText="Column that defines the row order, defaults to the checked column">
+                        <SelectInput optionText="name" />
+                    </ReferenceInput>
+                }
+            </FormDataConsumer>
             {/* <TextInput multiline fullWidth source="extra_where" label="Additional WHERE filters"/> */}
+            <FormDataConsumer>
+                {({formData, ...rest}) => formData.type === 'uniqueness' &&
+                    <BooleanInput source="approximate" label='Approximate'
+                        helperText="Estimate the distinct values with a HyperLogLog sketch (for tables too big to count exactly)" />
+                }
+            </FormDataConsumer>
+            <BooleanInput source="latest_partition_only" label='Latest partition only'
+                helperText="On partitioned tables, only check the newest partition on each run" />
+            <FormDataConsumer>
+                {({formData, ...rest}) => formData.type && formData.type !== 'freshness' &&
+                    <SelectInput source="sample_method" label="Sampling" choices={sampleMethodChoices} allowEmpty
+                        helperText="Run on a random sample of the rows and report violation rates with 95% confidence bounds" />
+                }
+            </FormDataConsumer>
+            <FormDataConsumer>
+                {({formData, ...rest}) => formData.sample_method &&
+                    <NumberInput source="sample_size" label={formData.sample_method === 'rows' ? 'Sample rows' : 'Sample percentage'} validate={[required()]} />
+                }
+            </FormDataConsumer>
+            <FormDataConsumer>
+                {({formData, ...rest}) => ['non_null', 'freshness', 'outliers', 'ordered'].includes(formData.type) &&
+                    <ReferenceInput label="Watermark column" source="watermark_column_id" reference="db_columns" target="table_id" filter={{ table_id: formData.table_id }} sort={{ field: 'name', order: 'ASC' }} perPage={1000} allowEmpty
+                        helperText="Incremental mode: each run only reads the rows past the last value seen of this column">
+                        <SelectInput optionText="name" />
+                    </ReferenceInput>
+                }
+            </FormDataConsumer>
+            <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the DB timeout" />
             <BooleanInput source="active" label='Active'/>
         </SimpleForm>
     </Create>
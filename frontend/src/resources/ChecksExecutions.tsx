@@ -1,12 +1,14 @@
 import * as React from "react";
+import { useEffect, useState } from "react";
 import { 
     List, Datagrid, TextField, ReferenceField, Show, SimpleShowLayout, DateField, Labeled, Pagination,
-    EditButton, useNotify
+    EditButton, useNotify, useRefresh
 } from 'react-admin';
 import { TimeSinceNowField } from "../utils";
 import { makeStyles } from '@material-ui/core/styles';
 import LabelImportantIcon from '@material-ui/icons/LabelImportant';
 import OpenInNewIcon from '@material-ui/icons/OpenInNew';
+import CancelIcon from '@material-ui/icons/Cancel';
 import { httpClient, apiUrl } from "../DataProvider";
 
 export const CheckExecutionList = props => (
@@ -57,6 +59,74 @@ const SetAsSucceedButton = (data) => {
     return <div/>
 };
 
+const CancelButton = (data) => {
+    const notify = useNotify();
+    const record = data.record;
+    if (record.status === 'queued' || record.status === 'running') {
+        return (
+            <EditButton
+                icon={<CancelIcon/>}
+                label='Cancel execution'
+                onClick={() => { 
+                    notify('Check execution queries will be cancelled shortly'); 
+                    httpClient(`${apiUrl}/check_executions/cancel/${record.id}`, { method: 'PUT' })
+                }}
+                to={`..`}
+            />
+        )
+    }
+    return <div/>
+};
+
+// Live logs (server-sent events) of a queued/running execution, the saved logs are shown once it's over
+const LiveLogs = (data) => {
+    const classes = useStyles();
+    const refresh = useRefresh();
+    const record = data.record;
+    const running = record && ['queued', 'running'].includes(record.status);
+    const [lines, setLines] = useState<string[]>([]);
+    useEffect(() => {
+        if (!running) {
+            return;
+        }
+        const source = new EventSource(`${apiUrl}/check_executions/${record.id}/logs/stream`);
+        source.addEventListener('log', (e: any) => setLines(previous => [...previous, JSON.parse(e.data)]));
+        source.addEventListener('end', () => { source.close(); refresh(); });
+        return () => source.close();
+    }, [running, record, refresh]);
+    if (!running) {
+        return null;
+    }
+    return (
+        <Labeled label="Live logs">
+            <div className={classes.terminal}>
+                <span className={classes.prompt}>{lines.join('\n')}</span>
+            </div>
+        </Labeled>
+    );
+};
+
+// Polls the lightweight status endpoint while the execution is queued/running, the page reloads when the status changes
+const RefreshWhileRunning = (data) => {
+    const refresh = useRefresh();
+    const record = data.record;
+    const running = record && ['queued', 'running'].includes(record.status);
+    useEffect(() => {
+        if (!running) {
+            return;
+        }
+        const interval = setInterval(() => {
+            httpClient(`${apiUrl}/check_executions/${record.id}/status`).then(({ json }) => {
+                if (json.status !== record.status) {
+                    refresh();
+                }
+            });
+        }, 5000);
+        return () => clearInterval(interval);
+    }, [running, record, refresh]);
+    return null;
+};
+
 const OpenInSupersetButton = (props => {
     return (
         <EditButton
@@ -85,6 +155,9 @@ export const CheckExecutionShow = props => (
             <TimeSinceNowField addLabel label="Time since last execution" source="exec_time_since" />
             <TextField source="status" />
             <SetAsSucceedButton {...props.data} />
+            <CancelButton {...props.data} />
+            <RefreshWhileRunning {...props.data} />
+            <LiveLogs {...props.data} />
             <TextField source="results" />
             <Labeled label="Logs">
                 <TerminalTextField source="logs" />
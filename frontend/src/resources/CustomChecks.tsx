@@ -3,7 +3,7 @@ import {
     List, Datagrid, TextField, TextInput, BooleanField, ChipField, ReferenceField, SimpleShowLayout, Show,
     SimpleForm, Edit, Create, CloneButton, BooleanInput, Filter, EditButton, ShowButton, Pagination, 
     ReferenceInput, SelectInput, BulkDeleteButton, Button, useUpdateMany, useRefresh, useNotify, 
-    useUnselectAll, required
+    useUnselectAll, NumberInput, required
 } from 'react-admin';
 import { crontabValidation, LastCheckExecInfoField } from "../utils";
 import { AsideChecks } from "../layout/AsideChecks";
@@ -83,10 +83,10 @@ const useStyles = makeStyles({
     },
 });
 
-const triggerCustomCheckExecution = (record) => {
+const triggerCustomCheckExecution = (record, notify) => {
     httpClient(`${apiUrl}/custom_checks/trigger/${record.id}`, {
         method: 'POST',
-    })
+    }).then(({ json }) => notify(`Check execution ${json.id} queued`))
 };
 
 const TriggerButton = (record) => {
@@ -99,7 +99,7 @@ const TriggerButton = (record) => {
             label='Trigger'
             onClick={() => { 
                 notify('Check will run shortly'); 
-                triggerCustomCheckExecution(record);
+                triggerCustomCheckExecution(record, notify);
             }}
             to={`/custom_checks`}
         />
@@ -144,6 +144,7 @@ export const CustomCheckEdit = props => {
                 <TextInput source="schedule" validate={validateCrontab} />
                 <TextInput multiline fullWidth source="description" />
                 <TextInput multiline fullWidth source="source" validate={[required()]}/>
+                <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the DB timeout" />
                 <BooleanInput source="active" label='Active'/>
             </SimpleForm>
         </Edit>
@@ -193,6 +194,7 @@ export const CustomCheckCreate = props => {
             <TextInput source="schedule" validate={validateCrontab}/>
             <TextInput multiline fullWidth source="description" />
             <TextInput multiline fullWidth label='SQL Source (your query should return 0 rows for the DQ check to succeed)' source="source" defaultValue="SELECT * FROM (SELECT 1) AS dummy WHERE 1=2" validate={[required()]}/>
+            <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the DB timeout" />
             <BooleanInput source="active" label='Active'/>
         </SimpleForm>
     </Create>
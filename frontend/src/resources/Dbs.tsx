@@ -101,6 +101,9 @@ export const DBShow = props => (
             <TextField source="port" />
             <TextField source="database" />
             <TextField source="blacklist" label="Blacklist (Comma separated list of schemas that shouldn't be included in Auto-DQ metadata (accepts regex too)"/>
+            <TextField source="max_concurrent_checks" label="Max concurrent checks" />
+            <TextField source="max_queries_per_minute" label="Max queries per minute" />
+            <TextField source="statement_timeout_seconds" label="Query timeout (seconds)" />
             <ReferenceManyField label="Schemas" reference="db_schemas" target="database_id" sort={{ field: 'name', order: 'ASC' }}>
                 <SingleFieldList linkType="show">
                     <ChipField source="name" />
@@ -123,6 +126,9 @@ export const DBCreate = props => (
             <TextInput source="username" />
             <TextInput source="password" />
             <TextInput fullWidth source="blacklist" label="Blacklist (Comma separated list of schemas that shouldn't be included in Auto-DQ metadata, accepts regex too)"/>
+            <NumberInput source="max_concurrent_checks" label="Max concurrent checks" helperText="Defaults to the server setting" />
+            <NumberInput source="max_queries_per_minute" label="Max queries per minute" helperText="Unlimited if empty" />
+            <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the server setting" />
         </SimpleForm>
     </Create>
 );
@@ -141,6 +147,9 @@ export const DBEdit = props => (
             <TextInput source="username" />
             <TextInput source="password" />
             <TextInput fullWidth multiline source="blacklist" label="Blacklist (Comma separated list of schemas that shouldn't be included in Auto-DQ metadata, accepts regex too)"/>
+            <NumberInput source="max_concurrent_checks" label="Max concurrent checks" helperText="Defaults to the server setting" />
+            <NumberInput source="max_queries_per_minute" label="Max queries per minute" helperText="Unlimited if empty" />
+            <NumberInput source="statement_timeout_seconds" label="Query timeout (seconds)" helperText="Defaults to the server setting" />
         </SimpleForm>
     </Edit>
 );
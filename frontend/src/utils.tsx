@@ -33,10 +33,12 @@ export const TimeSinceNowField = props => {
 
 export const LastCheckExecInfoField = props => {
     props.record.last_exec_info = props.record.status + ' (' + timeSince(Date.parse(props.record.exec_time + 'Z')) + ')';
-    if (props.record.status === 'running') {
+    if (props.record.status === 'running' || props.record.status === 'queued') {
         return <Chip icon={<CachedIcon />} style={{ backgroundColor: 'lightblue' }} label={props.record.status + ' (' + timeSince(Date.parse(props.record.exec_time + 'Z')) + ')'}/>
     } else if (props.record.status === 'success') {
         return <Chip icon={<CheckIcon />} style={{ backgroundColor: 'lightgreen' }} label={props.record.status + ' (' + timeSince(Date.parse(props.record.exec_time + 'Z')) + ')'}/>
+    } else if (props.record.status === 'skipped' || props.record.status === 'cancelled') {
+        return <Chip style={{ backgroundColor: 'lightgrey' }} label={props.record.last_exec_info}/>
     }
     else {
         return <Chip icon={<ClearIcon  />} style={{ backgroundColor: '#ff8c8c' }} label={props.record.last_exec_info}/>